@@ -0,0 +1,190 @@
+"""Latency of login_user()/register_user() as the users table grows.
+
+Run from Final_Project:
+    python benchmarks/bench_auth.py --sizes 10000,100000,1000000 --output auth.json
+
+For each size a fresh temporary (or, with --in-memory, RAM-only) database is
+seeded with that many users.
+Seeded rows use a near-free hash so seeding a million users takes seconds;
+the handful of users that logins actually hit are hashed with the measured
+--hash-params, so login latency includes the real PBKDF2/scrypt cost.
+Results (p50/p95/p99 per operation, single- and multi-threaded) are written
+as JSON so runs can be compared between releases.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import audit, database, hashing
+from modules.auth import login_user, register_user
+
+SEED_PARAMS = "pbkdf2_sha256$1"
+SEED_CHUNK = 50000
+PASSWORD = "benchmark-password"
+
+
+def seed(size, probes, params):
+    """Inserts `size` users; the first `probes` are hashed with the measured params."""
+    with database.db_connection() as conn:
+        for start in range(0, size, SEED_CHUNK):
+            rows = []
+            for i in range(start, min(size, start + SEED_CHUNK)):
+                row_params = params if i < probes else SEED_PARAMS
+                salt = os.urandom(32)
+                rows.append((f"user{i}", hashing.derive_key(PASSWORD, salt, row_params), salt, row_params))
+            conn.executemany("INSERT INTO users (username, password_hash, salt, hash_params) "
+                             "VALUES (?, ?, ?, ?)", rows)
+            conn.commit()
+        conn.execute("ANALYZE")
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pick(q):
+        return ordered[min(n - 1, int(q * n))] * 1000.0
+
+    return {
+        "count": n,
+        "mean_ms": sum(ordered) / n * 1000.0,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1] * 1000.0,
+    }
+
+
+def make_operations(size, probes, rng):
+    counter = iter(range(10 ** 12))
+    lock = threading.Lock()
+
+    def fresh_name():
+        with lock:
+            return f"new{next(counter)}"
+
+    return {
+        "login_hit": lambda: login_user(f"user{rng.randrange(probes)}", PASSWORD),
+        "login_miss": lambda: login_user(f"missing{rng.randrange(size)}", PASSWORD),
+        "register": lambda: register_user(fresh_name(), PASSWORD),
+        "register_duplicate": lambda: register_user(f"user{rng.randrange(size)}", PASSWORD),
+    }
+
+
+def measure(operation, samples, threads):
+    latencies = []
+    lock = threading.Lock()
+    per_thread = max(1, samples // threads)
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        local = []
+        barrier.wait()
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            operation()
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    result = percentiles(latencies)
+    result["threads"] = threads
+    result["ops_per_sec"] = len(latencies) / elapsed
+    return result
+
+
+def run_size(size, args):
+    rng = random.Random(args.seed)
+    probes = min(size, args.probes)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_database(f"memory://bench-{size}" if args.in_memory
+                                    else os.path.join(tmp, "bench.db"))
+        database.initialize_db()
+
+        start = time.perf_counter()
+        seed(size, probes, args.hash_params)
+        seed_seconds = time.perf_counter() - start
+
+        operations = make_operations(size, probes, rng)
+        results = {}
+        for name, operation in operations.items():
+            # Logins queue audit events; write out the previous pass's backlog
+            # so it isn't competing for the database while this one is timed
+            audit.flush()
+            single = measure(operation, args.samples, 1)
+            audit.flush()
+            results[name] = {
+                "single": single,
+                "multi": measure(operation, args.samples, args.threads),
+            }
+            print(f"  {name:<19} p50 {results[name]['single']['p50_ms']:8.3f} ms   "
+                  f"p99 {results[name]['single']['p99_ms']:8.3f} ms   "
+                  f"x{args.threads}: {results[name]['multi']['ops_per_sec']:9.1f} ops/s",
+                  file=sys.stderr)
+        # Stop the audit writer before the database (and its folder) goes away
+        audit.shutdown()
+        database.close_db_connections()
+
+    return {"users": size, "seed_seconds": seed_seconds, "operations": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000",
+                        help="comma-separated table sizes, e.g. 10000,100000,1000000")
+    parser.add_argument("--samples", type=int, default=200, help="operations timed per measurement")
+    parser.add_argument("--threads", type=int, default=8, help="threads for the multi-threaded pass")
+    parser.add_argument("--probes", type=int, default=100, help="users hashed with --hash-params")
+    parser.add_argument("--hash-params", default=hashing.DEFAULT_PARAMS)
+    parser.add_argument("--in-memory", action="store_true",
+                        help="run against an in-memory database instead of a temp file")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="JSON results file (default: stdout)")
+    args = parser.parse_args()
+    hashing.set_hash_params(args.hash_params)
+
+    report = {
+        "benchmark": "auth",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "hash_params": args.hash_params,
+        "samples": args.samples,
+        "threads": args.threads,
+        "seed": args.seed,
+        "in_memory": args.in_memory,
+        "results": [],
+    }
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"{size} users", file=sys.stderr)
+        report["results"].append(run_size(size, args))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Throughput of register_users_bulk() versus worker count.
+
+Run from Final_Project:  python benchmarks/bench_bulk_register.py --users 2000
+Each run uses a fresh temporary database, so the app's db/ folder is untouched.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import auth, database, hashing
+
+
+def run(users, workers, chunk_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_database(os.path.join(tmp, "bench.db"))
+        database.initialize_db()
+
+        rows = ((f"user{i}", f"password{i}") for i in range(users))
+        start = time.perf_counter()
+        created, conflicts = auth.register_users_bulk(rows, chunk_size=chunk_size, workers=workers)
+        elapsed = time.perf_counter() - start
+        database.close_db_connections()
+
+    assert created == users and not conflicts, (created, conflicts[:5])
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--hash-params", default=hashing.DEFAULT_PARAMS,
+                        help="e.g. pbkdf2_sha256$100000 or scrypt$16384$8$1")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+    # Workers receive the parameters with each job, so this reaches them too
+    hashing.set_hash_params(args.hash_params)
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, 8, 16, 32, cores} & set(range(1, cores + 1)))
+
+    print(f"{args.users} users, hash {args.hash_params}, chunk {args.chunk_size}")
+    print(f"{'workers':>8} {'seconds':>9} {'users/sec':>10} {'speedup':>8}")
+    baseline = None
+    for workers in counts:
+        elapsed = run(args.users, workers, args.chunk_size)
+        rate = args.users / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8} {elapsed:>9.2f} {rate:>10.1f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
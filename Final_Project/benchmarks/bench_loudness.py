@@ -0,0 +1,70 @@
+"""Throughput of the loudness analysis job versus worker count.
+
+Run from Final_Project:  python benchmarks/bench_loudness.py --tracks 16 --seconds 180
+Synthetic WAV tracks (noise at random levels) are written to a temporary
+folder and catalogued in a temporary database, so db/ and audio/ are
+untouched. Every run starts from an empty loudness table; a final run with
+everything already measured shows the cost of the job when nothing changed.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from modules import database, loudness
+from modules.media_library import scan_library
+
+
+def write_tracks(folder, count, seconds, rng):
+    for i in range(count):
+        level = 10 ** (rng.uniform(-30, -3) / 20)
+        samples = rng.normal(0, level / 3, (seconds * loudness.SAMPLE_RATE, 2)).clip(-1, 1)
+        with wave.open(os.path.join(folder, f"track{i:03}.wav"), "wb") as f:
+            f.setnchannels(2)
+            f.setsampwidth(2)
+            f.setframerate(loudness.SAMPLE_RATE)
+            f.writeframes((samples * 32767).astype("<i2").tobytes())
+
+
+def run(workers):
+    with database.db_connection() as conn:
+        conn.execute("DELETE FROM loudness")
+    start = time.perf_counter()
+    stats = loudness.analyze_library(workers=workers)
+    return time.perf_counter() - start, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=16)
+    parser.add_argument("--seconds", type=int, default=180, help="length of each track")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        music = os.path.join(tmp, "audio")
+        os.makedirs(music)
+        write_tracks(music, args.tracks, args.seconds, np.random.default_rng(args.seed))
+        database.configure_database(os.path.join(tmp, "bench.db"))
+        database.initialize_db()
+        scan_library([music])
+
+        audio_seconds = args.tracks * args.seconds
+        print(f"{args.tracks} tracks x {args.seconds}s")
+        for workers in sorted({1, loudness.ANALYSIS_WORKERS}):
+            elapsed, stats = run(workers)
+            print(f"  {workers} worker(s)  {elapsed:6.2f}s  {audio_seconds / elapsed:6.0f}x real time  {stats}")
+        start = time.perf_counter()
+        stats = loudness.analyze_library()
+        print(f"  nothing new    {time.perf_counter() - start:6.3f}s  {stats}")
+        database.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Headless play-queue run: are track changes gapless?
+
+Run from Final_Project:  python benchmarks/bench_playqueue.py --tracks 8 --seconds 2
+Short WAV tracks are generated and played back to back through PlayQueue
+with SDL's dummy audio driver (no sound card needed). For every transition
+it reports whether the mixer moved on by itself (gapless) or the queue had
+to start the track (cold start / streamed), and how far the whole run
+drifted from the summed track lengths.
+"""
+import argparse
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+import wave
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from modules import audio_cache
+from modules.playqueue import PlayQueue
+
+RATE = 44100
+
+
+def write_tone(path, seconds, frequency):
+    frames = int(RATE * seconds)
+    with wave.open(path, "wb") as out:
+        out.setnchannels(2)
+        out.setsampwidth(2)
+        out.setframerate(RATE)
+        samples = (int(8000 * math.sin(2 * math.pi * frequency * i / RATE)) for i in range(frames))
+        out.writeframes(b"".join(struct.pack("<hh", s, s) for s in samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=2.0, help="length of each track")
+    parser.add_argument("--tick-ms", type=int, default=100, help="how often tick() is called")
+    parser.add_argument("--shuffle", action="store_true")
+    args = parser.parse_args()
+
+    pygame.mixer.init(frequency=RATE)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.tracks):
+            path = os.path.join(tmp, f"track{i:03}.wav")
+            write_tone(path, args.seconds, 220 + 55 * i)
+            paths.append(path)
+
+        changes = []
+        queue = PlayQueue(on_change=lambda path: changes.append((time.perf_counter(), path)))
+        queue.set_tracks(paths)
+        queue.set_shuffle(args.shuffle)
+
+        start = time.perf_counter()
+        queue.play()
+        tick_costs = []
+        while queue.current is not None:
+            time.sleep(args.tick_ms / 1000)
+            t = time.perf_counter()
+            queue.tick()
+            tick_costs.append(time.perf_counter() - t)
+        elapsed = time.perf_counter() - start
+
+    audio_cache.shutdown()
+    pygame.mixer.quit()
+
+    tick_costs.sort()
+    expected = args.tracks * args.seconds
+    print(f"{args.tracks} tracks x {args.seconds:.1f}s, tick every {args.tick_ms} ms")
+    print(f"  transitions  gapless={queue.stats['gapless']} cold_starts={queue.stats['cold_starts']} "
+          f"streamed={queue.stats['streamed']}")
+    print(f"  wall time    {elapsed:.3f}s for {expected:.3f}s of audio "
+          f"(drift {elapsed - expected:+.3f}s, includes up to one tick)")
+    print(f"  tick()       p50 {tick_costs[len(tick_costs) // 2] * 1e6:.0f} us   "
+          f"max {tick_costs[-1] * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
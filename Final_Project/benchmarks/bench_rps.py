@@ -0,0 +1,40 @@
+"""Win rates and speed of the adaptive rock-paper-scissors opponent, simulated.
+
+Run from Final_Project:  python benchmarks/bench_rps.py --games 100000 --rounds 100
+Every scripted player in rps.PLAYERS plays --games independent games of
+--rounds rounds against the learning opponent (a fresh model per game) and
+against a random one for reference. Rates are from the player's side; a
+win rate below a third means the opponent has learned to exploit that player.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import rps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--max-order", type=int, default=rps.MAX_ORDER)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    print(f"{args.games} games x {args.rounds} rounds per player, max order {args.max_order}")
+    print(f"  {'player':<22}{'win':>7}{'draw':>7}{'loss':>7}{'vs random':>11}{'rounds/s':>12}")
+    for player in rps.PLAYERS:
+        start = time.perf_counter()
+        markov = rps.simulate(player, args.games, args.rounds, max_order=args.max_order, seed=args.seed)
+        elapsed = time.perf_counter() - start
+        baseline = rps.simulate(player, args.games, args.rounds, opponent="random", seed=args.seed)
+        total = args.games * args.rounds
+        print(f"  {player:<22}{markov['wins'] / total:7.3f}{markov['draws'] / total:7.3f}"
+              f"{markov['losses'] / total:7.3f}{baseline['wins'] / total:11.3f}{total / elapsed / 1e6:10.1f} M")
+
+
+if __name__ == "__main__":
+    main()
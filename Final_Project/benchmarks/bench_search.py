@@ -0,0 +1,63 @@
+"""Search-as-you-type latency of SearchIndex on a large synthetic library.
+
+Run from Final_Project:  python benchmarks/bench_search.py --entries 100000
+Each query is typed one character at a time, the way the search box sees
+it, and every keystroke is timed. The target is one frame (16.7 ms).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.search_index import SearchIndex
+
+SYLLABLES = ["ka", "lo", "ma", "ri", "tu", "ne", "so", "ba", "gi", "pe", "da", "yo", "ñu", "é"]
+FRAME_MS = 1000 / 60
+
+
+def make_titles(count, rng):
+    def word():
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))).title()
+
+    return [" ".join(word() for _ in range(rng.randint(1, 5))) + " " + word() for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200, help="queries typed per run")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    texts = make_titles(args.entries, rng)
+    start = time.perf_counter()
+    index = SearchIndex(texts)
+    print(f"{args.entries} entries indexed in {time.perf_counter() - start:.2f}s")
+
+    latencies = []
+    for _ in range(args.queries):
+        # Part of a real title, so most keystrokes still have matches
+        words = rng.choice(texts).split()
+        query = " ".join(words[:rng.randint(1, 2)])
+        index.search("")
+        for n in range(1, len(query) + 1):
+            start = time.perf_counter()
+            index.search(query[:n])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    count = len(latencies)
+    print(f"{count} keystrokes")
+    for q in (0.50, 0.95, 0.99):
+        print(f"  p{int(q * 100):<3} {latencies[min(count - 1, int(q * count))]:7.2f} ms")
+    print(f"  max  {latencies[-1]:7.2f} ms")
+    over = sum(1 for ms in latencies if ms > FRAME_MS)
+    print(f"  over one frame: {over} ({over / count:.1%})")
+
+
+if __name__ == "__main__":
+    main()
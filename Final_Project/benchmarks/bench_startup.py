@@ -0,0 +1,47 @@
+"""Startup time of main.py with lazy versus eager pygame/VLC loading.
+
+Run from Final_Project (needs a display, like the app itself):
+    python benchmarks/bench_startup.py --runs 5
+Each run starts the app with MEDIAAPP_STARTUP_REPORT=exit, so it prints
+its import, first-paint and time-to-interactive figures and closes itself.
+The eager mode (MEDIAAPP_EAGER_ENGINES=1) loads the engines before the
+first page the way older versions did.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+FIELDS = ("imports_ms", "first_paint_ms", "interactive_ms", "audio_ready_ms", "video_ready_ms")
+
+
+def run_once(eager, timeout):
+    env = dict(os.environ, MEDIAAPP_STARTUP_REPORT="exit", MEDIAAPP_EAGER_ENGINES="1" if eager else "0")
+    result = subprocess.run([sys.executable, APP], env=env, capture_output=True, text=True,
+                            timeout=timeout, cwd=os.path.dirname(APP))
+    for line in result.stdout.splitlines():
+        if line.startswith("startup "):
+            return json.loads(line[len("startup "):])
+    raise RuntimeError(f"no startup report (exit code {result.returncode}):\n{result.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="app launches per mode")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    for eager in (True, False):
+        reports = [run_once(eager, args.timeout) for _ in range(args.runs)]
+        print(f"{'eager' if eager else 'lazy'} ({args.runs} runs, median)")
+        for field in FIELDS:
+            values = [r[field] for r in reports if field in r]
+            if values:
+                print(f"  {field:<16} {statistics.median(values):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Full game-tree solve time of the tic-tac-toe engine.
+
+Run from Final_Project:  python benchmarks/bench_tictactoe.py --runs 20
+Solves the empty board with plain minimax, alpha-beta, and alpha-beta with
+the symmetry-aware transposition table (a fresh table every run), then
+times the computer's move in every position reachable in a real game,
+first with a cold table and then with the warm one the app keeps.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.tictactoe import FULL, WINNING, Solver
+
+CONFIGS = (
+    ("minimax", dict(prune=False, table=False)),
+    ("alpha-beta", dict(prune=True, table=False)),
+    ("alpha-beta + table", dict(prune=True, table=True)),
+)
+
+
+def reachable(me=0, opp=0, seen=None):
+    """Every non-final position reachable from (me, opp), side to move first."""
+    seen = set() if seen is None else seen
+    if (me, opp) in seen or WINNING[opp] or me | opp == FULL:
+        return seen
+    seen.add((me, opp))
+    for cell in range(9):
+        if not (me | opp) >> cell & 1:
+            reachable(opp, me | 1 << cell, seen)
+    return seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"full solve of the empty board ({args.runs} runs, median)")
+    for name, config in CONFIGS:
+        runs = 1 if not config["prune"] else args.runs  # minimax takes a while
+        times = []
+        for _ in range(runs):
+            solver = Solver(**config)
+            start = time.perf_counter()
+            value = solver.value(0, 0)
+            times.append(time.perf_counter() - start)
+        table = f"  table {len(solver.table)}" if solver.table is not None else ""
+        print(f"  {name:<20} {statistics.median(times) * 1000:9.2f} ms  {solver.nodes:>7} nodes"
+              f"  value {value}{table}")
+
+    positions = sorted(reachable())
+    solver = Solver()
+    for label in ("cold table", "warm table"):
+        times = []
+        for me, opp in positions:
+            start = time.perf_counter()
+            solver.best_move(me, opp)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        print(f"best_move over {len(positions)} positions, {label}: "
+              f"p50 {times[len(times) // 2] * 1e6:.0f} us  max {times[-1] * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
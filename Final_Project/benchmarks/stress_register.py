@@ -0,0 +1,90 @@
+"""Concurrent register_user() stress test.
+
+Run from Final_Project:  python benchmarks/stress_register.py --threads 32
+Every username is attempted by several threads at once. The run fails unless
+exactly one attempt per name succeeds and no 'database is locked' error occurs.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import database, hashing
+from modules.auth import register_user
+
+
+def worker(barrier, names, results):
+    counts = Counter()
+    barrier.wait()
+    for name in names:
+        try:
+            success, _ = register_user(name, "password")
+            counts["created" if success else "duplicate"] += 1
+        except sqlite3.OperationalError as e:
+            counts["locked" if "locked" in str(e) else "error"] += 1
+    results.append(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--users", type=int, default=2000, help="distinct usernames")
+    parser.add_argument("--contention", type=int, default=4, help="threads trying each name")
+    parser.add_argument("--hash-params", default="pbkdf2_sha256$1000",
+                        help="kept cheap so the database, not PBKDF2, is the bottleneck")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="run against a shared in-memory database instead of a temp file")
+    args = parser.parse_args()
+    hashing.set_hash_params(args.hash_params)
+
+    # Each thread walks the name list from a different offset, so every name
+    # is hit by `contention` threads at roughly the same time
+    names = [f"user{i}" for i in range(args.users)]
+    plans = [[] for _ in range(args.threads)]
+    for i, name in enumerate(names):
+        for k in range(args.contention):
+            plans[(i + k) % args.threads].append(name)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_database("memory://stress" if args.in_memory
+                                    else os.path.join(tmp, "stress.db"))
+        database.initialize_db()
+
+        barrier = threading.Barrier(args.threads + 1)
+        results = []
+        threads = [threading.Thread(target=worker, args=(barrier, plan, results)) for plan in plans]
+        for t in threads:
+            t.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        with database.db_connection() as conn:
+            rows, distinct = conn.execute("SELECT COUNT(*), COUNT(DISTINCT username) FROM users").fetchone()
+        database.close_db_connections()
+
+    totals = sum(results, Counter())
+    attempts = sum(totals.values())
+    print(f"{args.threads} threads, {attempts} attempts on {args.users} names in {elapsed:.2f}s")
+    print(f"  attempts/sec      {attempts / elapsed:10.1f}")
+    print(f"  registrations/sec {totals['created'] / elapsed:10.1f}")
+    print(f"  created={totals['created']} duplicate={totals['duplicate']} "
+          f"locked={totals['locked']} other_errors={totals['error']}")
+    print(f"  rows={rows} distinct={distinct}")
+
+    ok = (totals["created"] == rows == distinct == args.users
+          and totals["locked"] == 0 and totals["error"] == 0)
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
+import time
+STARTUP_T0 = time.perf_counter()  # for the startup report; taken before the other imports
+
 import tkinter as tk
 from tkinter import messagebox
+import importlib
+import json
 import random
 import os
-import pygame
-import vlc
+import sqlite3
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 
 # ================= BASE DIR FIX =================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -11,19 +18,89 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # Dummy backend auth and DB (replace with actual imports if available)
 try:
     from modules.auth import login_user, register_user  # packaged layout
-    from modules.database import initialize_db
+    from modules.auth import create_session, validate_session, revoke_session
+    from modules.database import initialize_db, close_db_connections
 except Exception:
     try:
         from modules.auth import login_user, register_user  # local files
-        from modules.database import initialize_db
+        from modules.auth import create_session, validate_session, revoke_session
+        from modules.database import initialize_db, close_db_connections
     except Exception:
         print("Backend modules not found. Running in UI-only mode.")
         def login_user(u, p):
             return True, "Bypass"
         def register_user(u, p):
             return True, "Bypass"
+        def create_session(u):
+            return None
+        def validate_session(t):
+            return None
+        def revoke_session(t):
+            pass
         def initialize_db():
             pass
+        def close_db_connections():
+            pass
+
+def optional_module(name):
+    """modules.<name>, or None when it can't be imported; its feature is then left out."""
+    try:
+        return importlib.import_module(f"modules.{name}")
+    except Exception as e:
+        print(f"Optional module '{name}' unavailable: {e}")
+        return None
+
+# Each is imported on its own, so one missing dependency (NumPy, say) only
+# switches off the feature that needs it, never authentication
+audio_cache = optional_module("audio_cache")
+audit = optional_module("audit")
+loudness = optional_module("loudness")
+metrics = optional_module("metrics")
+resume_positions = optional_module("resume_positions")
+spectrum = optional_module("spectrum")
+thumbnails = optional_module("thumbnails")
+tracing = optional_module("tracing")
+board = optional_module("board")
+rps = optional_module("rps")
+tictactoe = optional_module("tictactoe")
+media_library = optional_module("media_library")
+playqueue = optional_module("playqueue")
+search_index = optional_module("search_index")
+
+if media_library:
+    scan_library, list_media = media_library.scan_library, media_library.list_media
+else:
+    def scan_library():
+        return {}
+    def list_media(kind):
+        return []
+PlayQueue, REPEAT_MODES = (playqueue.PlayQueue, playqueue.REPEAT_MODES) if playqueue else (None, ())
+SearchIndex = search_index.SearchIndex if search_index else None
+
+IMPORTS_DONE = time.perf_counter()
+
+# pygame and VLC are slow to import and initialise, so they are loaded on
+# first use, or in the background once the first page has painted. Until a
+# loader has run, its module name below is None.
+pygame = None
+vlc = None
+
+def load_audio_engine():
+    global pygame
+    import pygame as module
+    module.mixer.init()
+    pygame = module
+
+def load_video_engine():
+    global vlc
+    import vlc as module
+    instance = module.Instance("--vout=d3d9", "--no-video-title-show")
+    vlc = module
+    # One player for the whole session; videos only swap media
+    return instance, instance.media_player_new()
+
+ENGINE_LOADERS = {"audio": load_audio_engine, "video": load_video_engine}
+ENGINE_NAMES = {"audio": "Audio playback", "video": "Video playback"}
 
 # Colors and fonts
 COLOR_DARK_BG = "#5D6D7E"
@@ -36,22 +113,246 @@ FONT_BODY = ("Arial", 12)
 FONT_BUTTON = ("Arial", 12, "bold")
 FONT_SMALL = ("Arial", 10)
 
-# Video files - add your actual video paths here
-VIDEO_FILES = {
-    "Batman": os.path.join(BASE_DIR, "video", "bat-man.mp4"),
-    "Spider-Man": os.path.join(BASE_DIR, "video", "spider-man.mp4"),
-    "Superman": os.path.join(BASE_DIR, "video", "super-man.mp4"),
-    "Iron Man": os.path.join(BASE_DIR, "video", "iron-man.mp4"),
-    "Avatar": os.path.join(BASE_DIR, "video", "avatar.mp4")
-}
-
-AUDIO_FILES = {
-    "Nandito Ako": os.path.join(BASE_DIR, "audio", "nandito.mp3"),
-    "Buwan": os.path.join(BASE_DIR, "audio", "buwan.mp3"),
-    "Dilaw": os.path.join(BASE_DIR, "audio", "dilaw.mp3"),
-    "Upuan": os.path.join(BASE_DIR, "audio", "upuan.mp3"),
-    "Multo": os.path.join(BASE_DIR, "audio", "multo.mp3")
-}
+# How often the Tk loop checks on a pending login/registration
+AUTH_POLL_MS = 50
+
+# Remembered session token, so a restart skips the password check. It is a
+# credential, so it lives in the user's own config folder (owner-only
+# permissions), not beside the app where it could end up in version control.
+CONFIG_DIR = os.path.join(os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), ".config"),
+                          "mediaapp")
+SESSION_FILE = os.path.join(CONFIG_DIR, "session.token")
+
+# Written periodically when metrics are enabled (MEDIAAPP_METRICS=1)
+METRICS_FILE = os.path.join(BASE_DIR, "db", "metrics.json")
+
+# How often the Tk loop checks on the background library scan
+LIBRARY_POLL_MS = 200
+
+# How often the current video position is reported for resuming later
+RESUME_SAVE_MS = 5000
+
+# How often the resume seek checks whether VLC has started playing
+RESUME_SEEK_POLL_MS = 50
+
+# How long VLC may spend pre-parsing one video's metadata in the background
+MEDIA_PARSE_TIMEOUT_MS = 5000
+
+# How often the Tk loop collects finished poster thumbnails
+THUMB_POLL_MS = 150
+
+# Size of the poster placeholder, and how many decoded posters stay in memory
+THUMB_PLACEHOLDER_SIZE = (160, 90)
+MAX_THUMB_IMAGES = 200
+
+# How often the Tk loop checks on a media list being loaded and indexed
+LIST_POLL_MS = 20
+
+# How often the Tk loop checks on engines loading in the background
+ENGINE_POLL_MS = 50
+
+# MEDIAAPP_STARTUP_REPORT=1 prints import/first-paint/interactive times;
+# "exit" also closes the app once it is interactive (for benchmarks).
+# MEDIAAPP_EAGER_ENGINES=1 loads pygame and VLC before the first page, as
+# older versions did, for comparison.
+STARTUP_REPORT = os.environ.get("MEDIAAPP_STARTUP_REPORT", "")
+EAGER_ENGINES = os.environ.get("MEDIAAPP_EAGER_ENGINES") == "1"
+
+# How often the Tk loop checks on a computer move being searched
+GAME_POLL_MS = 20
+
+# Rock-paper-scissors moves and RESULT[player][computer] (1 win, 0 draw,
+# -1 loss) come from modules/rps.py; the copy is only for when it can't be
+# loaded, so the game still works against random play
+if rps:
+    RPS_MOVES, RPS_RESULT = rps.MOVES, rps.RESULT
+else:
+    RPS_MOVES = ("Rock", "Paper", "Scissors")
+    RPS_RESULT = ((0, -1, 1), (1, 0, -1), (-1, 1, 0))
+
+# Board sizes offered on the tic-tac-toe page as (label, size, in a row). The
+# computer opponent only plays the classic 3x3 game.
+BOARD_VARIANTS = (
+    ("3 x 3", 3, 3),
+    ("7 x 7, 4 in a row", 7, 4),
+    ("15 x 15, 5 in a row", 15, 5),
+    ("19 x 19, 5 in a row", 19, 5),
+)
+BOARD_PIXELS = 360
+
+# Page-transition trace overlay: F12 toggles it, F11 exports traces to TRACE_FILE
+OVERLAY_REFRESH_MS = 500
+TRACE_FILE = os.path.join(BASE_DIR, "db", "traces.json")
+
+# How often the play queue is checked for a finished track. The next track is
+# queued on the mixer well before the current one ends, so this only bounds how
+# late the "Now Playing" text updates, not the gap between tracks.
+QUEUE_TICK_MS = 100
+
+# Spectrum visualizer under the audio list. The analysis runs on its own
+# thread (see modules/spectrum.py); the Tk loop only moves bars each frame.
+SPECTRUM_FRAME_MS = 33
+SPECTRUM_SIZE = (820, 60)
+
+def login_with_session(user, pwd):
+    # Runs on the auth pool: verify the password, then issue a session token
+    success, msg = login_user(user, pwd)
+    return success, msg, create_session(user) if success else None
+
+def format_duration(seconds):
+    if not seconds:
+        return ""
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes // 60}:{minutes % 60:02d}:{seconds:02d}" if minutes >= 60 else f"{minutes}:{seconds:02d}"
+
+def index_media(kind):
+    # Runs on the list pool: the search index takes a while for big libraries
+    items = list_media(kind)
+    index = SearchIndex(f"{item['title']} {item['artist'] or ''}" for item in items) if SearchIndex else None
+    return items, index
+
+def search_media(items, index, query):
+    """Positions of the items matching `query`; without a SearchIndex, a plain substring scan."""
+    if index:
+        return index.search(query)
+    needles = query.casefold().split()
+    return [i for i, item in enumerate(items)
+            if all(n in f"{item['title']} {item['artist'] or ''}".casefold() for n in needles)]
+
+class VirtualList(tk.Frame):
+    """A scrolling list drawn on one Canvas that only has items for the visible rows.
+
+    describe(item) returns (title, detail, image-or-None) for a row. As the
+    list scrolls, the same few canvas items are moved and relabelled, so a
+    list of 100k entries costs what a screenful does.
+    """
+
+    def __init__(self, parent, on_select, describe, row_height=44, image_size=None,
+                 on_render=None, empty_text="", **kwargs):
+        super().__init__(parent, bg=COLOR_DARK_BG)
+        self.on_select = on_select
+        self.describe = describe
+        self.row_height = row_height
+        self.image_size = image_size
+        self.on_render = on_render
+        self.empty_text = empty_text
+        self.items = []
+        self.top = 0  # pixels scrolled past
+        self.hover = None
+        self.slots = []  # (rect, image, title, detail) canvas ids, one per visible row
+
+        self.canvas = tk.Canvas(self, bg=COLOR_DARK_BG, highlightthickness=0, **kwargs)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.empty_label = self.canvas.create_text(0, 0, text="", fill="white", font=FONT_BODY, anchor="n")
+
+        self.canvas.bind("<Configure>", lambda e: self.render())
+        self.canvas.bind("<Button-1>", self.click)
+        self.canvas.bind("<Motion>", self.motion)
+        self.canvas.bind("<Enter>", self.enter)
+        self.canvas.bind("<Leave>", self.leave)
+
+    def enter(self, event):
+        # Windows sends wheel events to the focused widget (often the search
+        # box), so grab them while the pointer is over the list
+        self.canvas.bind_all("<MouseWheel>", self.wheel)
+        self.canvas.bind_all("<Button-4>", self.wheel)
+        self.canvas.bind_all("<Button-5>", self.wheel)
+
+    def leave(self, event):
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.unbind_all(sequence)
+        self.set_hover(None)
+
+    def wheel(self, event):
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.scroll_pixels(-self.row_height if up else self.row_height)
+
+    def set_items(self, items):
+        self.items = items
+        self.top = 0
+        self.hover = None
+        self.render()
+
+    def total_height(self):
+        return len(self.items) * self.row_height
+
+    def yview(self, *args):
+        height = self.canvas.winfo_height()
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * self.total_height())
+        elif args[0] == "scroll":
+            step = height if args[2] == "pages" else self.row_height
+            self.top += int(args[1]) * step
+        self.render()
+
+    def scroll_pixels(self, pixels):
+        self.top += pixels
+        self.render()
+
+    def row_at(self, y):
+        index = (self.top + y) // self.row_height
+        return index if 0 <= index < len(self.items) else None
+
+    def click(self, event):
+        index = self.row_at(event.y)
+        if index is not None:
+            self.on_select(self.items[index])
+
+    def motion(self, event):
+        self.set_hover(self.row_at(event.y))
+
+    def set_hover(self, index):
+        if index != self.hover:
+            self.hover = index
+            self.render()
+
+    def render(self):
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        self.top = max(0, min(self.top, self.total_height() - height))
+
+        needed = height // self.row_height + 2
+        while len(self.slots) < needed:
+            self.slots.append((
+                self.canvas.create_rectangle(0, 0, 0, 0, outline=COLOR_DARK_BG, width=2),
+                self.canvas.create_image(0, 0, anchor="nw"),
+                self.canvas.create_text(0, 0, anchor="w", fill="white", font=FONT_BODY),
+                self.canvas.create_text(0, 0, anchor="e", fill="white", font=FONT_SMALL),
+            ))
+
+        first, offset = divmod(self.top, self.row_height)
+        text_x = 12 + (self.image_size[0] + 12 if self.image_size else 0)
+        for k, (rect, image, title, detail) in enumerate(self.slots):
+            index = first + k
+            if index >= len(self.items) or k >= needed:
+                for item in (rect, image, title, detail):
+                    self.canvas.itemconfigure(item, state="hidden")
+                continue
+            y = k * self.row_height - offset
+            middle = y + self.row_height // 2
+            text, note, picture = self.describe(self.items[index])
+            fill = COLOR_BUTTON_HOVER if index == self.hover else COLOR_ACCENT
+            self.canvas.coords(rect, 2, y + 2, width - 2, y + self.row_height - 2)
+            self.canvas.itemconfigure(rect, fill=fill, state="normal")
+            self.canvas.coords(title, text_x, middle)
+            self.canvas.itemconfigure(title, text=text, state="normal")
+            self.canvas.coords(detail, width - 12, middle)
+            self.canvas.itemconfigure(detail, text=note or "", state="normal")
+            if self.image_size:
+                self.canvas.coords(image, 8, middle - self.image_size[1] // 2)
+                self.canvas.itemconfigure(image, image=picture or "", state="normal")
+
+        self.canvas.coords(self.empty_label, width // 2, 20)
+        self.canvas.itemconfigure(self.empty_label, text="" if self.items else self.empty_text)
+        total = self.total_height()
+        if total > height:
+            self.scrollbar.set(self.top / total, (self.top + height) / total)
+        else:
+            self.scrollbar.set(0, 1)
+        if self.on_render:
+            self.on_render(self.items[first:first + needed])
 
 class MediaApp(tk.Tk):
     def __init__(self):
@@ -61,32 +362,276 @@ class MediaApp(tk.Tk):
         self.resizable(False, False)
 
         initialize_db()
-        pygame.mixer.init()  # Initialize once
-
-        # VLC instance for video playback
-        self.vlc_instance = vlc.Instance("--vout=d3d9", "--no-video-title-show")
+        if metrics and metrics.is_enabled():
+            metrics.start_periodic_dump(METRICS_FILE)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # pygame/VLC loaders run here; see require_engine()
+        self.engine_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="engines")
+        self.engines = {}  # name -> Future
+        self.engine_times = {}  # name -> seconds from startup until it was ready
+        self.vlc_instance = None
         self.vlc_player = None
+        if EAGER_ENGINES:
+            for name in ENGINE_LOADERS:
+                self.require_engine(name)
+        self.parsed_media = {}  # path -> vlc.Media, parsed in the background
+        self.video_request = None
+        self.resume_tick = None
+        self.resume_seek = None  # after() id of a pending seek to the resume position
+
+        # Password hashing runs here so the Tk loop keeps repainting
+        self.auth_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="auth")
+        self.auth_pending = None
+
+        # Media library scans run here; pages render from the catalog meanwhile
+        self.library_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="library")
+        self.library_version = 0
+
+        # Catalog lists are loaded and search-indexed here
+        self.list_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lists")
+
+        # Game AI searches run here so the board stays responsive
+        self.game_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="games")
 
         self.current_user = None
-        self.container = tk.Frame(self)
+        self.session_token = None
+        self.currently_playing = None
+        self.play_queue = PlayQueue(on_change=self.on_track_change, volume_for=self.track_volume) if PlayQueue else None
+        self.audio_gains = {}  # path -> stored loudness gain (dB), from the catalog
+        self.audio_reference_db = 0.0  # extra attenuation that lets every track match
+        self.queue_tick = None
+        self.container = tk.Frame(self, bg=COLOR_DARK_BG)
         self.container.pack(fill="both", expand=True)
 
-        self.show_landing_page()
-
-    def clear_screen(self):
-        pygame.mixer.music.stop()
+        # Each page is built once, on first visit, and then only shown/hidden.
+        # Optional on_show_<name>/on_hide_<name> methods refresh dynamic state.
+        self.page_builders = {
+            "landing": self.build_landing_page,
+            "menu": self.build_menu_page,
+            "movies": self.build_movies_page,
+            "player": self.build_movie_player,
+            "audio": self.build_audio_page,
+            "games": self.build_games_page,
+            "rps": self.build_rps_game,
+            "guess": self.build_number_guess_game,
+            "tictactoe": self.build_tictactoe_game,
+        }
+        self.pages = {}
+        self.current_page = None
+
+        # Debug overlay with live page-transition latencies
+        if tracing:
+            self.trace_overlay = tk.Label(self, text="", justify="left", anchor="nw",
+                                          bg="black", fg="#7CFC00", font=("Courier", 9))
+            self.trace_overlay_shown = False
+            self.trace_overlay_job = None  # after() id of the next refresh
+            self.bind_all("<F12>", self.toggle_trace_overlay)
+            self.bind_all("<F11>", self.export_traces)
+
+        if not self.resume_session():
+            self.show_landing_page()
+        self.after_idle(self.start_library_scan)
+        # Idle callbacks run in order, so this one comes after the first redraw
+        self.after_idle(self.on_first_paint)
+
+    def on_close(self):
+        self.hide_current_page()
+        if loudness:
+            loudness.cancel()
+        self.auth_executor.shutdown(wait=False, cancel_futures=True)
+        self.library_executor.shutdown(wait=False, cancel_futures=True)
+        self.list_executor.shutdown(wait=False, cancel_futures=True)
+        self.engine_executor.shutdown(wait=False, cancel_futures=True)
+        self.game_executor.shutdown(wait=True)  # lets a queued RPS model save finish
         if self.vlc_player:
-            self.vlc_player.stop()
-            self.vlc_player = None
-        for widget in self.container.winfo_children():
-            widget.destroy()
+            self.vlc_player.release()
+        if resume_positions:
+            resume_positions.shutdown()  # write the last reported positions
+        if audio_cache:
+            audio_cache.shutdown()
+        if thumbnails:
+            thumbnails.shutdown()
+        if getattr(self, "spectrum", None):
+            self.spectrum.shutdown()
+        if audit:
+            audit.shutdown()  # write any queued login events
+        if metrics:
+            metrics.stop_periodic_dump()
+        close_db_connections()
+        self.destroy()
+
+    # --- Startup ---
+    def on_first_paint(self):
+        self.first_paint = time.perf_counter()
+        for name in ENGINE_LOADERS:
+            self.start_engine(name)
+        self.after(ENGINE_POLL_MS, self.poll_engines)
+
+    def start_engine(self, name):
+        if name not in self.engines:
+            self.engines[name] = self.engine_executor.submit(self.load_engine, name)
+
+    def load_engine(self, name):
+        result = ENGINE_LOADERS[name]()
+        self.engine_times[name] = time.perf_counter() - STARTUP_T0
+        return result
+
+    def require_engine(self, name):
+        """Waits for an engine to load, starting it if needed; False if it failed.
+
+        Only blocks when the user gets to media before the background load is done.
+        """
+        self.start_engine(name)
+        try:
+            with self.trace_span(f"engine:{name}"):
+                result = self.engines[name].result()
+        except Exception as e:
+            del self.engines[name]  # let a later attempt retry
+            messagebox.showerror("Error", f"{ENGINE_NAMES[name]} is not available: {e}")
+            return False
+        if name == "video" and self.vlc_player is None:
+            self.vlc_instance, self.vlc_player = result
+        return True
+
+    def engine_ready(self, name):
+        """Like require_engine(), but never waits: False while it is still loading."""
+        future = self.engines.get(name)
+        if future is None or not future.done() or future.exception() is not None:
+            return False
+        return self.require_engine(name)
+
+    def poll_engines(self):
+        if not all(future.done() for future in self.engines.values()):
+            self.after(ENGINE_POLL_MS, self.poll_engines)
+            return
+        for name, future in self.engines.items():
+            if future.exception() is not None:
+                print(f"{ENGINE_NAMES[name]} failed to load: {future.exception()}")
+        interactive = time.perf_counter()
+        # Media lists skip pre-decoding/pre-parsing until the engines are up
+        if self.current_page == "audio":
+            self.audio_view.render()
+        elif self.current_page == "movies":
+            self.movies_view.render()
+        self.report_startup(interactive)
+
+    def report_startup(self, interactive):
+        # Interactive: the first page is up and media opens without waiting
+        times = {
+            "imports_ms": (IMPORTS_DONE - STARTUP_T0) * 1000,
+            "first_paint_ms": (self.first_paint - STARTUP_T0) * 1000,
+            "interactive_ms": (interactive - STARTUP_T0) * 1000,
+            "eager_engines": EAGER_ENGINES,
+        }
+        for name, seconds in self.engine_times.items():
+            times[f"{name}_ready_ms"] = seconds * 1000
+        if metrics:
+            metrics.observe("startup.imports", IMPORTS_DONE - STARTUP_T0)
+            metrics.observe("startup.first_paint", self.first_paint - STARTUP_T0)
+            metrics.observe("startup.interactive", interactive - STARTUP_T0)
+        if STARTUP_REPORT:
+            print("startup " + json.dumps(times), flush=True)
+            if STARTUP_REPORT == "exit":
+                self.on_close()
+
+    # --- Page registry ---
+    def show_page(self, name):
+        """Swaps the visible page, building it the first time it is needed."""
+        if self.current_page == name:
+            self.abandon_navigation()
+            return
+        self.begin_navigation(name)
+        if self.current_page:
+            with self.trace_span(f"teardown:{self.current_page}"):
+                self.hide_current_page()
+
+        frame = self.pages.get(name)
+        if frame is None:
+            with self.trace_span(f"build:{name}"):
+                frame = tk.Frame(self.container, bg=COLOR_DARK_BG)
+                self.page_builders[name](frame)
+                self.pages[name] = frame
+        frame.place(relx=0, rely=0, relwidth=1, relheight=1)
+        self.current_page = name
+
+        on_show = getattr(self, f"on_show_{name}", None)
+        if on_show:
+            with self.trace_span(f"on_show:{name}"):
+                on_show()
+        self.after_idle(self.finish_navigation)
+
+    def hide_current_page(self):
+        name, self.current_page = self.current_page, None
+        if name is None:
+            return
+        on_hide = getattr(self, f"on_hide_{name}", None)
+        if on_hide:
+            on_hide()
+        self.pages[name].place_forget()
+
+    # --- Navigation tracing ---
+    def begin_navigation(self, name):
+        # show_* methods that check files or load engines first begin earlier,
+        # so their trace covers that work too
+        if tracing:
+            tracing.begin(name)
+
+    def abandon_navigation(self):
+        if tracing:
+            tracing.abandon()
+
+    def trace_span(self, name):
+        return tracing.span(name) if tracing else nullcontext()
+
+    def finish_navigation(self):
+        # First idle after the switch; flush the pending geometry and redraw
+        # work so the trace ends once the new page is actually on screen
+        with self.trace_span("render"):
+            self.update_idletasks()
+        if tracing:
+            tracing.finish()
+
+    def toggle_trace_overlay(self, event=None):
+        # Tracked in a flag: winfo_ismapped() stays 0 until Tk has drawn the label
+        if self.trace_overlay_job is not None:
+            self.after_cancel(self.trace_overlay_job)
+            self.trace_overlay_job = None
+        self.trace_overlay_shown = not self.trace_overlay_shown
+        if self.trace_overlay_shown:
+            self.trace_overlay.place(relx=1.0, x=-8, y=8, anchor="ne")
+            self.trace_overlay.lift()
+            self.trace_overlay_job = self.after_idle(self.refresh_trace_overlay)
+        else:
+            self.trace_overlay.place_forget()
+
+    def refresh_trace_overlay(self):
+        self.trace_overlay_job = None
+        if not self.trace_overlay_shown:
+            return
+        lines = [f"{'page':<10}{'n':>5}{'p50':>8}{'p95':>8}  slowest step"]
+        for page, stats in tracing.summary().items():
+            steps = stats["mean_span_ms"]
+            slowest = max(steps, key=steps.get) if steps else ""
+            lines.append(f"{page:<10}{stats['count']:>5}{stats['p50_ms']:>8.1f}{stats['p95_ms']:>8.1f}  {slowest}")
+        lines.append("F11: export traces   F12: hide")
+        self.trace_overlay.config(text="\n".join(lines))
+        self.trace_overlay_job = self.after(OVERLAY_REFRESH_MS, self.refresh_trace_overlay)
+
+    def export_traces(self, event=None):
+        try:
+            tracing.export(TRACE_FILE)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not export traces: {e}")
+            return
+        messagebox.showinfo("Traces", f"Page traces written to {TRACE_FILE}")
 
     # --- PART 1: Login Page ---
     def show_landing_page(self):
-        self.clear_screen()
-        self.container.configure(bg=COLOR_DARK_BG)
+        self.show_page("landing")
 
-        frame = tk.Frame(self.container, bg=COLOR_DARK_BG)
+    def build_landing_page(self, page):
+        frame = tk.Frame(page, bg=COLOR_DARK_BG)
         frame.place(relx=0.5, rely=0.5, anchor="center")
 
         tk.Label(frame, text="Username", bg=COLOR_DARK_BG, fg="white", font=FONT_BODY).pack(pady=5)
@@ -97,13 +642,23 @@ class MediaApp(tk.Tk):
         self.entry_pass = tk.Entry(frame, show="*", font=FONT_BODY, width=30)
         self.entry_pass.pack(pady=5)
 
-        tk.Button(frame, text="Log In", bg=COLOR_ACCENT, fg="white",
-                  font=FONT_BUTTON, width=20, relief="raised", bd=2,
-                  command=self.perform_login).pack(pady=20)
+        self.login_button = tk.Button(frame, text="Log In", bg=COLOR_ACCENT, fg="white",
+                                      font=FONT_BUTTON, width=20, relief="raised", bd=2,
+                                      command=self.perform_login)
+        self.login_button.pack(pady=20)
+
+        self.register_button = tk.Button(frame, text="Register New User", bg=COLOR_DARK_BG, fg="white",
+                                         borderwidth=1, font=FONT_SMALL, activebackground=COLOR_BUTTON_HOVER,
+                                         command=self.perform_register)
+        self.register_button.pack(pady=5)
 
-        tk.Button(frame, text="Register New User", bg=COLOR_DARK_BG, fg="white",
-                  borderwidth=1, font=FONT_SMALL, activebackground=COLOR_BUTTON_HOVER,
-                  command=self.perform_register).pack(pady=5)
+        self.auth_status = tk.Label(frame, text="", bg=COLOR_DARK_BG, fg="white", font=FONT_SMALL)
+        self.auth_status.pack(pady=5)
+
+    def on_show_landing(self):
+        # Never leave the previous user's password sitting in the form
+        self.entry_pass.delete(0, tk.END)
+        self.entry_user.focus_set()
 
     def perform_login(self):
         user = self.entry_user.get()
@@ -111,42 +666,113 @@ class MediaApp(tk.Tk):
         if not user or not pwd:
             messagebox.showwarning("Input", "Please enter username and password.")
             return
-        success, msg = login_user(user, pwd)
-        if success:
-            self.current_user = user
-            self.show_menu_page()
-        else:
-            messagebox.showerror("Login Failed", msg)
+
+        def done(success, msg, token=None):
+            if success:
+                self.current_user = user
+                self.save_session(token)
+                self.show_menu_page()
+            else:
+                messagebox.showerror("Login Failed", msg)
+
+        self.run_auth_task(login_with_session, user, pwd, done, "Verifying")
 
     def perform_register(self):
         user = self.entry_user.get()
         pwd = self.entry_pass.get()
         if user and pwd:
-            success, msg = register_user(user, pwd)
-            messagebox.showinfo("Registration", msg)
+            self.run_auth_task(register_user, user, pwd,
+                               lambda success, msg: messagebox.showinfo("Registration", msg),
+                               "Registering")
         else:
             messagebox.showwarning("Input", "Please enter username and password.")
 
+    # --- Background auth ---
+    def run_auth_task(self, func, user, pwd, on_done, busy_text):
+        """Runs login/register on the auth pool and hands the result back on the Tk thread."""
+        if self.auth_pending is not None:
+            return  # ignore double submits while a request is in flight
+        self.auth_pending = self.auth_executor.submit(func, user, pwd)
+        self.set_auth_busy(True, busy_text)
+        self.after(AUTH_POLL_MS, self.poll_auth_task, self.auth_pending, on_done, busy_text, 1)
+
+    def poll_auth_task(self, future, on_done, busy_text, tick):
+        if not future.done():
+            self.set_auth_busy(True, busy_text + "." * (tick % 4))
+            self.after(AUTH_POLL_MS, self.poll_auth_task, future, on_done, busy_text, tick + 1)
+            return
+
+        self.auth_pending = None
+        self.set_auth_busy(False)
+        try:
+            result = future.result()
+        except Exception as e:
+            result = (False, f"Authentication error: {e}")
+        on_done(*result)
+
+    def set_auth_busy(self, busy, text=""):
+        self.config(cursor="watch" if busy else "")
+        state = "disabled" if busy else "normal"
+        self.login_button.config(state=state)
+        self.register_button.config(state=state)
+        self.entry_user.config(state=state)
+        self.entry_pass.config(state=state)
+        self.auth_status.config(text=text if busy else "")
+
     def perform_logout(self):
+        if self.session_token:
+            revoke_session(self.session_token)
+        self.save_session(None)
         self.current_user = None
         self.show_landing_page()
 
+    # --- Sessions ---
+    def resume_session(self):
+        """Logs straight in with the remembered token if it is still valid."""
+        try:
+            with open(SESSION_FILE, encoding="utf-8") as f:
+                token = f.read().strip()
+        except OSError:
+            return False
+        user = validate_session(token)
+        if not user:
+            self.save_session(None)
+            return False
+        self.current_user = user
+        self.session_token = token
+        self.show_menu_page()
+        return True
+
+    def save_session(self, token):
+        self.session_token = token
+        try:
+            if token:
+                os.makedirs(CONFIG_DIR, mode=0o700, exist_ok=True)
+                fd = os.open(SESSION_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                os.chmod(SESSION_FILE, 0o600)  # in case an older, looser file was there
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(token)
+            elif os.path.exists(SESSION_FILE):
+                os.remove(SESSION_FILE)
+        except OSError:
+            pass  # remembering the session is best-effort
+
     # --- PART 2: Main Menu ---
     def show_menu_page(self):
-        self.clear_screen()
-        self.container.configure(bg=COLOR_DARK_BG)
+        self.show_page("menu")
 
-        header = tk.Frame(self.container, bg=COLOR_DARK_BG)
+    def build_menu_page(self, page):
+        header = tk.Frame(page, bg=COLOR_DARK_BG)
         header.pack(fill="x", padx=20, pady=10)
 
         tk.Button(header, text="Logout", bg="#ffffff", fg="black",
                   font=FONT_BUTTON, relief="raised", bd=2,
                   command=self.perform_logout).pack(side="left")
 
-        greeting = f"Hello, {self.current_user}" if self.current_user else "Hello Guest"
-        tk.Label(header, text=greeting, bg=COLOR_DARK_BG, fg="white", font=("Arial", 14, "bold")).pack(side="right")
+        self.greeting_label = tk.Label(header, text="", bg=COLOR_DARK_BG, fg="white", font=("Arial", 14, "bold"))
+        self.greeting_label.pack(side="right")
 
-        frame = tk.Frame(self.container, bg=COLOR_DARK_BG)
+        frame = tk.Frame(page, bg=COLOR_DARK_BG)
         frame.place(relx=0.5, rely=0.5, anchor="center")
 
         menu_items = [
@@ -162,12 +788,16 @@ class MediaApp(tk.Tk):
                             command=action)
             btn.pack(pady=15)
 
+    def on_show_menu(self):
+        greeting = f"Hello, {self.current_user}" if self.current_user else "Hello Guest"
+        self.greeting_label.config(text=greeting)
+
     # --- PART 3: Movies Page ---
     def show_movies_page(self):
-        self.clear_screen()
-        self.container.configure(bg=COLOR_DARK_BG)
+        self.show_page("movies")
 
-        top = tk.Frame(self.container, bg=COLOR_DARK_BG)
+    def build_movies_page(self, page):
+        top = tk.Frame(page, bg=COLOR_DARK_BG)
         top.pack(fill="x", padx=20, pady=10)
 
         tk.Button(top, text="Go Back", bg=COLOR_ACCENT, fg="white",
@@ -177,81 +807,257 @@ class MediaApp(tk.Tk):
         tk.Label(top, text="Movies & TV Shows", bg=COLOR_DARK_BG, fg="white",
                  font=FONT_HEADER).pack(side="left", padx=20)
 
-        main = tk.Frame(self.container, bg=COLOR_DARK_BG)
-        main.place(relx=0.5, rely=0.55, anchor="center")
-
-        for title in VIDEO_FILES.keys():
-            available = os.path.exists(VIDEO_FILES[title])
-            btn_bg = COLOR_ACCENT if available else COLOR_GRAY_BOX
-            btn_fg = "white" if available else "black"
-            btn_command = (lambda t=title: self.show_movie_player(t)) if available else None
-
-            btn = tk.Button(main, text=f"{title} {'' if available else '(Unavailable)'}",
-                            width=40, height=2, bg=btn_bg, fg=btn_fg,
-                            font=FONT_BODY, relief="raised", bd=2,
-                            activebackground=COLOR_BUTTON_HOVER,
-                            command=btn_command)
-            btn.pack(pady=10)
+        self.movies_search = tk.StringVar()
+        self.movies_search.trace_add("write", lambda *_: self.filter_movies())
+        tk.Entry(top, textvariable=self.movies_search, font=FONT_BODY, width=24).pack(side="right")
+        tk.Label(top, text="Search:", bg=COLOR_DARK_BG, fg="white", font=FONT_BODY).pack(side="right", padx=5)
+
+        self.movies_view = VirtualList(page, on_select=lambda i: self.show_movie_player(i["path"], i["title"]),
+                                       describe=self.describe_movie, row_height=THUMB_PLACEHOLDER_SIZE[1] + 10,
+                                       image_size=THUMB_PLACEHOLDER_SIZE, on_render=self.on_render_movies,
+                                       empty_text="No videos found. Add files to the video folder.",
+                                       width=820, height=480)
+        self.movies_view.pack(padx=20, pady=(0, 20), fill="both", expand=True)
+        self.movies_version = None
+        self.movies = []
+        self.movies_index = None
+        self.movie_thumbs = OrderedDict()  # path -> PhotoImage; Tk only draws images something references
+        self.thumb_pending = {}  # path -> Future from thumbnails.request()
+        self.thumb_missing = set()  # paths with no poster to show
+        self.thumb_poll = None
+
+        # Drawn until the real poster arrives
+        self.thumb_placeholder = tk.PhotoImage(width=THUMB_PLACEHOLDER_SIZE[0], height=THUMB_PLACEHOLDER_SIZE[1])
+        self.thumb_placeholder.put(COLOR_GRAY_BOX, to=(0, 0) + THUMB_PLACEHOLDER_SIZE)
+
+    def on_show_movies(self):
+        # Only reload the list when the catalog changed since it was drawn
+        if self.movies_version == self.library_version:
+            return
+        self.movies_version = self.library_version
+        self.load_media_list("video", self.set_movies)
+
+    def set_movies(self, items, index):
+        self.movies, self.movies_index = items, index
+        paths = {item["path"] for item in items}
+        self.parsed_media = {p: m for p, m in self.parsed_media.items() if p in paths}
+        self.thumb_missing.clear()
+        self.filter_movies()
+
+    def filter_movies(self):
+        query = self.movies_search.get()
+        matches = search_media(self.movies, self.movies_index, query)
+        self.movies_view.set_items([self.movies[i] for i in matches])
+
+    def describe_movie(self, item):
+        return item["title"], format_duration(item["duration"]), self.movie_thumbs.get(item["path"], self.thumb_placeholder)
+
+    def on_render_movies(self, visible):
+        # Posters and VLC pre-parsing are only worth it for rows on screen
+        if self.load_thumbnails(visible):
+            self.after_idle(self.movies_view.render)  # draw posters that came from the cache
+        self.preparse_videos(item["path"] for item in visible)
+
+    def load_thumbnails(self, videos):
+        """Loads cached posters and queues extraction of the missing ones.
+
+        Returns whether any poster was loaded from the cache.
+        """
+        if not thumbnails:
+            return False
+        loaded = False
+        for item in videos:
+            path = item["path"]
+            if path in self.movie_thumbs:
+                self.movie_thumbs.move_to_end(path)
+                continue
+            if path in self.thumb_pending or path in self.thumb_missing:
+                continue
+            thumb = thumbnails.cached(path)
+            if thumb:
+                loaded |= self.set_movie_thumbnail(path, thumb)
+                continue
+            future = thumbnails.request(path, item["duration"])
+            if future is None:
+                self.thumb_missing.add(path)
+            else:
+                self.thumb_pending[path] = future
+        if self.thumb_pending and self.thumb_poll is None:
+            self.thumb_poll = self.after(THUMB_POLL_MS, self.poll_thumbnails)
+        return loaded
+
+    def poll_thumbnails(self):
+        self.thumb_poll = None
+        arrived = False
+        for path, future in list(self.thumb_pending.items()):
+            if not future.done():
+                continue
+            del self.thumb_pending[path]
+            try:
+                thumb = future.result()
+            except Exception as e:
+                print(f"Thumbnail for {path} failed: {e}")
+                thumb = None
+            if thumb:
+                arrived |= self.set_movie_thumbnail(path, thumb)
+            else:
+                self.thumb_missing.add(path)
+        if arrived:
+            self.movies_view.render()
+        if self.thumb_pending:
+            self.thumb_poll = self.after(THUMB_POLL_MS, self.poll_thumbnails)
+
+    def set_movie_thumbnail(self, path, thumb):
+        try:
+            image = tk.PhotoImage(file=thumb)
+        except tk.TclError:
+            self.thumb_missing.add(path)
+            return False
+        self.movie_thumbs[path] = image
+        # Keep posters for recently seen rows only; the rest reload from disk
+        while len(self.movie_thumbs) > MAX_THUMB_IMAGES:
+            self.movie_thumbs.popitem(last=False)
+        return True
+
+    def preparse_videos(self, paths):
+        # Demuxer probing and metadata happen on VLC's own threads now, not when
+        # the user clicks, so playback reaches the first frame sooner
+        if not self.engine_ready("video"):
+            return  # still loading; the list is redrawn once it is ready
+        for path in paths:
+            if path not in self.parsed_media:
+                media = self.vlc_instance.media_new(path)
+                media.parse_with_options(vlc.MediaParseFlag.local, MEDIA_PARSE_TIMEOUT_MS)
+                self.parsed_media[path] = media
+
+    # --- Media lists ---
+    def load_media_list(self, kind, on_ready):
+        """Loads and indexes a catalog list in the background, then calls on_ready(items, index)."""
+        future = self.list_executor.submit(index_media, kind)
+        self.after(LIST_POLL_MS, self.poll_media_list, future, on_ready)
+
+    def poll_media_list(self, future, on_ready):
+        if not future.done():
+            self.after(LIST_POLL_MS, self.poll_media_list, future, on_ready)
+            return
+        try:
+            items, index = future.result()
+        except Exception as e:
+            print(f"Loading media list failed: {e}")
+            return
+        on_ready(items, index)
 
     # --- PART 4: Video Player ---
-    def show_movie_player(self, title):
-        if title not in VIDEO_FILES or not os.path.exists(VIDEO_FILES[title]):
+    def show_movie_player(self, path, title):
+        self.begin_navigation("player")
+        with self.trace_span("file_check"):
+            found = os.path.exists(path)
+        if not found:
+            self.abandon_navigation()
             messagebox.showerror("Error", "Video file not found.")
             return
+        if not self.require_engine("video"):
+            self.abandon_navigation()
+            return
+        self.video_request = (path, title)
+        self.show_page("player")
 
-        self.clear_screen()
-        self.container.configure(bg=COLOR_DARK_BG)
-
-        top = tk.Frame(self.container, bg=COLOR_DARK_BG)
+    def build_movie_player(self, page):
+        top = tk.Frame(page, bg=COLOR_DARK_BG)
         top.pack(fill="x", padx=20, pady=10)
 
         tk.Button(top, text="⬅ Go Back", bg=COLOR_ACCENT, fg="white",
                   font=FONT_BUTTON, relief="raised", bd=2,
                   command=self.exit_video_player).pack(side="left")
 
-        tk.Label(top, text=f"Now Playing: {title}", bg=COLOR_DARK_BG, fg="white",
-                 font=FONT_HEADER).pack(side="left", padx=20)
-
-        video_frame = tk.Frame(self.container, bg="black", width=700, height=394)
-        video_frame.place(relx=0.5, rely=0.55, anchor="center")
+        self.video_title = tk.Label(top, text="", bg=COLOR_DARK_BG, fg="white", font=FONT_HEADER)
+        self.video_title.pack(side="left", padx=20)
 
-        self.update()  # Needed for VLC embedding
-
-        # Use existing VLC instance
-        self.vlc_player = self.vlc_instance.media_player_new()
-        media = self.vlc_instance.media_new(VIDEO_FILES[title])
-        self.vlc_player.set_media(media)
-        self.vlc_player.set_hwnd(video_frame.winfo_id())
-        self.vlc_player.play()
+        self.video_frame = tk.Frame(page, bg="black", width=700, height=394)
+        self.video_frame.place(relx=0.5, rely=0.55, anchor="center")
+        self.update_idletasks()  # the video frame needs a window id for VLC embedding
+        self.vlc_player.set_hwnd(self.video_frame.winfo_id())
 
         # --- Controls ---
-        controls = tk.Frame(self.container, bg=COLOR_DARK_BG)
+        controls = tk.Frame(page, bg=COLOR_DARK_BG)
         controls.pack(side="bottom", pady=10)
 
         tk.Button(controls, text="⏸ Pause", bg=COLOR_ACCENT, fg="white",
                   font=FONT_BUTTON, width=10,
-                  command=self.vlc_player.pause).grid(row=0, column=0, padx=5)
+                  command=lambda: self.vlc_player and self.vlc_player.pause()).grid(row=0, column=0, padx=5)
 
         tk.Button(controls, text="▶ Play", bg=COLOR_ACCENT, fg="white",
                   font=FONT_BUTTON, width=10,
-                  command=self.vlc_player.play).grid(row=0, column=1, padx=5)
+                  command=lambda: self.vlc_player and self.vlc_player.play()).grid(row=0, column=1, padx=5)
 
         tk.Button(controls, text="⏹ Stop", bg=COLOR_ACCENT, fg="white",
                   font=FONT_BUTTON, width=10,
-                  command=self.vlc_player.stop).grid(row=0, column=2, padx=5)
+                  command=lambda: self.vlc_player and self.vlc_player.stop()).grid(row=0, column=2, padx=5)
+
+    def on_show_player(self):
+        path, title = self.video_request
+        self.video_title.config(text=f"Now Playing: {title}")
+
+        # The parsed Media is reused, so the resume point is a seek, not a
+        # media option: options accumulate on the Media across plays
+        media = self.parsed_media.get(path) or self.vlc_instance.media_new(path)
+        self.vlc_player.set_media(media)
+        self.vlc_player.play()
+        start_ms = self.resume_position(path)
+        if start_ms:
+            self.resume_seek = self.after(RESUME_SEEK_POLL_MS, self.seek_to_resume_position, start_ms)
+        self.resume_tick = self.after(RESUME_SAVE_MS, self.save_video_position)
+
+    def seek_to_resume_position(self, start_ms):
+        # VLC ignores a seek until it is actually playing
+        self.resume_seek = None
+        state = self.vlc_player.get_state()
+        if state == vlc.State.Playing:
+            self.vlc_player.set_time(start_ms)
+        elif state not in (vlc.State.Ended, vlc.State.Error, vlc.State.Stopped):
+            self.resume_seek = self.after(RESUME_SEEK_POLL_MS, self.seek_to_resume_position, start_ms)
+
+    def on_hide_player(self):
+        if self.resume_tick:
+            self.after_cancel(self.resume_tick)
+            self.resume_tick = None
+        self.save_video_position(reschedule=False)
+        if self.resume_seek:
+            self.after_cancel(self.resume_seek)
+            self.resume_seek = None
+        self.vlc_player.stop()
+
+    def resume_position(self, path):
+        if not (resume_positions and self.current_user):
+            return 0
+        try:
+            return resume_positions.get_position(self.current_user, path)
+        except Exception as e:
+            print(f"Could not read resume position: {e}")
+            return 0
+
+    def save_video_position(self, reschedule=True):
+        # Only queues the position; resume_positions writes it off the Tk thread.
+        # Before the resume seek the player is still near the start, and saving
+        # that would overwrite the point it is about to resume from.
+        if resume_positions and self.current_user and self.video_request and not self.resume_seek:
+            position = self.vlc_player.get_time()
+            if position > 0:
+                length = self.vlc_player.get_length()
+                resume_positions.save_position(self.current_user, self.video_request[0],
+                                               position, length if length > 0 else None)
+        if reschedule:
+            self.resume_tick = self.after(RESUME_SAVE_MS, self.save_video_position)
 
     def exit_video_player(self):
-        if self.vlc_player:
-            self.vlc_player.stop()
-            self.vlc_player = None
         self.show_movies_page()
 
     # --- PART 5: Audio Page ---
     def show_audio_page(self):
-        self.clear_screen()
-        self.container.configure(bg=COLOR_DARK_BG)
+        self.show_page("audio")
 
-        top = tk.Frame(self.container, bg=COLOR_DARK_BG)
+    def build_audio_page(self, page):
+        top = tk.Frame(page, bg=COLOR_DARK_BG)
         top.pack(fill="x", padx=20, pady=10)
 
         tk.Button(top, text="Go Back", bg=COLOR_ACCENT, fg="white",
@@ -261,50 +1067,259 @@ class MediaApp(tk.Tk):
         tk.Label(top, text="Music & Audio", bg=COLOR_DARK_BG, fg="white",
                  font=FONT_HEADER).pack(side="left", padx=20)
 
-        main = tk.Frame(self.container, bg=COLOR_DARK_BG)
-        main.place(relx=0.5, rely=0.5, anchor="center")
+        self.audio_search = tk.StringVar()
+        self.audio_search.trace_add("write", lambda *_: self.filter_audio())
+        tk.Entry(top, textvariable=self.audio_search, font=FONT_BODY, width=24).pack(side="right")
+        tk.Label(top, text="Search:", bg=COLOR_DARK_BG, fg="white", font=FONT_BODY).pack(side="right", padx=5)
+
+        self.audio_view = VirtualList(page, on_select=lambda i: self.play_audio_feedback(i["path"]),
+                                      describe=self.describe_track, on_render=self.on_render_audio,
+                                      empty_text="No music found. Add files to the audio folder.")
+        self.audio_view.place(relx=0.5, rely=0.42, anchor="center", width=820, height=340)
+        self.audio_version = None
+        self.audio_tracks = []
+        self.audio_index = None
+        self.audio_files = {}  # path -> title
+        self.audio_prefetched = ()
+
+        self.audio_display = tk.Label(page, text="", bg=COLOR_DARK_BG, fg="white", font=("Arial", 14))
+        self.audio_display.place(relx=0.5, rely=0.85, anchor="center")
 
-        self.audio_files = AUDIO_FILES
+        # One rectangle per bar, created once; frames only move them
+        self.spectrum = None
+        self.spectrum_tick = None
+        if spectrum and self.play_queue and spectrum.available():
+            self.spectrum = spectrum.SpectrumAnalyzer()
+            width, height = SPECTRUM_SIZE
+            self.spectrum_canvas = tk.Canvas(page, width=width, height=height, bg=COLOR_DARK_BG,
+                                             highlightthickness=0)
+            self.spectrum_canvas.place(relx=0.5, rely=0.765, anchor="center")
+            step = width / self.spectrum.bars
+            self.spectrum_bars = [
+                self.spectrum_canvas.create_rectangle(i * step + 1, height, (i + 1) * step - 1, height,
+                                                      fill=COLOR_ACCENT, outline="")
+                for i in range(self.spectrum.bars)
+            ]
+            self.spectrum_heights = [0] * self.spectrum.bars
+
+        controls = tk.Frame(page, bg=COLOR_DARK_BG)
+        controls.place(relx=0.5, rely=0.94, anchor="center")
+        button = dict(bg=COLOR_ACCENT, fg="white", font=FONT_SMALL, relief="raised", bd=2,
+                      activebackground=COLOR_BUTTON_HOVER, width=9)
+        tk.Button(controls, text="⏮ Prev", command=self.play_previous, **button).pack(side="left", padx=4)
+        self.pause_button = tk.Button(controls, text="⏯ Pause", command=self.toggle_pause, **button)
+        self.pause_button.pack(side="left", padx=4)
+        tk.Button(controls, text="Next ⏭", command=self.play_next, **button).pack(side="left", padx=4)
+        self.shuffle_button = tk.Button(controls, text="Shuffle: Off", command=self.toggle_shuffle, **button)
+        self.shuffle_button.pack(side="left", padx=4)
+        self.repeat_button = tk.Button(controls, text="Repeat: Off", command=self.cycle_repeat, **button)
+        self.repeat_button.pack(side="left", padx=4)
+
+    def on_show_audio(self):
+        if not self.currently_playing:
+            self.audio_display.config(text="Select a music category to play.")
+        if self.audio_version == self.library_version:
+            return
+        self.audio_version = self.library_version
+        self.load_media_list("audio", self.set_audio_tracks)
+
+    def set_audio_tracks(self, items, index):
+        self.audio_tracks, self.audio_index = items, index
+        self.audio_files = {item["path"]: item["title"] for item in items}
+        self.audio_gains = {item["path"]: item.get("gain_db") for item in items}
+        if loudness:
+            self.audio_reference_db = loudness.reference_gain(self.audio_gains.values())
+        self.filter_audio()
+
+    def filter_audio(self):
+        query = self.audio_search.get()
+        matches = search_media(self.audio_tracks, self.audio_index, query)
+        self.audio_view.set_items([self.audio_tracks[i] for i in matches])
+
+    def describe_track(self, item):
+        detail = "   ".join(part for part in (item["artist"], format_duration(item["duration"])) if part)
+        return item["title"], detail, None
+
+    def on_render_audio(self, visible):
+        # Decode the tracks on screen in the background so a first click is instant too
+        paths = tuple(item["path"] for item in visible)
+        if audio_cache and paths != self.audio_prefetched and self.engine_ready("audio"):
+            self.audio_prefetched = paths
+            audio_cache.prefetch(paths)
+
+    def on_hide_audio(self):
+        self.stop_audio()
+        if self.spectrum_tick is not None:
+            self.after_cancel(self.spectrum_tick)
+            self.spectrum_tick = None
+            self.clear_spectrum()
+
+    def stop_audio(self):
+        if pygame is None:
+            return  # nothing can be playing yet
+        if self.play_queue:
+            self.play_queue.stop()
+        else:
+            pygame.mixer.music.stop()
         self.currently_playing = None
-        self.audio_buttons = []
 
-        for name in self.audio_files.keys():
-            available = os.path.exists(self.audio_files[name])
-            btn_bg = COLOR_ACCENT if available else COLOR_GRAY_BOX
-            btn_fg = "white" if available else "black"
-            btn_command = (lambda n=name: self.play_audio_feedback(n)) if available else None
-
-            btn = tk.Button(main, text=name, width=40, height=2,
-                            bg=btn_bg, fg=btn_fg, font=FONT_BODY,
-                            relief="raised", bd=2, activebackground=COLOR_BUTTON_HOVER,
-                            command=btn_command)
-            btn.pack(pady=10)
-            self.audio_buttons.append(btn)
-
-        self.audio_display = tk.Label(self.container, text="Select a music category to play.",
-                                      bg=COLOR_DARK_BG, fg="white", font=("Arial", 14))
-        self.audio_display.place(relx=0.5, rely=0.85, anchor="center")
-
-    def play_audio_feedback(self, selected):
+    def play_audio_feedback(self, file_path):
         if self.currently_playing:
-            pygame.mixer.music.stop()
-            self.currently_playing = None
+            self.stop_audio()
 
-        file_path = self.audio_files[selected]
-        if os.path.exists(file_path):
+        selected = self.audio_files[file_path]
+        if not os.path.exists(file_path):
+            self.audio_display.config(text=f"Audio file for {selected} not found.")
+        elif not self.require_engine("audio"):
+            return
+        elif self.play_queue:
+            # The rest of the (filtered) list plays on from here; see on_track_change
+            self.play_queue.set_tracks(item["path"] for item in self.audio_view.items)
+            if self.play_queue.play(file_path) and self.queue_tick is None:
+                self.queue_tick = self.after(QUEUE_TICK_MS, self.tick_play_queue)
+        else:
             pygame.mixer.music.load(file_path)
+            pygame.mixer.music.set_volume(self.track_volume(file_path))
             pygame.mixer.music.play()
-            self.currently_playing = selected
+            self.currently_playing = file_path
             self.audio_display.config(text=f"Now Playing: {selected} 🎶")
+
+    def track_volume(self, path):
+        # Measured ahead of time by the loudness job; nothing is analysed here
+        if not loudness:
+            return 1.0
+        return loudness.volume(self.audio_gains.get(path), self.audio_reference_db)
+
+    def on_track_change(self, path):
+        self.currently_playing = path
+        self.pause_button.config(text="⏯ Pause")
+        if path is None:
+            self.audio_display.config(text="Playback finished.")
         else:
-            self.audio_display.config(text=f"Audio file for {selected} not found.")
+            self.audio_display.config(text=f"Now Playing: {self.audio_files.get(path, os.path.basename(path))} 🎶")
+            if self.spectrum and self.spectrum_tick is None:
+                self.spectrum_tick = self.after(SPECTRUM_FRAME_MS, self.draw_spectrum)
+
+    def draw_spectrum(self):
+        # Runs while there is something to show: reports the play position
+        # and moves the bars whose height changed since the last frame
+        queue = self.play_queue
+        sound, position = queue.playback()
+        if sound is not None:
+            self.spectrum.update(sound, position, queue.is_playing)
+        else:
+            self.spectrum.stop()
+        levels = self.spectrum.levels
+        if queue.current is None and not any(self.spectrum_heights) and not any(levels):
+            self.spectrum_tick = None
+            return
+        height = SPECTRUM_SIZE[1]
+        canvas = self.spectrum_canvas
+        heights = [round(level * height) for level in levels] or self.spectrum_heights
+        for bar, new, old in zip(self.spectrum_bars, heights, self.spectrum_heights):
+            if new != old:
+                x0, _, x1, _ = canvas.coords(bar)
+                canvas.coords(bar, x0, height - new, x1, height)
+        self.spectrum_heights = heights
+        self.spectrum_tick = self.after(SPECTRUM_FRAME_MS, self.draw_spectrum)
+
+    def clear_spectrum(self):
+        self.spectrum.stop()
+        height = SPECTRUM_SIZE[1]
+        for bar in self.spectrum_bars:
+            x0, _, x1, _ = self.spectrum_canvas.coords(bar)
+            self.spectrum_canvas.coords(bar, x0, height, x1, height)
+        self.spectrum_heights = [0] * self.spectrum.bars
+
+    def tick_play_queue(self):
+        # Runs while something is queued; the engine swaps tracks on its own
+        self.queue_tick = None
+        self.play_queue.tick()
+        if self.play_queue.current is not None:
+            self.queue_tick = self.after(QUEUE_TICK_MS, self.tick_play_queue)
+
+    def play_next(self):
+        if self.play_queue and self.currently_playing:
+            self.play_queue.next()
+
+    def play_previous(self):
+        if self.play_queue and self.currently_playing:
+            self.play_queue.previous()
+
+    def toggle_pause(self):
+        if self.play_queue and self.currently_playing:
+            self.play_queue.toggle_pause()
+            self.pause_button.config(text="▶ Resume" if self.play_queue.paused else "⏯ Pause")
+
+    def toggle_shuffle(self):
+        if self.play_queue:
+            self.play_queue.set_shuffle(not self.play_queue.shuffle)
+            self.shuffle_button.config(text=f"Shuffle: {'On' if self.play_queue.shuffle else 'Off'}")
+
+    def cycle_repeat(self):
+        if self.play_queue:
+            following = (REPEAT_MODES.index(self.play_queue.repeat) + 1) % len(REPEAT_MODES)
+            self.play_queue.set_repeat(REPEAT_MODES[following])
+            self.repeat_button.config(text=f"Repeat: {self.play_queue.repeat.title()}")
+
+    # --- Media library ---
+    def start_library_scan(self):
+        """Refreshes the media catalog in the background."""
+        future = self.library_executor.submit(scan_library)
+        self.after(LIBRARY_POLL_MS, self.poll_library_scan, future)
+
+    def poll_library_scan(self, future):
+        if not future.done():
+            self.after(LIBRARY_POLL_MS, self.poll_library_scan, future)
+            return
+        try:
+            stats = future.result()
+        except Exception as e:
+            print(f"Media library scan failed: {e}")
+            return
+        if any(stats.get(k) for k in ("added", "updated", "removed")):
+            self.refresh_media_pages()
+        if thumbnails:
+            self.library_executor.submit(self.prune_thumbnails)
+        self.start_loudness_analysis()
+
+    def prune_thumbnails(self):
+        # Worker thread: drop posters of videos no longer in the catalog
+        thumbnails.prune(item["path"] for item in list_media("video"))
+
+    def refresh_media_pages(self):
+        # Media pages redraw their lists on next show; refresh a visible one now
+        self.library_version += 1
+        if self.current_page == "movies":
+            self.on_show_movies()
+        elif self.current_page == "audio":
+            self.on_show_audio()
+
+    def start_loudness_analysis(self):
+        """Measures tracks the catalog has no loudness gain for yet, in the background."""
+        if loudness:
+            future = self.library_executor.submit(loudness.analyze_library)
+            self.after(LIBRARY_POLL_MS, self.poll_loudness_analysis, future)
+
+    def poll_loudness_analysis(self, future):
+        if not future.done():
+            self.after(LIBRARY_POLL_MS, self.poll_loudness_analysis, future)
+            return
+        try:
+            stats = future.result()
+        except Exception as e:
+            print(f"Loudness analysis failed: {e}")
+            return
+        # New gains reach the play queue with the reloaded track list
+        if stats.get("measured") or stats.get("reused"):
+            self.refresh_media_pages()
 
     # --- PART 6: Games Page ---
     def show_games_page(self):
-        self.clear_screen()
-        self.container.configure(bg=COLOR_DARK_BG)
+        self.show_page("games")
 
-        top = tk.Frame(self.container, bg=COLOR_DARK_BG)
+    def build_games_page(self, page):
+        top = tk.Frame(page, bg=COLOR_DARK_BG)
         top.pack(fill="x", padx=20, pady=10)
 
         tk.Button(top, text="Go Back", bg=COLOR_ACCENT, fg="white",
@@ -314,7 +1329,7 @@ class MediaApp(tk.Tk):
         tk.Label(top, text="Video Games", bg=COLOR_DARK_BG, fg="white",
                  font=FONT_HEADER).pack(side="left", padx=20)
 
-        grid = tk.Frame(self.container, bg=COLOR_DARK_BG)
+        grid = tk.Frame(page, bg=COLOR_DARK_BG)
         grid.place(relx=0.5, rely=0.5, anchor="center")
 
         games = [
@@ -330,51 +1345,81 @@ class MediaApp(tk.Tk):
 
     # --- Rock Paper Scissors ---
     def show_rps_game(self):
-        self.clear_screen()
-        self.container.configure(bg=COLOR_DARK_BG)
+        self.show_page("rps")
 
-        tk.Button(self.container, text="< Back", bg=COLOR_ACCENT, fg="white", font=FONT_BUTTON,
+    def build_rps_game(self, page):
+        tk.Button(page, text="< Back", bg=COLOR_ACCENT, fg="white", font=FONT_BUTTON,
                   relief="raised", bd=2, command=self.show_games_page).pack(anchor="w", padx=20, pady=20)
 
-        frame = tk.Frame(self.container, bg=COLOR_GRAY_BOX, padx=20, pady=20)
+        frame = tk.Frame(page, bg=COLOR_GRAY_BOX, padx=20, pady=20)
         frame.place(relx=0.5, rely=0.5, anchor="center")
 
         tk.Label(frame, text="Rock Paper Scissors", font=FONT_HEADER, bg=COLOR_GRAY_BOX).pack(pady=10)
 
         self.rps_result = tk.Entry(frame, justify="center", font=FONT_BODY, relief="solid", bd=1)
         self.rps_result.pack(pady=10, fill="x")
+        self.rps_score = tk.Label(frame, text="", font=FONT_BODY, bg=COLOR_GRAY_BOX)
+        self.rps_score.pack()
 
-        def play(choice):
-            opts = ["Rock", "Paper", "Scissors"]
-            comp = random.choice(opts)
-            if choice == comp:
-                res = "Draw"
-            elif (choice=="Rock" and comp=="Scissors") or (choice=="Paper" and comp=="Rock") or (choice=="Scissors" and comp=="Paper"):
-                res = "You Win!"
-            else:
-                res = "Computer Wins!"
-            self.rps_result.delete(0, tk.END)
-            self.rps_result.insert(0, f"You: {choice} | PC: {comp} -> {res}")
+        # The computer learns each player's habits; see modules/rps.py
+        self.rps_opponent = None
+        self.rps_user = None
+        self.rps_tally = [0, 0, 0]  # the player's losses, draws, wins
 
         btn_frame = tk.Frame(frame, bg=COLOR_GRAY_BOX)
         btn_frame.pack(pady=10)
 
-        for opt in ["Rock", "Paper", "Scissors"]:
-            tk.Button(btn_frame, text=opt, width=10, command=lambda o=opt: play(o),
+        for move, name in enumerate(RPS_MOVES):
+            tk.Button(btn_frame, text=name, width=10, command=lambda m=move: self.play_rps(m),
                       bg=COLOR_ACCENT, fg="white", font=FONT_BUTTON, relief="raised", bd=2).pack(side="left", padx=5)
 
-        tk.Button(frame, text="Reset", width=10, command=lambda: self.rps_result.delete(0, tk.END),
+        tk.Button(frame, text="Reset", width=10, command=self.reset_rps_score,
                   bg=COLOR_ACCENT, fg="white", font=FONT_BUTTON, relief="raised", bd=2).pack(pady=10)
 
+    def on_show_rps(self):
+        self.reset_rps_score()
+        # A primary-key read, like the video resume lookup
+        self.rps_user = self.current_user
+        if rps:
+            try:
+                self.rps_opponent = rps.load_opponent(self.rps_user) if self.rps_user else rps.MarkovOpponent()
+            except sqlite3.Error as e:
+                print(f"Could not load the rock-paper-scissors model: {e}")
+                self.rps_opponent = rps.MarkovOpponent()
+
+    def on_hide_rps(self):
+        # Saved on the games thread; on_close waits for it
+        if self.rps_user and self.rps_opponent and self.rps_opponent.played:
+            self.game_executor.submit(rps.save_opponent, self.rps_user, self.rps_opponent.state())
+
+    def reset_rps_score(self):
+        self.rps_result.delete(0, tk.END)
+        self.rps_tally = [0, 0, 0]
+        self.rps_score.config(text="")
+
+    def play_rps(self, move):
+        if self.rps_opponent:
+            computer = self.rps_opponent.choose()  # decided before it sees the player's move
+            self.rps_opponent.observe(move)
+        else:
+            computer = random.randrange(3)
+        outcome = RPS_RESULT[move][computer]
+        self.rps_tally[outcome + 1] += 1
+        res = {1: "You Win!", 0: "Draw", -1: "Computer Wins!"}[outcome]
+        self.rps_result.delete(0, tk.END)
+        self.rps_result.insert(0, f"You: {RPS_MOVES[move]} | PC: {RPS_MOVES[computer]} -> {res}")
+        losses, draws, wins = self.rps_tally
+        self.rps_score.config(text=f"You {wins}  -  Computer {losses}  -  Draws {draws}")
+
     # --- Number Guessing ---
     def show_number_guess_game(self):
-        self.clear_screen()
-        self.container.configure(bg=COLOR_DARK_BG)
+        self.show_page("guess")
 
-        tk.Button(self.container, text="< Back", bg=COLOR_ACCENT, fg="white", font=FONT_BUTTON,
+    def build_number_guess_game(self, page):
+        tk.Button(page, text="< Back", bg=COLOR_ACCENT, fg="white", font=FONT_BUTTON,
                   relief="raised", bd=2, command=self.show_games_page).pack(anchor="w", padx=20, pady=20)
 
-        frame = tk.Frame(self.container, bg=COLOR_GRAY_BOX, padx=20, pady=20)
+        frame = tk.Frame(page, bg=COLOR_GRAY_BOX, padx=20, pady=20)
         frame.place(relx=0.5, rely=0.5, anchor="center")
 
         tk.Label(frame, text="Number Guessing Game", font=FONT_HEADER, bg=COLOR_GRAY_BOX).pack(pady=10)
@@ -421,63 +1466,153 @@ class MediaApp(tk.Tk):
         tk.Button(frame, text="Reset", width=10, command=reset_game,
                   bg=COLOR_ACCENT, fg="white", font=FONT_BUTTON, relief="raised", bd=2).pack(pady=5)
 
+    def on_show_guess(self):
+        # The secret number survives navigation; only the form is cleared
+        self.guess_feedback.config(text="")
+        self.guess_entry.delete(0, tk.END)
+
     # --- Tic Tac Toe ---
     def show_tictactoe_game(self):
-        self.clear_screen()
-        self.container.configure(bg=COLOR_DARK_BG)
+        self.show_page("tictactoe")
 
-        tk.Button(self.container, text="< Back", bg=COLOR_ACCENT, fg="white", font=FONT_BUTTON,
+    def build_tictactoe_game(self, page):
+        tk.Button(page, text="< Back", bg=COLOR_ACCENT, fg="white", font=FONT_BUTTON,
                   relief="raised", bd=2, command=self.show_games_page).pack(anchor="w", padx=20, pady=20)
 
-        frame = tk.Frame(self.container, bg=COLOR_GRAY_BOX, padx=20, pady=20)
+        frame = tk.Frame(page, bg=COLOR_GRAY_BOX, padx=20, pady=10)
         frame.place(relx=0.5, rely=0.5, anchor="center")
 
-        tk.Label(frame, text="Tic Tac Toe", font=FONT_HEADER, bg=COLOR_GRAY_BOX).pack(pady=10)
-
-        self.ttt_board = [""] * 9
-        self.ttt_turn = "X"
-        self.ttt_buttons = []
-
-        def check_winner():
-            combos = [(0,1,2),(3,4,5),(6,7,8),(0,3,6),(1,4,7),(2,5,8),(0,4,8),(2,4,6)]
-            for a,b,c in combos:
-                if self.ttt_board[a] == self.ttt_board[b] == self.ttt_board[c] != "":
-                    return self.ttt_board[a]
+        tk.Label(frame, text="Tic Tac Toe", font=FONT_HEADER, bg=COLOR_GRAY_BOX).pack(pady=5)
+        if board is None:
+            tk.Label(frame, text="Unavailable: modules/board.py could not be loaded.",
+                     font=FONT_BODY, bg=COLOR_GRAY_BOX).pack(pady=20)
+            return
+        self.ttt_status = tk.Label(frame, text="", font=FONT_BODY, bg=COLOR_GRAY_BOX)
+        self.ttt_status.pack()
+
+        # The whole board is one Canvas: the grid is drawn once per size and
+        # each move adds one mark, so even 19x19 stays cheap to redraw
+        self.ttt_canvas = tk.Canvas(frame, width=BOARD_PIXELS, height=BOARD_PIXELS,
+                                    bg=COLOR_ACCENT, highlightthickness=0)
+        self.ttt_canvas.pack(pady=5)
+        self.ttt_canvas.bind("<Button-1>", self.tictactoe_click)
+
+        self.ttt_board = None
+        self.ttt_vs_computer = False
+        self.ttt_search = None  # Future of the computer's move
+
+        controls = tk.Frame(frame, bg=COLOR_GRAY_BOX)
+        controls.pack(pady=5)
+        tk.Button(controls, text="Reset", width=8, command=self.reset_tictactoe,
+                  bg=COLOR_ACCENT, fg="white", font=FONT_BUTTON, relief="raised", bd=2).pack(side="left", padx=5)
+        self.ttt_mode_button = tk.Button(controls, text="Mode: 2 Players", width=16,
+                                         command=self.toggle_tictactoe_mode, bg=COLOR_ACCENT, fg="white",
+                                         font=FONT_BUTTON, relief="raised", bd=2)
+        self.ttt_mode_button.pack(side="left", padx=5)
+        self.ttt_variant = tk.StringVar(value=BOARD_VARIANTS[0][0])
+        variants = tk.OptionMenu(controls, self.ttt_variant, *(label for label, _, _ in BOARD_VARIANTS),
+                                 command=lambda _: self.reset_tictactoe())
+        variants.config(bg=COLOR_ACCENT, fg="white", font=FONT_SMALL, width=16)
+        variants.pack(side="left", padx=5)
+
+    def on_show_tictactoe(self):
+        if board:
+            self.reset_tictactoe()
+
+    def reset_tictactoe(self):
+        self.ttt_search = None  # a move still being searched is ignored when it lands
+        _, size, k = next(v for v in BOARD_VARIANTS if v[0] == self.ttt_variant.get())
+        if self.ttt_board is None or (self.ttt_board.size, self.ttt_board.k) != (size, k):
+            self.ttt_board = board.Board(size, k)
+            self.draw_tictactoe_grid()
+        else:
+            self.ttt_board.reset()
+        self.ttt_canvas.delete("mark")
+        if size != 3 and self.ttt_vs_computer:
+            self.toggle_tictactoe_mode()
+            return
+        # The computer only plays 3x3, and only when its engine imported
+        self.ttt_mode_button.config(state="normal" if size == 3 and tictactoe else "disabled")
+        self.update_tictactoe_status()
+
+    def draw_tictactoe_grid(self):
+        canvas = self.ttt_canvas
+        canvas.delete("all")
+        step = BOARD_PIXELS / self.ttt_board.size
+        for i in range(1, self.ttt_board.size):
+            canvas.create_line(i * step, 0, i * step, BOARD_PIXELS, fill="white", width=2)
+            canvas.create_line(0, i * step, BOARD_PIXELS, i * step, fill="white", width=2)
+
+    def toggle_tictactoe_mode(self):
+        self.ttt_vs_computer = not self.ttt_vs_computer
+        self.ttt_mode_button.config(text="Mode: vs. Computer" if self.ttt_vs_computer else "Mode: 2 Players")
+        self.reset_tictactoe()
+
+    def update_tictactoe_status(self):
+        if self.ttt_search is not None:
+            text = "Computer is thinking..."
+        elif self.ttt_vs_computer:
+            text = "Your turn (X)"
+        else:
+            text = f"{board.MARKS[self.ttt_board.turn]}'s turn ({self.ttt_board.k} in a row wins)"
+        self.ttt_status.config(text=text)
+
+    def tictactoe_click(self, event):
+        step = BOARD_PIXELS / self.ttt_board.size
+        row, col = int(event.y // step), int(event.x // step)
+        size = self.ttt_board.size
+        if not (0 <= row < size and 0 <= col < size):
+            return
+        cell = row * size + col
+        if self.ttt_search is not None or not self.ttt_board.is_free(cell):
+            return
+        if self.place_tictactoe(cell) is None and self.ttt_vs_computer:
+            future = self.game_executor.submit(tictactoe.best_move, *self.ttt_board.to_move())
+            self.ttt_search = future
+            self.update_tictactoe_status()
+            self.after(GAME_POLL_MS, self.poll_tictactoe_move, future)
+
+    def poll_tictactoe_move(self, future):
+        if future is not self.ttt_search:
+            return  # the board was reset meanwhile
+        if not future.done():
+            self.after(GAME_POLL_MS, self.poll_tictactoe_move, future)
+            return
+        self.ttt_search = None
+        try:
+            cell = future.result()
+        except Exception as e:
+            self.reset_tictactoe()
+            messagebox.showerror("Error", f"The computer could not move: {e}")
+            return
+        self.place_tictactoe(cell)
+
+    def place_tictactoe(self, cell):
+        """Plays `cell` for the side to move; announces and resets a finished game."""
+        game = self.ttt_board
+        player = board.MARKS[game.turn]
+        result = game.play(cell)
+        step = BOARD_PIXELS / game.size
+        row, col = divmod(cell, game.size)
+        self.ttt_canvas.create_text((col + 0.5) * step, (row + 0.5) * step, text=player, fill="white",
+                                    font=("Arial", max(8, int(step * 0.5)), "bold"), tags="mark")
+        if result is None:
+            self.update_tictactoe_status()
             return None
-
-        def button_click(i):
-            if self.ttt_board[i] == "":
-                self.ttt_board[i] = self.ttt_turn
-                self.ttt_buttons[i].config(text=self.ttt_turn)
-                winner = check_winner()
-                if winner:
-                    messagebox.showinfo("Tic Tac Toe", f"{winner} wins!")
-                    reset_board()
-                    return
-                elif "" not in self.ttt_board:
-                    messagebox.showinfo("Tic Tac Toe", "It's a draw!")
-                    reset_board()
-                    return
-                self.ttt_turn = "O" if self.ttt_turn == "X" else "X"
-
-        def reset_board():
-            self.ttt_board[:] = ["" for _ in range(9)]
-            for btn in self.ttt_buttons:
-                btn.config(text="")
-            self.ttt_turn = "X"
-
-        grid = tk.Frame(frame, bg=COLOR_GRAY_BOX)
-        grid.pack(pady=10)
-        for i in range(9):
-            btn = tk.Button(grid, text="", width=6, height=3, font=FONT_BUTTON,
-                            bg=COLOR_ACCENT, fg="white", relief="raised", bd=2,
-                            command=lambda i=i: button_click(i))
-            btn.grid(row=i//3, column=i%3, padx=5, pady=5)
-            self.ttt_buttons.append(btn)
-
-        tk.Button(frame, text="Reset", width=10, command=reset_board,
-                  bg=COLOR_ACCENT, fg="white", font=FONT_BUTTON, relief="raised", bd=2).pack(pady=10)
-
+        if game.winning_line:
+            first, last = game.winning_line[0], game.winning_line[-1]
+            (r0, c0), (r1, c1) = divmod(first, game.size), divmod(last, game.size)
+            self.ttt_canvas.create_line((c0 + 0.5) * step, (r0 + 0.5) * step, (c1 + 0.5) * step,
+                                        (r1 + 0.5) * step, fill=COLOR_DARK_BG, width=4, tags="mark")
+            self.update_idletasks()  # show the line before the dialog
+        if result == "draw":
+            messagebox.showinfo("Tic Tac Toe", "It's a draw!")
+        elif self.ttt_vs_computer:
+            messagebox.showinfo("Tic Tac Toe", "You win!" if result == "X" else "Computer wins!")
+        else:
+            messagebox.showinfo("Tic Tac Toe", f"{result} wins!")
+        self.reset_tictactoe()
+        return result
 
 if __name__ == "__main__":
     app = MediaApp()
@@ -0,0 +1,200 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from . import metrics
+
+# Decoded tracks are kept as pygame.mixer.Sound objects (raw PCM in the
+# mixer's format), so replaying a recent track skips opening and decoding
+# the file. pygame is imported lazily; the mixer must be initialised before
+# anything here decodes.
+
+# Memory budget for decoded PCM; MEDIAAPP_AUDIO_CACHE_MB overrides it
+BUDGET_BYTES = int(os.environ.get("MEDIAAPP_AUDIO_CACHE_MB", "256")) * 1024 * 1024
+
+# Decoding is CPU bound and competes with playback, so prefetches share one
+# thread. request() has a thread of its own so a track that is about to play
+# never waits behind a page worth of prefetches.
+DECODE_WORKERS = 1
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # path -> (sound, nbytes, (size, mtime_ns)), oldest first
+_used = 0
+_pending = {}  # path -> (Future, "request"/"prefetch") of a queued/running decode
+_executors = {}  # "request"/"prefetch" -> ThreadPoolExecutor
+_generation = 0
+
+
+def _file_key(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _pcm_bytes(sound):
+    import pygame
+    frequency, size, channels = pygame.mixer.get_init()
+    return int(sound.get_length() * frequency) * channels * (abs(size) // 8)
+
+
+def get(path):
+    """The cached Sound for `path`, or None. Marks the entry as recently used."""
+    with _lock:
+        entry = _entries.get(path)
+        if entry is not None:
+            _entries.move_to_end(path)
+    if entry is None:
+        metrics.incr("audio_cache.miss")
+        return None
+    try:
+        stale = _file_key(path) != entry[2]
+    except OSError:
+        stale = True
+    if stale:
+        discard(path)
+        metrics.incr("audio_cache.miss")
+        return None
+    metrics.incr("audio_cache.hit")
+    return entry[0]
+
+
+def load(path):
+    """Decodes `path` into the cache (if it fits the budget) and returns the Sound."""
+    sound = get(path)
+    if sound is not None:
+        return sound
+    return _decode(path, evict=True)
+
+
+def _decode(path, evict, generation=None):
+    import pygame
+    if generation is not None and generation != _generation:
+        return None  # superseded by a newer prefetch() call
+    with _lock:
+        entry = _entries.get(path)
+        full = _used >= BUDGET_BYTES
+    if entry is not None:
+        return entry[0]
+    if full and not evict:
+        return None
+
+    key = _file_key(path)
+    with metrics.timer("audio_cache.decode"):
+        sound = pygame.mixer.Sound(path)
+    nbytes = _pcm_bytes(sound)
+    _store(path, sound, nbytes, key, evict)
+    return sound
+
+
+def _store(path, sound, nbytes, key, evict):
+    """Adds an entry, evicting least recently used ones when `evict` is set.
+
+    Tracks bigger than the whole budget are never cached, and prefetches
+    (evict=False) never push out something the user actually played.
+    """
+    global _used
+    if nbytes > BUDGET_BYTES:
+        metrics.incr("audio_cache.too_large")
+        return False
+    with _lock:
+        old = _entries.pop(path, None)
+        if old is not None:
+            _used -= old[1]
+        if _used + nbytes > BUDGET_BYTES and not evict:
+            return False
+        while _used + nbytes > BUDGET_BYTES:
+            _, (_, freed, _) = _entries.popitem(last=False)
+            _used -= freed
+            metrics.incr("audio_cache.evicted")
+        _entries[path] = (sound, nbytes, key)
+        _used += nbytes
+    return True
+
+
+def request(path):
+    """Starts decoding `path` in the background unless it is cached or already queued."""
+    return _submit(path, evict=True, generation=None)
+
+
+def prefetch(paths):
+    """Decodes `paths` in the background, in order, while they fit the budget.
+
+    A later call supersedes earlier ones: tracks queued by a previous call
+    that have not started yet are skipped.
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        generation = _generation
+    for path in paths:
+        _submit(path, evict=False, generation=generation)
+
+
+def _submit(path, evict, generation):
+    with _lock:
+        if path in _entries:
+            return None
+        kind = "request" if generation is None else "prefetch"
+        future, queued_kind = _pending.get(path, (None, None))
+        if future is not None and not future.done():
+            # A decode that has not started is re-queued: a request overtakes
+            # a prefetch, and a newer prefetch moves it into the current batch
+            if queued_kind == "request" or not future.cancel():
+                return future
+        executor = _executors.get(kind)
+        if executor is None:
+            executor = _executors[kind] = ThreadPoolExecutor(max_workers=DECODE_WORKERS,
+                                                             thread_name_prefix=f"audio-{kind}")
+        future = executor.submit(_decode_quietly, path, evict, generation)
+        _pending[path] = (future, kind)
+    return future
+
+
+def _decode_quietly(path, evict, generation):
+    try:
+        return _decode(path, evict, generation)
+    except Exception:
+        metrics.incr("audio_cache.decode_errors")
+        return None
+    finally:
+        with _lock:
+            _pending.pop(path, None)
+
+
+def discard(path):
+    global _used
+    with _lock:
+        entry = _entries.pop(path, None)
+        if entry is not None:
+            _used -= entry[1]
+
+
+def clear():
+    global _used
+    with _lock:
+        _entries.clear()
+        _used = 0
+
+
+def set_budget(nbytes):
+    """Changes the memory budget, evicting least recently used tracks to fit."""
+    global BUDGET_BYTES, _used
+    with _lock:
+        BUDGET_BYTES = nbytes
+        while _entries and _used > BUDGET_BYTES:
+            _, (_, freed, _) = _entries.popitem(last=False)
+            _used -= freed
+
+
+def stats():
+    with _lock:
+        return {"tracks": len(_entries), "bytes": _used, "budget": BUDGET_BYTES,
+                "pending": len(_pending)}
+
+
+def shutdown():
+    """Drops queued decodes and waits for a running one (safe to call twice)."""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True, cancel_futures=True)
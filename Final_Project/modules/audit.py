@@ -0,0 +1,130 @@
+import atexit
+import queue
+import threading
+import time
+from . import metrics
+from .database import db_connection
+
+# Login attempts are queued in memory and written by one background thread,
+# so authentication never waits on an extra commit.
+
+# Longest an event waits before its batch is written (seconds)
+FLUSH_INTERVAL = 0.5
+
+# Events written per transaction
+BATCH_SIZE = 500
+
+# Queue bound; beyond this, events are dropped (and counted) rather than
+# letting memory grow without limit if the disk stalls
+MAX_PENDING = 100000
+
+_queue = queue.Queue(maxsize=MAX_PENDING)
+_writer = None
+_writer_lock = threading.Lock()
+_STOP = object()
+
+
+def record_login_attempt(username, success):
+    """Queues one login attempt; returns immediately."""
+    _ensure_writer()
+    try:
+        _queue.put_nowait((username, time.time(), 1 if success else 0))
+    except queue.Full:
+        metrics.incr("audit.dropped")
+
+
+def _ensure_writer():
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_run, name="audit-writer", daemon=True)
+            _writer.start()
+            atexit.register(shutdown)
+
+
+def _run():
+    while True:
+        item = _queue.get()
+        if item is _STOP:
+            _queue.task_done()
+            return
+
+        # Gather whatever else arrives within FLUSH_INTERVAL into one transaction
+        batch = [item]
+        stop = False
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while len(batch) < BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            try:
+                item = _queue.get(timeout=remaining) if remaining > 0 else _queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+
+        _write(batch)
+        for _ in range(len(batch) + stop):
+            _queue.task_done()
+        if stop:
+            return
+
+
+def _write(batch):
+    try:
+        with db_connection() as conn, metrics.timer("audit.write"):
+            conn.executemany("INSERT INTO login_events (username, attempted_at, success) VALUES (?, ?, ?)",
+                             batch)
+        metrics.incr("audit.written", len(batch))
+    except Exception:
+        metrics.incr("audit.write_errors")
+
+
+def flush():
+    """Blocks until every queued event has been written."""
+    if _writer is not None:
+        _queue.join()
+
+
+def shutdown():
+    """Writes pending events and stops the writer thread (safe to call twice)."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is None:
+        return
+    _queue.put(_STOP)
+    writer.join()
+
+
+def recent_failures(username, window=3600, limit=50):
+    """Timestamps of the user's failed logins in the last `window` seconds, newest first.
+
+    Served from the (username, success, attempted_at) index. Only events the
+    writer has already flushed are visible; call flush() first for an exact view.
+    """
+    with db_connection() as conn:
+        cursor = conn.execute("SELECT attempted_at FROM login_events "
+                              "WHERE username = ? AND success = 0 AND attempted_at >= ? "
+                              "ORDER BY attempted_at DESC LIMIT ?",
+                              (username, time.time() - window, limit))
+        return [row[0] for row in cursor]
+
+
+def count_recent_failures(username, window=3600):
+    with db_connection() as conn:
+        cursor = conn.execute("SELECT COUNT(*) FROM login_events "
+                              "WHERE username = ? AND success = 0 AND attempted_at >= ?",
+                              (username, time.time() - window))
+        return cursor.fetchone()[0]
+
+
+def recent_attempts(limit=100):
+    """The latest login attempts of any user, newest first."""
+    with db_connection() as conn:
+        cursor = conn.execute("SELECT username, attempted_at, success FROM login_events "
+                              "ORDER BY attempted_at DESC LIMIT ?", (limit,))
+        return [(user, at, bool(ok)) for user, at, ok in cursor]
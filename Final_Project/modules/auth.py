@@ -1,64 +1,210 @@
+import csv
 import hashlib
+import hmac
+import itertools
 import os
-from .database import get_db_connection
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from . import audit, hashing, metrics
+from .database import db_connection, note_write
 
-def register_user(username, password):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+# Users hashed and inserted per transaction by register_users_bulk()
+BULK_CHUNK_SIZE = 1000
+
+# Bound parameters per statement: SQLite before 3.32 allows at most 999
+MAX_SQL_VARIABLES = 999
 
-    # Check if user exists
-    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-    if cursor.fetchone():
-        conn.close()
-        return False, "Username already exists!"
+# How long a session token stays valid (seconds)
+SESSION_TTL = 7 * 24 * 60 * 60
 
+def _hash_job(job):
+    # Top-level so ProcessPoolExecutor can pickle it
+    password, salt, params = job
+    return hashing.derive_key(password, salt, params)
+
+@metrics.timed("auth.register")
+def register_user(username, password):
     # Generate a random salt (32 bytes)
     salt = os.urandom(32)
 
-    # Hash the password with the salt
-    # PBKDF2_HMAC is safer than simple sha256
-    key = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt,
-        100000
-    )
-
-    # Store salt and key as Hex strings
-    salt_hex = salt.hex()
-    key_hex = key.hex()
-
-    cursor.execute("INSERT INTO users (username, password_hash, salt) VALUES (?, ?, ?)",
-                   (username, key_hex, salt_hex))
-    conn.commit()
-    conn.close()
+    # Hash the password with the salt, recording the parameters used
+    params = hashing.DEFAULT_PARAMS
+    with metrics.timer("auth.register.hash"):
+        key = hashing.derive_key(password, salt, params)
+
+    # One statement: the UNIQUE index decides atomically, so two concurrent
+    # registrations of the same name can't both succeed
+    with db_connection() as conn:
+        with metrics.timer("auth.register.insert") as t:
+            cursor = conn.execute("INSERT INTO users (username, password_hash, salt, hash_params) VALUES (?, ?, ?, ?) "
+                                  "ON CONFLICT(username) DO NOTHING",
+                                  (username, key, salt, params))
+        note_write(t.elapsed)
+        if cursor.rowcount == 0:
+            metrics.incr("auth.register.duplicate")
+            return False, "Username already exists!"
+    metrics.incr("auth.register.success")
     return True, "Registration Successful!"
 
-def login_user(username, password):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def read_users_csv(path):
+    """Yields (username, password) pairs from a CSV file, skipping a header row."""
+    with open(path, newline='', encoding='utf-8') as f:
+        for i, row in enumerate(csv.reader(f)):
+            if not row:
+                continue
+            if i == 0 and [c.strip().lower() for c in row[:2]] == ['username', 'password']:
+                continue
+            yield row[0], row[1] if len(row) > 1 else ''
+
+def _existing_usernames(conn, usernames):
+    taken = set()
+    for start in range(0, len(usernames), MAX_SQL_VARIABLES):
+        batch = usernames[start:start + MAX_SQL_VARIABLES]
+        placeholders = ','.join('?' * len(batch))
+        cursor = conn.execute(f"SELECT username FROM users WHERE username IN ({placeholders})", batch)
+        taken.update(row[0] for row in cursor)
+    return taken
+
+def register_users_bulk(users, chunk_size=BULK_CHUNK_SIZE, workers=None):
+    """Registers many users, hashing on a process pool and inserting one chunk per transaction.
+
+    `users` is an iterable of (username, password) pairs or the path to a CSV
+    file. Rows that can't be created are skipped, not fatal. Returns
+    (created_count, conflicts) where each conflict is (row_number, username, reason).
+    """
+    if isinstance(users, (str, os.PathLike)):
+        users = read_users_csv(users)
+    workers = workers or os.cpu_count() or 1
+    params = hashing.DEFAULT_PARAMS
+
+    created = 0
+    conflicts = []
+    rows = enumerate(users, 1)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            # Filter bad and duplicate rows before paying for PBKDF2
+            pending = {}
+            for row_no, row in chunk:
+                try:
+                    username, password = row
+                except (TypeError, ValueError):
+                    conflicts.append((row_no, None, "Malformed row"))
+                    continue
+                if not username or not password:
+                    conflicts.append((row_no, username, "Missing username or password"))
+                elif username in pending:
+                    conflicts.append((row_no, username, "Duplicate username in batch"))
+                else:
+                    pending[username] = (row_no, password)
+            if not pending:
+                continue
+
+            with db_connection() as conn:
+                taken = _existing_usernames(conn, list(pending))
+            for username in taken:
+                row_no, _ = pending.pop(username)
+                conflicts.append((row_no, username, "Username already exists!"))
+            if not pending:
+                continue
+
+            salts = [os.urandom(32) for _ in pending]
+            jobs = [(password, salt, params) for (_, password), salt in zip(pending.values(), salts)]
+            keys = pool.map(_hash_job, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
 
-    cursor.execute("SELECT password_hash, salt FROM users WHERE username = ?", (username,))
-    data = cursor.fetchone()
-    conn.close()
+            records = [(username, key, salt, params)
+                       for username, key, salt in zip(pending, keys, salts)]
+
+            with db_connection() as conn:
+                # Take the write lock before re-checking so no concurrent
+                # registration can slip in between the check and the insert
+                conn.execute("BEGIN IMMEDIATE")
+                taken = _existing_usernames(conn, list(pending))
+                for username in taken:
+                    conflicts.append((pending[username][0], username, "Username already exists!"))
+                conn.executemany("INSERT INTO users (username, password_hash, salt, hash_params) VALUES (?, ?, ?, ?)",
+                                 [r for r in records if r[0] not in taken])
+            created += len(records) - len(taken)
+
+    conflicts.sort()
+    return created, conflicts
+
+@metrics.timed("auth.login")
+def login_user(username, password):
+    with db_connection() as conn, metrics.timer("auth.login.select"):
+        cursor = conn.execute("SELECT password_hash, salt, hash_params FROM users WHERE username = ?", (username,))
+        data = cursor.fetchone()
 
     if data:
-        stored_hash = data[0]
-        stored_salt = data[1]
-
-        # Convert hex salt back to bytes
-        salt_bytes = bytes.fromhex(stored_salt)
-
-        # Hash the input password with the retrieved salt
-        new_key = hashlib.pbkdf2_hmac(
-            'sha256',
-            password.encode('utf-8'),
-            salt_bytes,
-            100000
-        )
-
-        # Compare the new hash with the stored hash
-        if new_key.hex() == stored_hash:
+        stored_hash, stored_salt, stored_params = data
+
+        # Hash the input password with the retrieved salt and parameters
+        with metrics.timer("auth.login.hash"):
+            new_key = hashing.derive_key(password, stored_salt, stored_params or hashing.LEGACY_PARAMS)
+
+        # Compare raw bytes in constant time
+        if hmac.compare_digest(new_key, stored_hash):
+            if hashing.needs_rehash(stored_params):
+                metrics.incr("auth.login.rehash")
+                _rehash(username, password, stored_hash)
+            metrics.incr("auth.login.success")
+            audit.record_login_attempt(username, True)
             return True, "Login Successful"
 
-    return False, "Invalid Username or Password"
\ No newline at end of file
+    metrics.incr("auth.login.failure")
+    audit.record_login_attempt(username, False)
+    return False, "Invalid Username or Password"
+
+def _rehash(username, password, old_hash):
+    # Upgrade to the current parameters while we still have the plaintext.
+    # Matching on the old hash keeps a concurrent password change from being overwritten.
+    salt = os.urandom(32)
+    params = hashing.DEFAULT_PARAMS
+    key = hashing.derive_key(password, salt, params)
+    with db_connection() as conn:
+        conn.execute("UPDATE users SET password_hash = ?, salt = ?, hash_params = ? "
+                     "WHERE username = ? AND password_hash = ?",
+                     (key, salt, params, username, old_hash))
+
+def _token_hash(token):
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+def create_session(username, ttl=None):
+    """Issues an opaque session token for an already authenticated user."""
+    token = secrets.token_urlsafe(32)
+    now = time.time()
+    ttl = SESSION_TTL if ttl is None else ttl
+    with db_connection() as conn:
+        # Logins are rare, so clearing out expired sessions here keeps the
+        # table from growing without needing a separate cleanup job
+        conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        conn.execute("INSERT INTO sessions (token_hash, username, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                     (_token_hash(token), username, now, now + ttl))
+    return token
+
+def validate_session(token):
+    """Returns the username for a live session token, or None. No PBKDF2 involved."""
+    if not token:
+        return None
+    with db_connection() as conn:
+        cursor = conn.execute("SELECT username FROM sessions WHERE token_hash = ? AND expires_at > ?",
+                              (_token_hash(token), time.time()))
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+def revoke_session(token):
+    with db_connection() as conn:
+        conn.execute("DELETE FROM sessions WHERE token_hash = ?", (_token_hash(token),))
+
+def revoke_user_sessions(username):
+    with db_connection() as conn:
+        conn.execute("DELETE FROM sessions WHERE username = ?", (username,))
+
+def purge_expired_sessions():
+    with db_connection() as conn:
+        return conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
@@ -0,0 +1,90 @@
+# K-in-a-row on an N x N board: tic-tac-toe (3, 3) up to gomoku (19, 5).
+# Cells live in one bytearray, row-major. A new stone can only complete a
+# line through itself, so play() walks the four directions from that cell
+# and stops at the first foreign stone: O(K) per move whatever the board
+# size, with no list of winning lines to keep.
+
+EMPTY, X, O = 0, 1, 2
+MARKS = ("", "X", "O")
+
+MAX_SIZE = 19
+
+# (row, col) steps; each is walked both ways
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class Board:
+    def __init__(self, size=3, k=None):
+        k = k or min(size, 5)
+        if not 3 <= size <= MAX_SIZE:
+            raise ValueError(f"Board size must be between 3 and {MAX_SIZE}")
+        if not 3 <= k <= size:
+            raise ValueError(f"Need 3 to {size} in a row on a {size}x{size} board")
+        self.size = size
+        self.k = k
+        self.reset()
+
+    def reset(self):
+        self.cells = bytearray(self.size * self.size)
+        self.moves = []  # cell indexes in play order
+        self.turn = X
+        self.result = None  # "X", "O", "draw" or None while the game is on
+        self.winning_line = ()  # cells of the completed line, in order
+
+    def mark(self, index):
+        """"X", "O" or "" for a cell."""
+        return MARKS[self.cells[index]]
+
+    def is_free(self, index):
+        return self.result is None and self.cells[index] == EMPTY
+
+    def play(self, index):
+        """Places the current player's stone; returns the result once the game is over."""
+        if not 0 <= index < len(self.cells) or not self.is_free(index):
+            raise ValueError(f"Cell {index} is not playable")
+        player = self.turn
+        self.cells[index] = player
+        self.moves.append(index)
+        self.turn = O if player == X else X
+
+        line = self._line_through(index)
+        if line:
+            self.result, self.winning_line = MARKS[player], line
+        elif len(self.moves) == len(self.cells):
+            self.result = "draw"
+        return self.result
+
+    def undo(self):
+        """Takes back the last stone."""
+        index = self.moves.pop()
+        self.turn = self.cells[index]
+        self.cells[index] = EMPTY
+        self.result = None
+        self.winning_line = ()
+
+    def _line_through(self, index):
+        """The K-or-longer line of one colour through `index`, or ()."""
+        size, cells = self.size, self.cells
+        player = cells[index]
+        row, col = divmod(index, size)
+        for dr, dc in DIRECTIONS:
+            before = []
+            r, c = row - dr, col - dc
+            while 0 <= r < size and 0 <= c < size and cells[r * size + c] == player:
+                before.append(r * size + c)
+                r, c = r - dr, c - dc
+            after = []
+            r, c = row + dr, col + dc
+            while 0 <= r < size and 0 <= c < size and cells[r * size + c] == player:
+                after.append(r * size + c)
+                r, c = r + dr, c + dc
+            if len(before) + 1 + len(after) >= self.k:
+                return tuple(before[::-1]) + (index,) + tuple(after)
+        return ()
+
+    def to_move(self):
+        """(mover's stones, opponent's stones) as bitmasks, bit i for cell i."""
+        masks = [0, 0, 0]
+        for index, player in enumerate(self.cells):
+            masks[player] |= 1 << index
+        return (masks[X], masks[O]) if self.turn == X else (masks[O], masks[X])
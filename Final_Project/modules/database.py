@@ -1,31 +1,411 @@
 import sqlite3
 import os
+import itertools
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from . import metrics
+
+# Next to the app, not wherever the process happened to be started
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               'db', 'app_data.db')
+
+# Where the database lives; see configure_database() for the accepted forms
+DATABASE_URI = os.environ.get("MEDIAAPP_DB", DEFAULT_DB_PATH)
+
+# Applied once when a pooled connection is opened
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",        # readers don't block the writer
+    "PRAGMA synchronous=NORMAL",      # safe with WAL, far fewer fsyncs
+    "PRAGMA cache_size=-8000",        # ~8 MB page cache per connection
+    "PRAGMA mmap_size=67108864",      # 64 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Compiled statements kept per connection, so repeated queries skip the parser
+STATEMENT_CACHE_SIZE = 256
+
+# Rows rewritten per transaction by data migrations
+MIGRATION_BATCH_SIZE = 500
+
+# A write slower than this was almost certainly waiting on busy_timeout
+LOCK_WAIT_THRESHOLD = 0.02
+
+# Pages copied per step by backup_database()/restore_database(); between
+# steps other connections can keep reading and writing
+BACKUP_PAGES_PER_STEP = 1024
+
+# The memdb VFS gives in-memory databases normal multi-connection locking
+# (busy_timeout applies); older SQLite falls back to a shared cache
+_HAS_MEMDB = sqlite3.sqlite_version_info >= (3, 36, 0)
+
+_local = threading.local()
+_pool_lock = threading.Lock()
+_pool = []
+_target = None     # (database argument, uri flag, in-memory flag) for sqlite3.connect
+_keeper = None     # holds an in-memory database open while the pool is empty
+_anonymous = itertools.count()
+
+
+def _resolve(uri):
+    """Maps a backend URI to sqlite3.connect() arguments."""
+    if uri == ':memory:':
+        # Private to this process but still visible to every pooled thread
+        uri = f'memory://anonymous-{os.getpid()}-{next(_anonymous)}'
+
+    if uri.startswith('memory://'):
+        name = uri[len('memory://'):] or 'default'
+        if _HAS_MEMDB:
+            return f'file:/{name}?vfs=memdb', True, True
+        return f'file:{name}?mode=memory&cache=shared', True, True
+
+    if uri.startswith('file:'):
+        return uri, True, 'mode=memory' in uri or 'vfs=memdb' in uri
+
+    folder = os.path.dirname(os.path.abspath(uri))
+    os.makedirs(folder, exist_ok=True)
+    return uri, False, False
+
+
+def configure_database(uri):
+    """Points the pool at a different database, closing existing connections.
+
+    Accepted forms:
+      /path/to/app.db    a file (its folder is created if needed)
+      file:...?...       an SQLite URI, passed through as is
+      :memory:           a fresh in-memory database shared by this process's threads
+      memory://name      a named in-memory database; every connection to the same
+                         name sees the same data, so multi-threaded load tests can
+                         run entirely in RAM
+    """
+    global DATABASE_URI
+    close_db_connections()
+    DATABASE_URI = uri
+
+
+def _open_connection():
+    global _target, _keeper
+    if _target is None:
+        _target = _resolve(DATABASE_URI)
+    database, uri, memory = _target
+
+    # Each thread owns its connection; check_same_thread is off only so
+    # close_db_connections() can close them all at shutdown.
+    conn = sqlite3.connect(database, uri=uri,
+                           check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+    # An in-memory database vanishes with its last connection
+    if memory and _keeper is None:
+        _keeper = sqlite3.connect(database, uri=uri, check_same_thread=False)
+    return conn
+
+
+class _ThreadMarker:
+    """Lives only in one thread's local (weakref.finalize needs a weakref-able object)."""
+
+
+def _release(conn):
+    """Closes one thread's connection and drops it from the pool."""
+    with _pool_lock:
+        if conn not in _pool:
+            return  # already closed by close_db_connections()
+        _pool.remove(conn)
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
 
-DB_FOLDER = 'db'
-DB_NAME = 'app_data.db'
 
 def get_db_connection():
-    if not os.path.exists(DB_FOLDER):
-        os.makedirs(DB_FOLDER)
-    
-    conn = sqlite3.connect(os.path.join(DB_FOLDER, DB_NAME))
+    """Returns this thread's pooled connection, opening it on first use."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        with metrics.timer("db.connect"):
+            with _pool_lock:
+                conn = _open_connection()
+                _pool.append(conn)
+        _local.conn = conn
+        # A thread's locals are dropped when it exits; the marker going with
+        # them closes the connection, so short-lived threads don't leak one
+        _local.marker = marker = _ThreadMarker()
+        weakref.finalize(marker, _release, conn)
     return conn
 
-def initialize_db():
-    """Creates the Users table if it doesn't exist."""
+
+@contextmanager
+def db_connection():
+    """Pooled connection that commits on success and rolls back on error."""
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Create Users Table
-    # We store the salt and the hash separately for security
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            salt TEXT NOT NULL
+    try:
+        yield conn
+        with metrics.timer("db.commit") as t:
+            conn.commit()
+        note_write(t.elapsed)
+    except sqlite3.OperationalError as e:
+        conn.rollback()
+        if 'locked' in str(e):
+            metrics.incr("db.lock_errors")
+        raise
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def note_write(elapsed):
+    """Counts a lock wait when a write took longer than LOCK_WAIT_THRESHOLD."""
+    if elapsed >= LOCK_WAIT_THRESHOLD:
+        metrics.incr("db.lock_waits")
+
+
+def close_db_connections():
+    """Closes every pooled connection (call once at shutdown).
+
+    In-memory databases are discarded along with their last connection.
+    """
+    global _local, _target, _keeper
+    with _pool_lock:
+        conns = _pool[:]
+        _pool.clear()
+        if _keeper is not None:
+            conns.append(_keeper)
+        _keeper = None
+        _target = None
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    # Other threads still hold stale references in their thread-locals;
+    # a fresh local makes every thread reconnect on next use.
+    _local = threading.local()
+
+
+def backup_database(dest_path):
+    """Copies the live database to `dest_path` without stopping other users."""
+    source = get_db_connection()
+    source.commit()
+    dest = sqlite3.connect(dest_path)
+    try:
+        source.backup(dest, pages=BACKUP_PAGES_PER_STEP)
+        # The copy carries the live database's WAL flag; a snapshot is a
+        # single self-contained file, and memdb can't open a WAL database
+        dest.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dest.close()
+
+
+def restore_database(src_path):
+    """Replaces the live database's contents with the snapshot at `src_path`."""
+    if not os.path.exists(src_path):
+        raise FileNotFoundError(src_path)
+    dest = get_db_connection()
+    dest.commit()
+    memory = _target[2]
+    with tempfile.TemporaryDirectory() as tmp:
+        if memory:
+            # memdb can't open a database whose header says WAL, as snapshots
+            # taken before backup_database() cleared it do; clear it on a copy
+            staged = os.path.join(tmp, 'snapshot.db')
+            shutil.copyfile(src_path, staged)
+            conn = sqlite3.connect(staged)
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.close()
+            src_path = staged
+        source = sqlite3.connect(src_path)
+        try:
+            source.backup(dest, pages=BACKUP_PAGES_PER_STEP)
+        finally:
+            source.close()
+    # The copied header brings the snapshot's journal mode along; put back
+    # the one this backend runs with
+    dest.execute("PRAGMA journal_mode=MEMORY" if memory else "PRAGMA journal_mode=WAL")
+
+
+def _unhex(value):
+    return bytes.fromhex(value) if isinstance(value, str) else value
+
+
+def _migrate_blob_credentials(conn):
+    """Store password hashes and salts as raw bytes instead of hex text."""
+    # Converted in place a batch at a time so a large table never holds the
+    # write lock for long; rows already holding bytes are skipped, so an
+    # interrupted run simply resumes
+    while True:
+        rows = conn.execute("SELECT id, password_hash, salt FROM users "
+                            "WHERE typeof(password_hash) = 'text' OR typeof(salt) = 'text' LIMIT ?",
+                            (MIGRATION_BATCH_SIZE,)).fetchall()
+        if not rows:
+            break
+        conn.executemany("UPDATE users SET password_hash = ?, salt = ? WHERE id = ?",
+                         [(_unhex(key), _unhex(salt), user_id) for user_id, key, salt in rows])
+        conn.commit()
+
+
+def _migrate_hash_params(conn):
+    """Record the hashing parameters next to each password."""
+    # Existing rows keep NULL, which means the legacy PBKDF2 settings
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+    if 'hash_params' not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN hash_params TEXT")
+
+
+def _migrate_login_events(conn):
+    """Add the login audit table."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS login_events (
+            id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            attempted_at REAL NOT NULL,
+            success INTEGER NOT NULL
+        )
+    ''')
+    # Per-user failure lookups, and the global most-recent view
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_login_events_user "
+                 "ON login_events (username, success, attempted_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_login_events_time ON login_events (attempted_at)")
+
+
+def _migrate_media_catalog(conn):
+    """Add the media catalog table."""
+    # size and mtime_ns let a rescan skip files that haven't changed
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS media (
+            path TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            title TEXT NOT NULL,
+            artist TEXT,
+            duration REAL,
+            bitrate INTEGER,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            scanned_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_media_kind_title ON media (kind, title COLLATE NOCASE)")
+
+
+def _migrate_playback_positions(conn):
+    """Add per-user video resume positions."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS playback_positions (
+            username TEXT NOT NULL,
+            path TEXT NOT NULL,
+            position_ms INTEGER NOT NULL,
+            duration_ms INTEGER,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (username, path)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _migrate_loudness(conn):
+    """Add content hashes to the catalog and measured loudness per hash."""
+    # content_hash is filled in lazily by the loudness job and cleared when a
+    # rescan sees the file change
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(media)")}
+    if "content_hash" not in columns:
+        conn.execute("ALTER TABLE media ADD COLUMN content_hash TEXT")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS loudness (
+            hash TEXT PRIMARY KEY,
+            integrated_lufs REAL,
+            peak REAL NOT NULL,
+            gain_db REAL NOT NULL,
+            analyzed_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+
+def _migrate_rps_models(conn):
+    """Add per-user rock-paper-scissors opponent models."""
+    # counts is the opponent's packed 16-bit counter arrays (see rps.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rps_models (
+            username TEXT PRIMARY KEY,
+            max_order INTEGER NOT NULL,
+            history INTEGER NOT NULL,
+            played INTEGER NOT NULL,
+            counts BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+
+def _migrate_sessions(conn):
+    """Add login sessions, looked up by token hash and purged by expiry."""
+    # Sessions are keyed by the SHA-256 of their token, never the token
+    # itself. Databases from before this migration may already have the
+    # table, which initialize_db() used to create; IF NOT EXISTS adopts it.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash BLOB PRIMARY KEY,
+            username TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_username ON sessions (username)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+
+
+# Applied in order, once each; append new steps, never edit or reorder old ones
+MIGRATIONS = (
+    (1, _migrate_blob_credentials),
+    (2, _migrate_hash_params),
+    (3, _migrate_login_events),
+    (4, _migrate_media_catalog),
+    (5, _migrate_playback_positions),
+    (6, _migrate_loudness),
+    (7, _migrate_rps_models),
+    (8, _migrate_sessions),
+)
+
+
+def run_migrations(conn):
+    """Applies every migration newer than the recorded schema version."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at REAL NOT NULL
         )
     ''')
-    
     conn.commit()
-    conn.close()
\ No newline at end of file
+    current = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+    for version, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        migration(conn)
+        conn.execute("INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                     (version, migration.__doc__, time.time()))
+        conn.commit()
+        current = version
+    return current
+
+
+@metrics.timed("db.initialize")
+def initialize_db():
+    """Creates the tables if they don't exist and brings the schema up to date."""
+    with db_connection() as conn:
+        # Create Users Table
+        # We store the salt and the hash separately for security
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash BLOB NOT NULL,
+                salt BLOB NOT NULL,
+                hash_params TEXT
+            )
+        ''')
+        conn.commit()
+
+        run_migrations(conn)
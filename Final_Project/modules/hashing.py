@@ -0,0 +1,111 @@
+import hashlib
+import os
+import time
+import warnings
+
+# Parameters are stored next to each hash as "<algorithm>$<cost>...":
+#   pbkdf2_sha256$<iterations>
+#   scrypt$<n>$<r>$<p>
+# Rows written before this format existed have no parameters and used LEGACY_PARAMS.
+LEGACY_PARAMS = "pbkdf2_sha256$100000"
+
+ALGORITHMS = ("pbkdf2_sha256", "scrypt")
+KEY_LENGTH = 32
+SCRYPT_MAXMEM = 256 * 1024 * 1024
+
+
+def parse_params(params):
+    """Splits a parameter string into (algorithm, costs) and validates it."""
+    algorithm, *costs = (params or LEGACY_PARAMS).split("$")
+    try:
+        costs = tuple(int(c) for c in costs)
+    except ValueError:
+        raise ValueError(f"Invalid hash parameters: {params!r}")
+    if algorithm == "pbkdf2_sha256" and len(costs) == 1 and costs[0] > 0:
+        return algorithm, costs
+    if algorithm == "scrypt" and len(costs) == 3 and costs[0] > 1 and costs[0] & (costs[0] - 1) == 0:
+        return algorithm, costs
+    raise ValueError(f"Invalid hash parameters: {params!r}")
+
+
+def _params_from_environment():
+    params = os.environ.get("MEDIAAPP_HASH_PARAMS")
+    if not params:
+        return LEGACY_PARAMS
+    try:
+        parse_params(params)
+    except ValueError:
+        # Raising here would fail the auth import, so warn once and keep hashing
+        warnings.warn(f"Ignoring invalid MEDIAAPP_HASH_PARAMS={params!r}; using {LEGACY_PARAMS!r}")
+        return LEGACY_PARAMS
+    return params
+
+
+# Parameters for new and rehashed passwords; a deployment can override them
+# with the MEDIAAPP_HASH_PARAMS environment variable or set_hash_params().
+# The variable is checked here, at import, not on every registration.
+DEFAULT_PARAMS = _params_from_environment()
+
+
+def format_params(algorithm, *costs):
+    params = "$".join([algorithm, *(str(c) for c in costs)])
+    parse_params(params)
+    return params
+
+
+def derive_key(password, salt, params=None):
+    """Hashes a password with the given (or current default) parameters."""
+    algorithm, costs = parse_params(params or DEFAULT_PARAMS)
+    secret = password.encode('utf-8')
+    if algorithm == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac('sha256', secret, salt, costs[0], KEY_LENGTH)
+    n, r, p = costs
+    return hashlib.scrypt(secret, salt=salt, n=n, r=r, p=p,
+                          maxmem=SCRYPT_MAXMEM, dklen=KEY_LENGTH)
+
+
+def needs_rehash(params):
+    """True when a stored hash was made with different parameters than the current ones."""
+    return (params or LEGACY_PARAMS) != DEFAULT_PARAMS
+
+
+def set_hash_params(params):
+    global DEFAULT_PARAMS
+    parse_params(params)
+    DEFAULT_PARAMS = params
+
+
+def _time_once(params):
+    start = time.perf_counter()
+    derive_key("calibration-password", b"\0" * 32, params)
+    return time.perf_counter() - start
+
+
+def calibrate(target_ms=100, algorithm="pbkdf2_sha256"):
+    """Picks the cost whose verification takes about target_ms on this machine.
+
+    Returns a parameter string suitable for set_hash_params().
+    """
+    target = target_ms / 1000.0
+
+    if algorithm == "pbkdf2_sha256":
+        # PBKDF2 is linear in its iteration count, so time a probe and scale
+        iterations = 10000
+        elapsed = _time_once(format_params(algorithm, iterations))
+        while elapsed < 0.05:
+            iterations *= 2
+            elapsed = _time_once(format_params(algorithm, iterations))
+        iterations = int(iterations * target / elapsed)
+        return format_params(algorithm, max(10000, round(iterations, -3)))
+
+    if algorithm == "scrypt":
+        # n must be a power of two: double it until the next step overshoots
+        r, p = 8, 1
+        n = 1 << 10
+        while 128 * r * n * 2 <= SCRYPT_MAXMEM // 2:
+            if _time_once(format_params(algorithm, n * 2, r, p)) > target:
+                break
+            n *= 2
+        return format_params(algorithm, n, r, p)
+
+    raise ValueError(f"Unknown algorithm: {algorithm!r}")
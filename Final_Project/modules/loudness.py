@@ -0,0 +1,321 @@
+import hashlib
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import metrics
+from .database import db_connection
+
+# Loudness normalisation for the audio page. A batch job decodes each track
+# once, measures its integrated loudness (ITU-R BS.1770 / EBU R128: K-weighted
+# mean square over 400 ms blocks, with the -70 LUFS absolute and -10 LU
+# relative gates) and sample peak with NumPy, and stores the gain towards
+# TARGET_LUFS in the `loudness` table. Results are keyed by a hash of the
+# file's contents, which the catalog keeps per path, so a renamed or copied
+# track is never measured twice. Playback just reads the stored gain; as
+# the mixer can only attenuate, the audio page also lowers every track by the
+# boost its quietest one needs (reference_gain()), so quiet tracks match too.
+#
+# Decoding uses ffmpeg when it is installed, otherwise pygame with a dummy
+# audio driver; both run in the worker processes. NumPy is optional: without
+# it the job measures nothing and tracks play unadjusted.
+
+# ReplayGain 2.0 reference level
+TARGET_LUFS = -18.0
+
+# Everything is decoded to this rate, which the K-weighting below is defined for
+SAMPLE_RATE = 48000
+
+# Measurement is CPU bound; one core is left for the UI and playback
+ANALYSIS_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# Results written per transaction
+WRITE_BATCH_SIZE = 50
+
+# Seconds ffmpeg may take to decode one file
+DECODE_TIMEOUT = 120
+
+# How often a decoding worker checks whether the job was cancelled (seconds)
+CANCEL_POLL = 0.25
+
+# pygame can only attenuate, so matching all tracks means lowering them to
+# the level of the one that needs the most boost; boosts beyond this are not
+# matched, so one very quiet track can't turn the whole library down
+MAX_REFERENCE_DB = 12.0
+
+# BS.1770 K-weighting at 48 kHz: a high-shelf (head effects) then a high-pass
+_SHELF = ((1.53512485958697, -2.69169618940638, 1.19839281085285),
+          (1.0, -1.69065929318241, 0.73248077421585))
+_HIGH_PASS = ((1.0, -2.0, 1.0),
+              (1.0, -1.99004745483398, 0.99007225036621))
+
+# Gating blocks are 400 ms long and start every 100 ms
+_STEP = SAMPLE_RATE // 10
+_STEPS_PER_BLOCK = 4
+
+# Steps measured per FFT batch, which bounds worker memory on long tracks
+_STEPS_PER_CHUNK = 600
+
+_cancel = threading.Event()
+_pool = None  # (executor, worker cancel event) of the running job, for cancel()
+_pool_lock = threading.Lock()
+_worker_cancel = None  # in a worker process: the job's cancel event
+
+
+def file_hash(path):
+    """SHA-1 of the file's contents."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def reference_gain(gains):
+    """The boost the quietest tracks among `gains` (dB, None for unmeasured) would need.
+
+    Capped at MAX_REFERENCE_DB; 0.0 when no track needs a boost.
+    """
+    return min(MAX_REFERENCE_DB, max([0.0, *(g for g in gains if g is not None)]))
+
+
+def volume(gain_db, reference_db=0.0):
+    """Mixer volume (0..1) for a stored gain; None (not measured yet) counts as 0 dB.
+
+    pygame can only attenuate. With the default reference only tracks louder
+    than TARGET_LUFS are lowered and quieter ones stay quieter; pass
+    reference_gain() of the playlist to lower every track by that much more,
+    so they all play at the same level.
+    """
+    return min(1.0, 10 ** (((gain_db or 0.0) - reference_db) / 20))
+
+
+# --- Measurement (runs in worker processes) ---
+
+def _k_weighting_power(np, size):
+    """|H(f)|^2 of the K-weighting filter at the rfft bins of a `size`-sample frame."""
+    z = np.exp(-1j * np.pi * np.arange(size // 2 + 1) / (size // 2))
+    response = np.ones_like(z)
+    for b, a in (_SHELF, _HIGH_PASS):
+        response *= (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+    return np.abs(response) ** 2
+
+
+def measure(samples):
+    """(integrated loudness in LUFS, sample peak) of float samples, shape (n, channels), at SAMPLE_RATE.
+
+    The filter is applied in the frequency domain, one 100 ms step at a
+    time, so the whole measurement is a few array operations; the step
+    energies are then summed into overlapping 400 ms gating blocks.
+    Returns (None, peak) for silence.
+    """
+    import numpy as np
+    peak = float(np.abs(samples).max()) if samples.size else 0.0
+    steps = len(samples) // _STEP
+    if steps < _STEPS_PER_BLOCK:
+        return None, peak
+
+    weights = _k_weighting_power(np, _STEP)
+    energy = np.empty(steps)
+    for first in range(0, steps, _STEPS_PER_CHUNK):
+        count = min(_STEPS_PER_CHUNK, steps - first)
+        frames = samples[first * _STEP:(first + count) * _STEP].reshape(count, _STEP, -1)
+        spectrum = np.fft.rfft(frames, axis=1)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2) * weights[:, None]
+        # Parseval: the one-sided bins in the middle count twice
+        power[:, 1:-1] *= 2
+        # Mean square per channel, summed over channels (all weighted 1.0 for mono/stereo)
+        energy[first:first + count] = power.sum(axis=(1, 2)) / (_STEP * _STEP)
+
+    blocks = np.lib.stride_tricks.sliding_window_view(energy, _STEPS_PER_BLOCK).mean(axis=1)
+    with np.errstate(divide="ignore"):
+        block_lufs = -0.691 + 10 * np.log10(blocks)
+    gated = blocks[block_lufs > -70.0]
+    if not gated.size:
+        return None, peak
+    relative_gate = -0.691 + 10 * np.log10(gated.mean()) - 10.0
+    gated = gated[-0.691 + 10 * np.log10(gated) > relative_gate]
+    return float(-0.691 + 10 * np.log10(gated.mean())), peak
+
+
+def decode(path):
+    """The whole file as float32 samples in -1..1, shape (n, channels), at SAMPLE_RATE."""
+    import numpy as np
+    if shutil.which("ffmpeg"):
+        command = ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", path, "-vn",
+                   "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "2", "-ar", str(SAMPLE_RATE), "-"]
+        return np.frombuffer(_run_decoder(command), dtype=np.float32).reshape(-1, 2)
+    # Decoding needs an initialised mixer, not a sound card
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import pygame
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=SAMPLE_RATE, size=-16, channels=2)
+    if pygame.mixer.get_init()[:2] != (SAMPLE_RATE, -16):
+        raise ValueError("The mixer did not open at the measurement sample rate")
+    pcm = pygame.sndarray.array(pygame.mixer.Sound(path))
+    if pcm.ndim == 1:
+        pcm = pcm[:, None]
+    return pcm.astype(np.float32) / 32768
+
+
+def _run_decoder(command):
+    """ffmpeg's output; killed on timeout or when the job is cancelled."""
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + DECODE_TIMEOUT
+    while True:
+        try:
+            output, _ = proc.communicate(timeout=CANCEL_POLL)
+            break
+        except subprocess.TimeoutExpired:
+            cancelled = _worker_cancel is not None and _worker_cancel.is_set()
+            if cancelled or time.monotonic() > deadline:
+                proc.kill()
+                proc.communicate()
+                raise
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, command)
+    return output
+
+
+def _init_worker(cancel_event):
+    global _worker_cancel
+    _worker_cancel = cancel_event
+
+
+def _analyze_job(job):
+    # Top-level so ProcessPoolExecutor can pickle it
+    path, digest = job
+    try:
+        lufs, peak = measure(decode(path))
+    except Exception:
+        return path, digest, None
+    return path, digest, (lufs, peak)
+
+
+def gain_for(lufs, peak):
+    """Gain (dB) that brings a track to TARGET_LUFS without pushing its peak past full scale."""
+    if lufs is None:
+        return 0.0
+    gain = TARGET_LUFS - lufs
+    if peak > 0:
+        gain = min(gain, -20 * math.log10(peak))
+    return gain
+
+
+# --- Batch job ---
+
+@metrics.timed("loudness.analyze")
+def analyze_library(workers=None):
+    """Measures every audio track in the catalog that has no stored gain yet.
+
+    Content hashes are filled in first, so a file whose contents were
+    measured under another path (or before it was edited back) is not
+    decoded again. Returns counts of measured, reused (hash already known)
+    and failed tracks; {} when NumPy is not installed.
+    """
+    global _pool
+    try:
+        import numpy  # noqa: F401  (workers import it; fail here once instead)
+    except ImportError:
+        return {}
+    _cancel.clear()
+
+    with db_connection() as conn:
+        rows = conn.execute("SELECT path, content_hash FROM media WHERE kind = 'audio'").fetchall()
+        known = {digest for (digest,) in conn.execute("SELECT hash FROM loudness")}
+
+    stats = {"measured": 0, "reused": 0, "failed": 0}
+    hashed = []
+    jobs = {}
+    for path, digest in rows:
+        if _cancel.is_set():
+            break
+        if digest is None:
+            try:
+                digest = file_hash(path)
+            except OSError:
+                continue
+            hashed.append((digest, path))
+            if digest in known or digest in jobs:
+                stats["reused"] += 1
+        if digest not in known:
+            jobs.setdefault(digest, path)
+    _write_hashes(hashed)
+    if _cancel.is_set():
+        return stats
+
+    results = []
+    # Spawned, not forked: the app process has SDL's audio thread running
+    context = multiprocessing.get_context("spawn")
+    workers_cancel = context.Event()
+    with ProcessPoolExecutor(max_workers=workers or ANALYSIS_WORKERS, mp_context=context,
+                             initializer=_init_worker, initargs=(workers_cancel,)) as pool:
+        with _pool_lock:
+            # Submitted under the lock: cancel() either finds this pool or has
+            # already set _cancel, so nothing is queued after it ran
+            futures = [] if _cancel.is_set() else [pool.submit(_analyze_job, (path, digest))
+                                                   for digest, path in jobs.items()]
+            _pool = (pool, workers_cancel)
+        try:
+            for future in as_completed(futures):
+                if _cancel.is_set():
+                    break
+                path, digest, result = future.result()
+                if result is None:
+                    # Stored as "no correction" so it is not retried until the file changes
+                    stats["failed"] += 1
+                    metrics.incr("loudness.failed")
+                    result = (None, 0.0)
+                else:
+                    stats["measured"] += 1
+                lufs, peak = result
+                results.append((digest, lufs, peak, gain_for(lufs, peak), time.time()))
+                if len(results) >= WRITE_BATCH_SIZE:
+                    _write_results(results)
+                    results = []
+        finally:
+            with _pool_lock:
+                _pool = None
+    _write_results(results)
+    return stats
+
+
+def _write_hashes(hashed):
+    for i in range(0, len(hashed), WRITE_BATCH_SIZE):
+        with db_connection() as conn:
+            conn.executemany("UPDATE media SET content_hash = ? WHERE path = ?",
+                             hashed[i:i + WRITE_BATCH_SIZE])
+
+
+def _write_results(results):
+    if not results:
+        return
+    with db_connection() as conn:
+        conn.executemany('''
+            INSERT INTO loudness (hash, integrated_lufs, peak, gain_db, analyzed_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(hash) DO UPDATE SET
+                integrated_lufs = excluded.integrated_lufs, peak = excluded.peak,
+                gain_db = excluded.gain_db, analyzed_at = excluded.analyzed_at
+        ''', results)
+
+
+def cancel():
+    """Stops a running analyze_library() without waiting for its tracks.
+
+    Queued tracks are dropped and ffmpeg decodes in progress are killed, so
+    the job ends within about CANCEL_POLL seconds (a pygame decode can't be
+    interrupted and finishes first).
+    """
+    _cancel.set()
+    with _pool_lock:
+        running = _pool
+    if running is not None:
+        pool, workers_cancel = running
+        workers_cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
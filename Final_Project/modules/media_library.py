@@ -0,0 +1,136 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import metrics
+from .database import db_connection
+from .media_probe import media_kind, probe
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Folders scanned for media; MEDIAAPP_MEDIA_ROOTS adds more (os.pathsep separated)
+MEDIA_ROOTS = [os.path.join(APP_DIR, 'audio'), os.path.join(APP_DIR, 'video')]
+MEDIA_ROOTS += [p for p in os.environ.get("MEDIAAPP_MEDIA_ROOTS", "").split(os.pathsep) if p]
+
+# Header parsing is mostly waiting on the disk, so a few threads overlap it
+PROBE_WORKERS = 4
+
+# Catalog rows written per transaction
+WRITE_BATCH_SIZE = 500
+
+
+def title_from_filename(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem.replace('_', ' ').replace('-', ' ').strip().title() or stem
+
+
+def _walk(root):
+    """Yields (path, size, mtime_ns) for every media file under root."""
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif media_kind(entry.name):
+                        st = entry.stat()
+                        yield entry.path, st.st_size, st.st_mtime_ns
+                except OSError:
+                    continue
+
+
+def _describe(item):
+    path, size, mtime_ns = item
+    info = probe(path)
+    return (path, media_kind(path), info.get('title') or title_from_filename(path),
+            info.get('artist'), info.get('duration'), info.get('bitrate'),
+            size, mtime_ns, time.time())
+
+
+@metrics.timed("library.scan")
+def scan_library(roots=None):
+    """Brings the catalog in line with the files under `roots`.
+
+    Only files whose size or mtime changed since the last scan are parsed
+    again. Rows for files that disappeared, or that lie outside every root
+    (a folder dropped from the configuration), are removed. Returns counts
+    of added, updated, removed and unchanged files.
+    """
+    roots = [os.path.abspath(r) for r in (roots or MEDIA_ROOTS)]
+
+    with db_connection() as conn:
+        known = {path: (size, mtime_ns) for path, size, mtime_ns
+                 in conn.execute("SELECT path, size, mtime_ns FROM media")}
+
+    changed = []
+    seen = set()
+    for root in roots:
+        for path, size, mtime_ns in _walk(root):
+            seen.add(path)
+            if known.get(path) != (size, mtime_ns):
+                changed.append((path, size, mtime_ns))
+
+    removed = [path for path in known if path not in seen]
+    added = sum(1 for item in changed if item[0] not in known)
+    stats = {'added': added, 'updated': len(changed) - added,
+             'removed': len(removed), 'unchanged': len(seen) - len(changed)}
+
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as pool:
+        rows = pool.map(_describe, changed)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= WRITE_BATCH_SIZE:
+                _write_rows(batch)
+                batch = []
+        _write_rows(batch)
+
+    for i in range(0, len(removed), WRITE_BATCH_SIZE):
+        with db_connection() as conn:
+            conn.executemany("DELETE FROM media WHERE path = ?",
+                             [(p,) for p in removed[i:i + WRITE_BATCH_SIZE]])
+    return stats
+
+
+def _write_rows(rows):
+    if not rows:
+        return
+    with db_connection() as conn:
+        conn.executemany('''
+            INSERT INTO media (path, kind, title, artist, duration, bitrate, size, mtime_ns, scanned_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                kind = excluded.kind, title = excluded.title, artist = excluded.artist,
+                duration = excluded.duration, bitrate = excluded.bitrate,
+                size = excluded.size, mtime_ns = excluded.mtime_ns, scanned_at = excluded.scanned_at,
+                content_hash = NULL
+        ''', rows)
+
+
+def list_media(kind):
+    """Catalog entries of one kind ('audio' or 'video') as dicts, sorted by title.
+
+    gain_db is the stored loudness correction (see loudness.py), None until measured.
+    """
+    with db_connection() as conn:
+        cursor = conn.execute("SELECT path, title, artist, duration, bitrate, gain_db FROM media "
+                              "LEFT JOIN loudness ON loudness.hash = media.content_hash "
+                              "WHERE kind = ? ORDER BY title COLLATE NOCASE", (kind,))
+        return [{'path': path, 'title': title, 'artist': artist,
+                 'duration': duration, 'bitrate': bitrate, 'gain_db': gain_db}
+                for path, title, artist, duration, bitrate, gain_db in cursor]
+
+
+def get_media(path):
+    with db_connection() as conn:
+        row = conn.execute("SELECT title, artist, duration, bitrate, kind FROM media WHERE path = ?",
+                           (path,)).fetchone()
+    if row is None:
+        return None
+    title, artist, duration, bitrate, kind = row
+    return {'path': path, 'title': title, 'artist': artist,
+            'duration': duration, 'bitrate': bitrate, 'kind': kind}
@@ -0,0 +1,389 @@
+import os
+import struct
+
+# Pure-Python container header parsing: reads only tags and headers, never
+# decodes audio or video. probe() returns a dict with any of
+# title, artist, duration (seconds) and bitrate (bits/s) it could find.
+
+AUDIO_EXTENSIONS = {'.mp3', '.m4a', '.wav', '.flac', '.ogg'}
+VIDEO_EXTENSIONS = {'.mp4', '.m4v', '.mov', '.avi', '.mkv', '.webm'}
+
+# Bytes searched after the ID3 tag for the first MPEG frame
+_MP3_SYNC_WINDOW = 64 * 1024
+
+# Longest MP4 text tag read; a title or artist is never near this, but a
+# damaged atom can claim to run to the end of the file
+_MP4_TEXT_LIMIT = 4096
+
+# kbps by [MPEG-1?][layer][index]; index 0 is "free" and 15 is invalid
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def media_kind(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in AUDIO_EXTENSIONS:
+        return 'audio'
+    if ext in VIDEO_EXTENSIONS:
+        return 'video'
+    return None
+
+
+def probe(path):
+    """Reads container metadata from `path`; unknown or damaged files give {}."""
+    ext = os.path.splitext(path)[1].lower()
+    parser = _PARSERS.get(ext)
+    if parser is None:
+        return {}
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            info = parser(f, size)
+    except (OSError, struct.error, ValueError, IndexError):
+        return {}
+    if info.get('duration') and not info.get('bitrate'):
+        info['bitrate'] = int(size * 8 / info['duration'])
+    return {k: v for k, v in info.items() if v}
+
+
+# --- MP3 ---
+
+def _syncsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _decode_text(data):
+    encoding, body = data[0], data[1:]
+    if encoding == 1:
+        text = body.decode('utf-16', 'replace')
+    elif encoding == 2:
+        text = body.decode('utf-16-be', 'replace')
+    elif encoding == 3:
+        text = body.decode('utf-8', 'replace')
+    else:
+        text = body.decode('latin-1')
+    return text.split('\x00')[0].strip()
+
+
+def _read_id3v2(f):
+    """Returns (tag length, {frame id: text}) for an ID3v2 tag at the start of f."""
+    header = f.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0, {}
+    major, flags = header[3], header[5]
+    length = 10 + _syncsafe(header[6:10]) + (10 if flags & 0x10 else 0)
+    body = f.read(length - 10)
+
+    pos = 0
+    if flags & 0x40 and major >= 3:  # skip extended header
+        ext = _syncsafe(body[:4]) if major == 4 else struct.unpack('>I', body[:4])[0] + 4
+        pos = ext
+
+    wanted = {'TIT2': 'title', 'TPE1': 'artist', 'TLEN': 'length',
+              'TT2': 'title', 'TP1': 'artist', 'TLE': 'length'}
+    frames = {}
+    id_len, header_len = (3, 6) if major == 2 else (4, 10)
+    while pos + header_len <= len(body):
+        frame_id = body[pos:pos + id_len]
+        if not frame_id.strip(b'\x00'):
+            break  # padding
+        if major == 2:
+            frame_size = int.from_bytes(body[pos + 3:pos + 6], 'big')
+        elif major == 4:
+            frame_size = _syncsafe(body[pos + 4:pos + 8])
+        else:
+            frame_size = struct.unpack('>I', body[pos + 4:pos + 8])[0]
+        name = wanted.get(frame_id.decode('latin-1'))
+        if name and frame_size:
+            frames[name] = _decode_text(body[pos + header_len:pos + header_len + frame_size])
+        pos += header_len + frame_size
+    return length, frames
+
+
+def _mpeg_frame(header):
+    """Decodes a 4-byte MPEG audio frame header, or returns None if it isn't one."""
+    if header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 3      # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+    layer = 4 - ((header[1] >> 1) & 3)  # 1..3
+    index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 3
+    if version == 1 or layer == 4 or index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 1
+    mono = (header[3] >> 6) == 3
+    if layer == 1:
+        samples, length = 384, (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (layer == 2 or mpeg1) else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    return {'mpeg1': mpeg1, 'layer': layer, 'bitrate': bitrate, 'sample_rate': sample_rate,
+            'samples': samples, 'length': length, 'mono': mono}
+
+
+def _parse_mp3(f, size):
+    tag_length, tags = _read_id3v2(f)
+    f.seek(tag_length)
+    window = f.read(_MP3_SYNC_WINDOW)
+
+    # First frame header whose successor is also a valid header
+    frame, offset = None, -1
+    for i in range(len(window) - 4):
+        if window[i] != 0xFF:
+            continue
+        candidate = _mpeg_frame(window[i:i + 4])
+        if candidate is None:
+            continue
+        nxt = i + candidate['length']
+        if nxt + 4 <= len(window) and _mpeg_frame(window[nxt:nxt + 4]) is None:
+            continue
+        frame, offset = candidate, i
+        break
+
+    info = {'title': tags.get('title'), 'artist': tags.get('artist')}
+
+    # ID3v1 fallback for titles, and so its 128 bytes aren't counted as audio
+    f.seek(max(0, size - 128))
+    trailer = f.read(128)
+    audio_end = size
+    if trailer[:3] == b'TAG':
+        audio_end -= 128
+        info['title'] = info['title'] or trailer[3:33].split(b'\x00')[0].decode('latin-1').strip()
+        info['artist'] = info['artist'] or trailer[33:63].split(b'\x00')[0].decode('latin-1').strip()
+
+    if frame is None:
+        return info
+    audio_bytes = audio_end - tag_length - offset
+
+    # VBR files carry a Xing/Info or VBRI header in their first frame
+    side_info = (32 if not frame['mono'] else 17) if frame['mpeg1'] else (17 if not frame['mono'] else 9)
+    xing = window[offset + 4 + side_info:offset + 4 + side_info + 16]
+    frames = None
+    if xing[:4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', xing[4:8])[0]
+        if flags & 1:
+            frames = struct.unpack('>I', xing[8:12])[0]
+            if flags & 2:
+                audio_bytes = struct.unpack('>I', xing[12:16])[0]
+    else:
+        vbri = window[offset + 36:offset + 36 + 18]
+        if vbri[:4] == b'VBRI':
+            audio_bytes = struct.unpack('>I', vbri[10:14])[0]
+            frames = struct.unpack('>I', vbri[14:18])[0]
+
+    if frames:
+        info['duration'] = frames * frame['samples'] / frame['sample_rate']
+        info['bitrate'] = int(audio_bytes * 8 / info['duration']) if info['duration'] else None
+    elif tags.get('length', '').isdigit():
+        info['duration'] = int(tags['length']) / 1000
+    elif frame['bitrate']:
+        info['duration'] = audio_bytes * 8 / frame['bitrate']
+        info['bitrate'] = frame['bitrate']
+    return info
+
+
+# --- MP4 / M4A / MOV ---
+
+def _iter_boxes(f, start, end):
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        size, kind = struct.unpack('>I4s', f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _find_box(f, start, end, path):
+    for kind, body, box_end in _iter_boxes(f, start, end):
+        if kind == path[0]:
+            if len(path) == 1:
+                return body, box_end
+            # meta is a full box: 4 bytes of version/flags before its children
+            inner = body + 4 if kind == b'meta' else body
+            return _find_box(f, inner, box_end, path[1:])
+    return None
+
+
+def _mp4_text(f, location):
+    if location is None:
+        return None
+    found = _find_box(f, location[0], location[1], [b'data'])
+    if found is None:
+        return None
+    length = found[1] - found[0] - 8
+    if length <= 0:
+        return None
+    f.seek(found[0] + 8)  # type indicator + locale
+    return f.read(min(length, _MP4_TEXT_LIMIT)).decode('utf-8', 'replace').strip()
+
+
+def _parse_mp4(f, size):
+    moov = _find_box(f, 0, size, [b'moov'])
+    if moov is None:
+        return {}
+    info = {}
+    mvhd = _find_box(f, moov[0], moov[1], [b'mvhd'])
+    if mvhd:
+        f.seek(mvhd[0])
+        version = f.read(4)[0]
+        if version == 1:
+            _, _, timescale, duration = struct.unpack('>QQIQ', f.read(28))
+        else:
+            _, _, timescale, duration = struct.unpack('>IIII', f.read(16))
+        if timescale:
+            info['duration'] = duration / timescale
+    ilst = _find_box(f, moov[0], moov[1], [b'udta', b'meta', b'ilst'])
+    if ilst:
+        info['title'] = _mp4_text(f, _find_box(f, ilst[0], ilst[1], [b'\xa9nam']))
+        info['artist'] = _mp4_text(f, _find_box(f, ilst[0], ilst[1], [b'\xa9ART']))
+    return info
+
+
+# --- RIFF: WAV / AVI ---
+
+def _iter_chunks(f, start, end):
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        kind, size = struct.unpack('<4sI', f.read(8))
+        yield kind, pos + 8, size
+        pos += 8 + size + (size & 1)
+
+
+def _riff_info(f, body, size):
+    info = {}
+    f.seek(body)
+    if f.read(4) != b'INFO':
+        return info
+    for kind, start, length in _iter_chunks(f, body + 4, body + size):
+        f.seek(start)
+        text = f.read(length).split(b'\x00')[0].decode('latin-1').strip()
+        if kind == b'INAM':
+            info['title'] = text
+        elif kind == b'IART':
+            info['artist'] = text
+    return info
+
+
+def _parse_riff(f, size):
+    header = f.read(12)
+    if header[:4] != b'RIFF':
+        return {}
+    form = header[8:12]
+    info = {}
+    byte_rate = None
+    for kind, start, length in _iter_chunks(f, 12, size):
+        f.seek(start)
+        if form == b'WAVE' and kind == b'fmt ':
+            _, _, _, byte_rate = struct.unpack('<HHII', f.read(12))
+            info['bitrate'] = byte_rate * 8
+        elif form == b'WAVE' and kind == b'data' and byte_rate:
+            info['duration'] = min(length, size - start) / byte_rate
+        elif kind == b'LIST':
+            list_type = f.read(4)
+            if list_type == b'INFO':
+                info.update(_riff_info(f, start, length))
+            elif form == b'AVI ' and list_type == b'hdrl':
+                f.seek(start + 4)
+                if f.read(4) == b'avih':
+                    f.read(4)
+                    us_per_frame, _, _, _, frames = struct.unpack('<IIIII', f.read(20))
+                    info['duration'] = us_per_frame * frames / 1e6
+    return info
+
+
+# --- FLAC ---
+
+def _vorbis_comments(data):
+    vendor_len = struct.unpack('<I', data[:4])[0]
+    pos = 4 + vendor_len
+    count = struct.unpack('<I', data[pos:pos + 4])[0]
+    pos += 4
+    info = {}
+    for _ in range(count):
+        length = struct.unpack('<I', data[pos:pos + 4])[0]
+        key, _, value = data[pos + 4:pos + 4 + length].decode('utf-8', 'replace').partition('=')
+        key = key.upper()
+        if key == 'TITLE':
+            info['title'] = value.strip()
+        elif key == 'ARTIST':
+            info['artist'] = value.strip()
+        pos += 4 + length
+    return info
+
+
+def _parse_flac(f, size):
+    if f.read(4) != b'fLaC':
+        return {}
+    info = {}
+    last = False
+    while not last:
+        header = f.read(4)
+        if len(header) < 4:
+            break
+        last = bool(header[0] & 0x80)
+        block_type = header[0] & 0x7F
+        length = int.from_bytes(header[1:4], 'big')
+        block = f.read(length)
+        if block_type == 0:
+            packed = int.from_bytes(block[10:18], 'big')
+            sample_rate = packed >> 44
+            total_samples = packed & ((1 << 36) - 1)
+            if sample_rate and total_samples:
+                info['duration'] = total_samples / sample_rate
+        elif block_type == 4:
+            info.update(_vorbis_comments(block))
+    return info
+
+
+# --- Ogg Vorbis ---
+
+def _parse_ogg(f, size):
+    head = f.read(64 * 1024)
+    if head[:4] != b'OggS':
+        return {}
+    info = {}
+    ident = head.find(b'\x01vorbis')
+    if ident < 0:
+        return {}
+    sample_rate = struct.unpack('<I', head[ident + 12:ident + 16])[0]
+    comment = head.find(b'\x03vorbis')
+    if comment >= 0:
+        info.update(_vorbis_comments(head[comment + 7:]))
+
+    # The last page's granule position is the total sample count
+    f.seek(max(0, size - 64 * 1024))
+    tail = f.read()
+    last = tail.rfind(b'OggS')
+    if last >= 0 and sample_rate:
+        granule = struct.unpack('<q', tail[last + 6:last + 14])[0]
+        if granule > 0:
+            info['duration'] = granule / sample_rate
+    return info
+
+
+_PARSERS = {
+    '.mp3': _parse_mp3,
+    '.m4a': _parse_mp4, '.mp4': _parse_mp4, '.m4v': _parse_mp4, '.mov': _parse_mp4,
+    '.wav': _parse_riff, '.avi': _parse_riff,
+    '.flac': _parse_flac,
+    '.ogg': _parse_ogg,
+}
@@ -0,0 +1,207 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+# Opt-in: set MEDIAAPP_METRICS=1 or call enable(). While disabled every hook
+# below returns after a single global check.
+_enabled = os.environ.get("MEDIAAPP_METRICS") == "1"
+
+# How often start_periodic_dump() rewrites the metrics file (seconds)
+DUMP_INTERVAL = 60
+
+# Histogram bucket upper bounds: powers of two from 1 us to ~16 s
+_BOUNDS_US = [2 ** i for i in range(25)]
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_dumper = None
+
+
+class Histogram:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(_BOUNDS_US) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(_BOUNDS_US, seconds * 1e6)] += 1
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th sample, capped at the real max
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target and n:
+                bound = _BOUNDS_US[i] / 1e6 if i < len(_BOUNDS_US) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "sum_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000,
+            "min_ms": self.min * 1000,
+            "max_ms": self.max * 1000,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "buckets_us": {str(b): n for b, n in zip(_BOUNDS_US + ["inf"], self.buckets) if n},
+        }
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def incr(name, amount=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def observe(name, seconds):
+    if not _enabled:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.observe(seconds)
+
+
+class _Timer:
+    __slots__ = ("name", "start", "elapsed")
+
+    def __init__(self, name):
+        self.name = name
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        observe(self.name, self.elapsed)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+    elapsed = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name):
+    """Context manager that records the block's duration under `name`."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def timed(name):
+    """Decorator form of timer()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """Returns all counters and histogram summaries as plain dicts."""
+    with _lock:
+        return {
+            "enabled": _enabled,
+            "timestamp": time.time(),
+            "counters": dict(_counters),
+            "histograms": {name: h.snapshot() for name, h in _histograms.items()},
+        }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def dump(path):
+    """Writes snapshot() to `path` as JSON, replacing the file atomically."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+    os.replace(tmp, path)
+
+
+def start_periodic_dump(path, interval=DUMP_INTERVAL):
+    """Dumps metrics to `path` every `interval` seconds on a daemon thread."""
+    global _dumper
+    stop_periodic_dump(final=False)
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            try:
+                dump(path)
+            except OSError:
+                pass
+
+    thread = threading.Thread(target=loop, name="metrics-dump", daemon=True)
+    thread.start()
+    _dumper = (thread, stop, path)
+
+
+def stop_periodic_dump(final=True):
+    """Stops the dump thread, writing one last snapshot unless final=False."""
+    global _dumper
+    if _dumper is None:
+        return
+    thread, stop, path = _dumper
+    _dumper = None
+    stop.set()
+    thread.join()
+    if final:
+        try:
+            dump(path)
+        except OSError:
+            pass
@@ -0,0 +1,300 @@
+import random
+import time
+from . import audio_cache, metrics
+
+# Play queue for the audio page, independent of Tk. The UI (or a benchmark)
+# calls tick() every few tens of milliseconds; tick() notices finished tracks
+# and keeps the following track decoded and queued on the mixer channel, so
+# the mixer moves on to it without a gap. pygame is imported lazily and the
+# mixer must already be initialised.
+
+REPEAT_MODES = ("off", "all", "one")
+
+
+class PlayQueue:
+    def __init__(self, on_change=None, shuffle_seed=None, volume_for=None):
+        self.tracks = []
+        self.shuffle = False
+        self.repeat = "off"
+        self.paused = False
+        self.on_change = on_change  # called with the new path (or None) from tick()/play()
+        self.volume_for = volume_for  # path -> volume 0..1 (loudness correction), applied per track
+        self.stats = {"gapless": 0, "cold_starts": 0, "streamed": 0}
+        self._order = []  # play order as indexes into tracks
+        self._pos = None  # position in _order of the current track
+        self._mode = None  # "channel", "music" or None when stopped
+        self._sound = None
+        self._queued = None  # (pos, sound) handed to Channel.queue()
+        self._next = None  # (pos, future) being decoded in the background
+        self._channel = None
+        self._started = None  # perf_counter() at which the channel track's first sample played
+        self._paused_at = None
+        self._stream = None  # Future decoding the track being streamed, for playback()
+        self._rng = random.Random(shuffle_seed)
+
+    # --- Track list ---
+    def set_tracks(self, paths):
+        """Replaces the track list; stops playback if the current track is gone."""
+        current = self.current
+        self.tracks = list(paths)
+        self._reorder(self.tracks.index(current) if current in self.tracks else None)
+        self._forget_next()
+        if current is not None and current not in self.tracks:
+            self.stop()
+
+    def enqueue(self, path):
+        self.tracks.append(path)
+        index = len(self.tracks) - 1
+        if self.shuffle and self._pos is not None:
+            # Somewhere after the current track, so it is still ahead of us
+            self._order.insert(self._rng.randint(self._pos + 1, len(self._order)), index)
+        else:
+            self._order.append(index)
+        self._forget_next()
+
+    def clear(self):
+        self.stop()
+        self.tracks = []
+        self._order = []
+
+    def set_shuffle(self, shuffle):
+        self.shuffle = shuffle
+        current = self._order[self._pos] if self._pos is not None else None
+        self._reorder(current)
+        self._forget_next()
+
+    def set_repeat(self, mode):
+        if mode not in REPEAT_MODES:
+            raise ValueError(f"Unknown repeat mode: {mode!r}")
+        self.repeat = mode
+        self._forget_next()
+
+    def _reorder(self, current_index):
+        order = list(range(len(self.tracks)))
+        if self.shuffle:
+            self._rng.shuffle(order)
+            if current_index is not None:
+                # Keep the current track first so the rest are all still to come
+                order.remove(current_index)
+                order.insert(0, current_index)
+        self._order = order
+        self._pos = order.index(current_index) if current_index is not None else None
+
+    @property
+    def current(self):
+        if self._pos is None or self._mode is None:
+            return None
+        return self.tracks[self._order[self._pos]]
+
+    @property
+    def is_playing(self):
+        return self._mode is not None and not self.paused
+
+    def playback(self):
+        """(Sound, seconds into it) of what is playing, or (None, 0.0).
+
+        For a streamed track the Sound is only there once its background
+        decode has finished.
+        """
+        import pygame
+        if self._mode == "channel":
+            now = self._paused_at if self.paused else time.perf_counter()
+            return self._sound, now - self._started
+        if self._mode == "music" and self._stream is not None and self._stream.done():
+            if not self._stream.cancelled() and self._stream.exception() is None:
+                return self._stream.result(), max(0, pygame.mixer.music.get_pos()) / 1000
+        return None, 0.0
+
+    # --- Transport ---
+    def play(self, path=None):
+        """Starts `path` (or the first track in play order) and returns whether it started."""
+        if not self.tracks:
+            return False
+        if path is None:
+            pos = 0
+        else:
+            if path not in self.tracks:
+                self.enqueue(path)
+            pos = self._order.index(self.tracks.index(path))
+        return self._start(pos)
+
+    def next(self):
+        pos = self._following(self._pos, manual=True)
+        if pos is None:
+            self.stop()
+            return False
+        return self._start(pos)
+
+    def previous(self):
+        if self._pos is None:
+            return self.play()
+        return self._start(max(0, self._pos - 1))
+
+    def pause(self):
+        import pygame
+        if self._mode == "channel":
+            self._channel.pause()
+        elif self._mode == "music":
+            pygame.mixer.music.pause()
+        if self._mode is not None and not self.paused:
+            self._paused_at = time.perf_counter()
+        self.paused = self._mode is not None
+
+    def resume(self):
+        import pygame
+        if self._mode == "channel":
+            self._channel.unpause()
+        elif self._mode == "music":
+            pygame.mixer.music.unpause()
+        if self._paused_at is not None and self._started is not None:
+            self._started += time.perf_counter() - self._paused_at
+        self._paused_at = None
+        self.paused = False
+
+    def toggle_pause(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def stop(self):
+        import pygame
+        if self._mode == "channel":
+            self._channel.stop()
+        elif self._mode == "music":
+            pygame.mixer.music.stop()
+        self._mode = None
+        self._sound = None
+        self._queued = None
+        self._next = None
+        self._started = self._paused_at = self._stream = None
+        self.paused = False
+
+    # --- Driven by the caller's loop ---
+    def tick(self):
+        """Advances past finished tracks and prepares the next one.
+
+        Returns the path of the track that started during this call, or None.
+        """
+        import pygame
+        if self._mode is None or self.paused:
+            return None
+
+        started = None
+        if self._mode == "channel":
+            busy = self._channel.get_busy()
+            if self._queued is not None and busy and self._channel.get_queue() is None:
+                # The mixer already switched to the queued track, right
+                # where the previous one ended
+                self._started += self._sound.get_length()
+                self._pos, self._sound = self._queued
+                self._queued = None
+                self.stats["gapless"] += 1
+                metrics.incr("playqueue.gapless")
+                started = self._announce()
+            elif not busy or self._channel.get_sound() is not self._sound:
+                started = self._advance()
+        elif not pygame.mixer.music.get_busy():
+            started = self._advance()
+
+        if self._mode == "channel" and self._queued is None:
+            self._queue_following()
+        return started
+
+    def _advance(self):
+        pos = self._following(self._pos)
+        if pos is None:
+            self.stop()
+            self._announce()
+            return None
+        self._start(pos)
+        return self.current
+
+    def _following(self, pos, manual=False):
+        """Position that plays after `pos`, or None at the end of the queue."""
+        if pos is None or not self._order:
+            return 0 if self._order else None
+        if self.repeat == "one" and not manual:
+            return pos
+        if pos + 1 < len(self._order):
+            return pos + 1
+        return 0 if self.repeat == "all" else None
+
+    def _start(self, pos):
+        import pygame
+        upcoming = self._next
+        self.stop()
+        self._next = upcoming
+        path = self.tracks[self._order[pos]]
+        self._pos = pos
+
+        sound = self._ready(pos)
+        if sound is not None:
+            if self._channel is None:
+                # Reserve channel 0 so Sound.play() elsewhere never takes it over
+                pygame.mixer.set_reserved(1)
+                self._channel = pygame.mixer.Channel(0)
+            sound.set_volume(self._volume(path))
+            self._channel.play(sound)
+            self._mode, self._sound = "channel", sound
+            self._started = time.perf_counter()
+            self.stats["cold_starts"] += 1
+        else:
+            # Not decoded yet: stream this one and decode it for next time
+            try:
+                pygame.mixer.music.load(path)
+            except pygame.error:
+                metrics.incr("playqueue.load_errors")
+                self._announce()
+                return False
+            pygame.mixer.music.set_volume(self._volume(path))
+            pygame.mixer.music.play()
+            self._mode = "music"
+            self._stream = audio_cache.request(path)
+            self.stats["streamed"] += 1
+        self._announce()
+        self._prefetch_following()
+        return True
+
+    def _ready(self, pos):
+        """The decoded Sound for a queue position, if it is available right now."""
+        sound = audio_cache.get(self.tracks[self._order[pos]])
+        if sound is None and self._next is not None and self._next[0] == pos and self._next[1].done():
+            # Decoded but too large for the cache; the queue holds on to it instead
+            sound = self._next[1].result()
+        return sound
+
+    def _prefetch_following(self):
+        pos = self._following(self._pos)
+        if pos is None or (self._next is not None and self._next[0] == pos):
+            return
+        future = audio_cache.request(self.tracks[self._order[pos]])
+        self._next = (pos, future) if future is not None else None
+
+    def _queue_following(self):
+        pos = self._following(self._pos)
+        if pos is None:
+            return
+        if self._next is None or self._next[0] != pos:
+            self._prefetch_following()
+        sound = self._ready(pos)
+        if sound is not None:
+            # The volume belongs to the Sound, so it switches with the track
+            sound.set_volume(self._volume(self.tracks[self._order[pos]]))
+            self._channel.queue(sound)
+            self._queued = (pos, sound)
+
+    def _volume(self, path):
+        return self.volume_for(path) if self.volume_for else 1.0
+
+    def _forget_next(self):
+        # The following track may have changed. A sound already handed to
+        # Channel.queue() cannot be withdrawn; tick() replaces it, or restarts
+        # the right track if the mixer got to the stale one first.
+        self._queued = None
+        self._next = None
+
+    def _announce(self):
+        if self.on_change:
+            self.on_change(self.current)
+        return self.current
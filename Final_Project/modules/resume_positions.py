@@ -0,0 +1,111 @@
+import atexit
+import threading
+import time
+from . import metrics
+from .database import db_connection
+
+# Where each user stopped watching each video. The player reports its
+# position every few seconds; only the latest report per (user, path) is
+# kept in memory and a background thread writes them, so the Tk loop never
+# waits on a commit.
+
+# Longest a reported position waits before it is written (seconds)
+FLUSH_INTERVAL = 2.0
+
+# Positions this close to either end are not worth resuming from (ms)
+MIN_RESUME_MS = 5000
+END_MARGIN_MS = 15000
+
+_lock = threading.Lock()
+_write_lock = threading.Lock()  # keeps batches for the same key in order
+_pending = {}  # (username, path) -> (position_ms, duration_ms, reported_at)
+_writing = {}  # the batch being committed, still readable until the commit is done
+_wakeup = threading.Event()
+_writer = None
+_stopping = False
+
+
+def save_position(username, path, position_ms, duration_ms=None):
+    """Records where `username` is in `path`; returns immediately."""
+    global _writer
+    with _lock:
+        _pending[(username, path)] = (int(position_ms), duration_ms, time.time())
+        if _writer is None:
+            _writer = threading.Thread(target=_run, name="resume-writer", daemon=True)
+            _writer.start()
+            atexit.register(shutdown)
+
+
+def get_position(username, path):
+    """Milliseconds to resume `path` from for `username`, or 0 to start at the top."""
+    with _lock:
+        pending = _pending.get((username, path)) or _writing.get((username, path))
+    if pending is not None:
+        position_ms, duration_ms = pending[:2]
+    else:
+        with db_connection() as conn:
+            row = conn.execute("SELECT position_ms, duration_ms FROM playback_positions "
+                               "WHERE username = ? AND path = ?", (username, path)).fetchone()
+        if row is None:
+            return 0
+        position_ms, duration_ms = row
+    if position_ms < MIN_RESUME_MS:
+        return 0
+    if duration_ms and position_ms > duration_ms - END_MARGIN_MS:
+        return 0  # watched to the end; start over next time
+    return position_ms
+
+
+def _run():
+    while True:
+        _wakeup.wait(FLUSH_INTERVAL)
+        _wakeup.clear()
+        _write()
+        with _lock:
+            if _stopping and not _pending:
+                return
+
+
+def _write():
+    global _pending, _writing
+    with _write_lock:
+        with _lock:
+            batch, _pending = _pending, {}
+            _writing = batch
+        if batch:
+            _write_batch(batch)
+            with _lock:
+                _writing = {}
+
+
+def _write_batch(batch):
+    rows = [(user, path, pos, dur, at) for (user, path), (pos, dur, at) in batch.items()]
+    try:
+        with db_connection() as conn, metrics.timer("resume.write"):
+            conn.executemany('''
+                INSERT INTO playback_positions (username, path, position_ms, duration_ms, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(username, path) DO UPDATE SET
+                    position_ms = excluded.position_ms, duration_ms = excluded.duration_ms,
+                    updated_at = excluded.updated_at
+            ''', rows)
+    except Exception:
+        metrics.incr("resume.write_errors")
+
+
+def flush():
+    """Writes every reported position now, on the calling thread."""
+    _write()
+
+
+def shutdown():
+    """Writes pending positions and stops the writer thread (safe to call twice)."""
+    global _writer, _stopping
+    with _lock:
+        writer, _writer = _writer, None
+        _stopping = writer is not None
+    if writer is None:
+        return
+    _wakeup.set()
+    writer.join()
+    _stopping = False
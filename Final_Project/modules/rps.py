@@ -0,0 +1,235 @@
+import random
+import sys
+import time
+from array import array
+from .database import db_connection
+
+# Rock-paper-scissors opponent that learns from the player. For every order
+# k up to MAX_ORDER it counts which move followed each run of the player's
+# last k moves, in one flat array of 16-bit counters per order; the context
+# is a base-3 number, so an update is a few index operations. To move, it
+# takes the longest context it has seen often enough, predicts the player's
+# most frequent follow-up and plays what beats it. Models are saved per user.
+#
+# simulate() replays the same opponent across many games at once with NumPy
+# (optional, imported on use) to measure it against scripted players offline.
+
+MOVES = ("Rock", "Paper", "Scissors")
+ROCK, PAPER, SCISSORS = range(3)
+
+# RESULT[player][computer], from the player's side: 1 win, 0 draw, -1 loss
+RESULT = (
+    (0, -1, 1),
+    (1, 0, -1),
+    (-1, 1, 0),
+)
+
+# BEATS[move] is the move that beats it
+BEATS = (PAPER, SCISSORS, ROCK)
+
+# Longest run of the player's moves used as context
+MAX_ORDER = 3
+
+# Times a context must have been seen before it is trusted for a prediction
+MIN_OBSERVATIONS = 2
+
+# When a counter reaches this, its context's counters are halved, so
+# habits the player dropped fade instead of outvoting new ones forever
+COUNT_LIMIT = 1000
+
+
+class MarkovOpponent:
+    def __init__(self, max_order=MAX_ORDER, rng=None):
+        self.max_order = max_order
+        self.rng = rng or random.Random()
+        # counts[k][context * 3 + move]: `move` followed the k-move `context`
+        self.counts = [array("H", bytes(2 * 3 ** (k + 1))) for k in range(max_order + 1)]
+        self.history = 0  # the player's last max_order moves in base 3, latest lowest
+        self.played = 0
+
+    def predict(self):
+        """The player's most likely next move, or None without enough history."""
+        for k in range(min(self.max_order, self.played), -1, -1):
+            base = self.history % 3 ** k * 3
+            counts = self.counts[k][base:base + 3]
+            if sum(counts) >= MIN_OBSERVATIONS:
+                top = max(counts)
+                return self.rng.choice([move for move in range(3) if counts[move] == top])
+        return None
+
+    def choose(self):
+        """The computer's move, picked before it sees the player's."""
+        predicted = self.predict()
+        return self.rng.randrange(3) if predicted is None else BEATS[predicted]
+
+    def observe(self, move):
+        """Records the player's move."""
+        for k in range(min(self.max_order, self.played) + 1):
+            base = self.history % 3 ** k * 3
+            counts = self.counts[k]
+            counts[base + move] += 1
+            if counts[base + move] >= COUNT_LIMIT:
+                for i in range(base, base + 3):
+                    counts[i] //= 2
+        self.history = (self.history * 3 + move) % 3 ** self.max_order
+        self.played += 1
+
+    def state(self):
+        """A snapshot for save_opponent(); counters are stored little-endian."""
+        blob = []
+        for counts in self.counts:
+            if sys.byteorder == "big":
+                counts = array("H", counts)
+                counts.byteswap()
+            blob.append(counts.tobytes())
+        return self.max_order, self.history, self.played, b"".join(blob)
+
+    @classmethod
+    def from_state(cls, max_order, history, played, blob, rng=None):
+        """Rebuilds a state() snapshot; a blob of the wrong size gives a fresh opponent."""
+        opponent = cls(max_order, rng)
+        if len(blob) != sum(len(counts) * counts.itemsize for counts in opponent.counts):
+            return opponent  # truncated or corrupt; slicing it in would resize the arrays
+        offset = 0
+        for counts in opponent.counts:
+            size = len(counts) * counts.itemsize
+            counts[:] = array("H", blob[offset:offset + size])
+            if sys.byteorder == "big":
+                counts.byteswap()
+            offset += size
+        opponent.history, opponent.played = history, played
+        return opponent
+
+
+def outcome(player, computer):
+    return RESULT[player][computer]
+
+
+def load_opponent(username, max_order=MAX_ORDER):
+    """The opponent as `username` left it, or a fresh one."""
+    with db_connection() as conn:
+        row = conn.execute("SELECT max_order, history, played, counts FROM rps_models WHERE username = ?",
+                           (username,)).fetchone()
+    if row is None or row[0] != max_order:
+        return MarkovOpponent(max_order)  # none yet, or saved with a different layout
+    return MarkovOpponent.from_state(*row)
+
+
+def save_opponent(username, state):
+    """Stores a MarkovOpponent.state() snapshot for `username`."""
+    max_order, history, played, blob = state
+    with db_connection() as conn:
+        conn.execute('''
+            INSERT INTO rps_models (username, max_order, history, played, counts, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(username) DO UPDATE SET
+                max_order = excluded.max_order, history = excluded.history, played = excluded.played,
+                counts = excluded.counts, updated_at = excluded.updated_at
+        ''', (username, max_order, history, played, blob, time.time()))
+
+
+# --- Offline evaluation ---
+
+def _random_player(np, rng, games):
+    return lambda step, mine, theirs, result: rng.integers(0, 3, games)
+
+
+def _constant_player(np, rng, games):
+    favourite = rng.integers(0, 3, games)
+    return lambda step, mine, theirs, result: favourite
+
+
+def _cycle_player(np, rng, games):
+    start = rng.integers(0, 3, games)
+    return lambda step, mine, theirs, result: (start + step) % 3
+
+
+def _biased_player(np, rng, games):
+    return lambda step, mine, theirs, result: rng.choice(3, games, p=(0.5, 0.3, 0.2))
+
+
+def _beat_last_player(np, rng, games):
+    beats = np.array(BEATS)
+
+    def play(step, mine, theirs, result):
+        return rng.integers(0, 3, games) if theirs is None else beats[theirs]
+    return play
+
+
+def _win_stay_lose_shift_player(np, rng, games):
+    def play(step, mine, theirs, result):
+        if mine is None:
+            return rng.integers(0, 3, games)
+        return np.where(result > 0, mine, (mine + 1) % 3)
+    return play
+
+
+# Scripted players for simulate(): name -> factory(np, rng, games) returning
+# play(step, my_last, computer_last, my_last_result) -> moves for every game
+PLAYERS = {
+    "random": _random_player,
+    "constant": _constant_player,
+    "cycle": _cycle_player,
+    "biased": _biased_player,
+    "beat-last": _beat_last_player,
+    "win-stay-lose-shift": _win_stay_lose_shift_player,
+}
+
+
+def simulate(player, games=10000, rounds=200, opponent="markov", max_order=MAX_ORDER, seed=None):
+    """Plays `games` independent games of `rounds` rounds at once; NumPy required.
+
+    `opponent` is "markov" (MarkovOpponent, one model per game) or "random".
+    Every round is a handful of array operations over all games, so the
+    Python loop runs `rounds` times, not games * rounds. Returns the
+    player's wins, draws and losses.
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    results = np.array(RESULT, dtype=np.int8)
+    beats = np.array(BEATS)
+    play = PLAYERS[player](np, rng, games)
+    # tables[k][move, game * 3**k + context]: one row per move, so every
+    # lookup and update is a 1-D gather/scatter over all games
+    tables = [np.zeros((3, games * 3 ** k), dtype=np.uint16) for k in range(max_order + 1)]
+    first_slot = [np.arange(games) * 3 ** k for k in range(max_order + 1)]
+    history = np.zeros(games, dtype=np.int64)
+    mine = theirs = result = None
+    tally = np.zeros(3, dtype=np.int64)  # losses, draws, wins
+
+    for step in range(rounds):
+        orders = range(min(max_order, step) + 1)
+        if opponent == "markov":
+            slots = [first_slot[k] + history % 3 ** k for k in orders]
+            # Random noise below 1 breaks ties between equal counts at random
+            noise = rng.random((3, games))
+            prediction = np.full(games, -1)
+            for k in reversed(orders):
+                counts = tables[k][:, slots[k]]
+                seen = counts + noise
+                guess = np.where(seen[1] > seen[0], 1, 0)
+                guess = np.where(seen[2] > np.maximum(seen[0], seen[1]), 2, guess)
+                trusted = (prediction < 0) & (counts.sum(axis=0) >= MIN_OBSERVATIONS)
+                prediction = np.where(trusted, guess, prediction)
+            computer = np.where(prediction >= 0, beats[prediction], rng.integers(0, 3, games))
+        else:
+            computer = rng.integers(0, 3, games)
+
+        moves = np.asarray(play(step, mine, theirs, result)) % 3
+        result = results[moves, computer]
+        tally += np.bincount(result + 1, minlength=3)
+
+        if opponent == "markov":
+            for k in orders:
+                flat = tables[k].reshape(-1)
+                index = moves * tables[k].shape[1] + slots[k]
+                cell = flat[index] + 1
+                flat[index] = cell
+                full = cell >= COUNT_LIMIT
+                if full.any():
+                    tables[k][:, slots[k][full]] //= 2
+            history = (history * 3 + moves) % 3 ** max_order
+        mine, theirs = moves, computer
+
+    losses, draws, wins = (int(n) for n in tally)
+    return {"wins": wins, "draws": draws, "losses": losses}
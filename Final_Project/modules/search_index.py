@@ -0,0 +1,94 @@
+import re
+import unicodedata
+
+# Search-as-you-type over media titles and artists. Queries of three or more
+# characters match anywhere in the text through a trigram index; shorter
+# ones match the start of a word through a prefix index. Every query word
+# must match. A query that extends the previous one only re-checks the
+# previous results, which is what typing one more character does.
+
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Lowercase, accent-free form used for both indexing and queries."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def words(text):
+    return _WORD.findall(normalize(text or ""))
+
+
+def _trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class SearchIndex:
+    def __init__(self, texts=()):
+        self.build(texts)
+
+    def build(self, texts):
+        """Indexes `texts`; results are positions in this sequence, in order."""
+        self.words = [tuple(words(t)) for t in texts]
+        self.texts = [" ".join(w) for w in self.words]
+        self._trigrams = {}
+        self._prefixes = {}
+        for doc, doc_words in enumerate(self.words):
+            grams, prefixes = set(), set()
+            for word in doc_words:
+                grams |= _trigrams(word)
+                prefixes.update((word[:1], word[:2]))
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(doc)
+            for prefix in prefixes:
+                self._prefixes.setdefault(prefix, []).append(doc)
+        # Postings were built in document order, so they are already sorted
+        self._last = ("", range(len(self.texts)))
+
+    def search(self, query):
+        """Positions of the texts matching `query`, in their original order."""
+        query_words = words(query)
+        if not query_words:
+            result = range(len(self.texts))
+        else:
+            last_query, last_result = self._last
+            if last_query and _refines(words(last_query), query_words):
+                candidates = last_result
+            else:
+                candidates = min((self._postings(w) for w in query_words), key=len)
+            # Short words are answered exactly by their prefix postings, long
+            # ones by a substring check (trigram postings are only a superset)
+            long_words = [w for w in query_words if len(w) >= 3]
+            short_postings = (self._postings(w) for w in query_words if len(w) < 3)
+            short_sets = [set(docs) for docs in short_postings if docs is not candidates]
+            texts = self.texts
+            result = candidates
+            for docs in short_sets:
+                result = [doc for doc in result if doc in docs]
+            for word in long_words:
+                result = [doc for doc in result if word in texts[doc]]
+            result = list(result)
+        self._last = (query, result)
+        return result
+
+    def _postings(self, word):
+        if len(word) < 3:
+            return self._prefixes.get(word, ())
+        # The rarest of the word's trigrams
+        return min((self._trigrams.get(g, ()) for g in _trigrams(word)), key=len)
+
+
+def _refines(old_words, new_words):
+    # Typing more narrows the result only while every old word keeps its
+    # match mode: a 2-letter word becoming 3 letters switches from
+    # word-prefix to substring matching, which can match more
+    if not old_words or len(new_words) < len(old_words):
+        return False
+    for old, new in zip(old_words, new_words):
+        if not new.startswith(old) or len(old) < 3 <= len(new):
+            return False
+    return True
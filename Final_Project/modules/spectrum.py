@@ -0,0 +1,155 @@
+import importlib.util
+import threading
+import time
+from . import metrics
+
+# Spectrum bars for the audio page. The Tk thread reports what is playing
+# and where (update()) and reads `levels` when it draws; a daemon thread
+# does the rest at FRAME_RATE: it takes FFT_SIZE samples around the play
+# position straight from the decoded Sound's buffer, applies a Hann window,
+# FFTs them with NumPy and folds the bins into log-spaced bars. Nothing
+# here touches the mixer, so neither playback nor the Tk loop ever waits on
+# it. NumPy is optional and imported by the analysis thread itself, so it
+# costs nothing at startup.
+
+FFT_SIZE = 2048
+BAR_COUNT = 48
+FRAME_RATE = 30
+
+# Frequency range spread over the bars (capped at the mixer's Nyquist)
+MIN_FREQ = 40.0
+MAX_FREQ = 16000.0
+
+# Bar height 0 is this many dB below full scale
+FLOOR_DB = -60.0
+
+# How far (as a fraction of full height) a bar may drop per frame, so bars
+# fall smoothly instead of flickering with every window
+FALL_PER_FRAME = 0.08
+
+
+def available():
+    """Whether NumPy is installed, without importing it."""
+    return importlib.util.find_spec("numpy") is not None
+
+
+class SpectrumAnalyzer:
+    def __init__(self, bars=BAR_COUNT, fft_size=FFT_SIZE, frame_rate=FRAME_RATE):
+        self.bars = bars
+        self.fft_size = fft_size
+        self.frame_rate = frame_rate
+        self.levels = ()  # latest bar heights in 0..1; replaced, never modified in place
+        self._source = None  # (Sound, seconds into it, perf_counter() then, playing)
+        self._pcm = None  # (Sound, sample view, offset, scale) of the last Sound analysed
+        self._edges = {}  # sample rate -> FFT bin where each bar starts
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def update(self, sound, position, playing=True):
+        """Reports the Sound being played and the position in it (seconds)."""
+        self._source = (sound, position, time.perf_counter(), playing) if sound is not None else None
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="spectrum", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def stop(self):
+        """Playback stopped: the bars fall to zero and the thread goes idle."""
+        self._source = None
+
+    def shutdown(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        try:
+            import numpy as np
+        except ImportError:
+            metrics.incr("spectrum.unavailable")
+            return
+        self._np = np
+        self._window = np.hanning(self.fft_size).astype(np.float32)
+        # A full-scale sine peaks at this FFT magnitude under the Hann window
+        self._full_scale = self.fft_size / 4
+        self.levels = np.zeros(self.bars, dtype=np.float32)
+
+        interval = 1 / self.frame_rate
+        deadline = time.perf_counter()
+        while not self._stopping:
+            source = self._source
+            if source is None and not self.levels.any():
+                # Nothing to show: let go of the last track and sleep until
+                # update() is called again
+                self._pcm = None
+                self._wake.wait()
+                self._wake.clear()
+                deadline = time.perf_counter()
+                continue
+            with metrics.timer("spectrum.frame"):
+                self.levels = self._frame(source)
+            deadline += interval
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                deadline = time.perf_counter()  # fell behind; skip frames rather than catch up
+
+    def _frame(self, source):
+        np = self._np
+        target = 0.0
+        if source is not None:
+            sound, position, reported_at, playing = source
+            if playing:
+                position += time.perf_counter() - reported_at
+            window = self._samples(sound, position)
+            if window is not None:
+                magnitudes = np.abs(np.fft.rfft(window * self._window))
+                bands = np.maximum.reduceat(magnitudes, self._edges[self._rate])
+                db = 20 * np.log10(bands / self._full_scale + 1e-9)
+                target = np.clip(1 - db / FLOOR_DB, 0, 1)
+        return np.maximum(target, self.levels - FALL_PER_FRAME).astype(np.float32)
+
+    def _samples(self, sound, position):
+        """FFT_SIZE mono samples in -1..1 centred on `position`, or None."""
+        np = self._np
+        if self._pcm is None or self._pcm[0] is not sound:
+            self._pcm = self._open(sound)
+        _, pcm, offset, scale = self._pcm
+        start = int(position * self._rate) - self.fft_size // 2
+        if start < 0 or start + self.fft_size > len(pcm):
+            return None
+        chunk = pcm[start:start + self.fft_size]
+        if chunk.ndim == 2:
+            chunk = chunk.mean(axis=1, dtype=np.float32)
+        return (chunk.astype(np.float32) - offset) * scale
+
+    def _open(self, sound):
+        import pygame
+        np = self._np
+        rate = pygame.mixer.get_init()[0]
+        # A view on the Sound's own buffer: no copy of the decoded track
+        pcm = pygame.sndarray.samples(sound)
+        if np.issubdtype(pcm.dtype, np.floating):
+            offset, scale = 0.0, 1.0
+        else:
+            info = np.iinfo(pcm.dtype)
+            offset = (info.max + info.min + 1) / 2  # 0 for signed, the midpoint for unsigned
+            scale = 2 / (info.max - info.min + 1)
+        self._rate = rate
+        if rate not in self._edges:
+            self._edges[rate] = self._band_edges(rate)
+        return sound, pcm, offset, scale
+
+    def _band_edges(self, rate):
+        np = self._np
+        top = min(MAX_FREQ, rate / 2)
+        freqs = np.geomspace(MIN_FREQ, top, self.bars)
+        edges = np.round(freqs * self.fft_size / rate).astype(int)
+        # Low bars are narrower than one bin; give each at least one of its own
+        for i in range(1, len(edges)):
+            edges[i] = max(edges[i], edges[i - 1] + 1)
+        return np.minimum(edges, self.fft_size // 2)
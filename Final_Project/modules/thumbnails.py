@@ -0,0 +1,234 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import metrics
+
+# Poster thumbnails for the movies page. A frame is grabbed from each video
+# (with ffmpeg when it is installed, otherwise VLC's scene filter), scaled
+# to fit THUMB_WIDTH x THUMB_HEIGHT once, and kept as a PNG named after the video's path, size
+# and mtime, so an edited file gets a fresh poster and an unchanged one is
+# never decoded again.
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THUMBNAIL_DIR = os.environ.get("MEDIAAPP_THUMBNAIL_DIR", os.path.join(APP_DIR, "db", "thumbnails"))
+
+# Posters fit in this box, the movie list's row image, keeping their aspect
+THUMB_WIDTH = 160
+THUMB_HEIGHT = 90
+
+# Extraction mostly waits on a decoder process, so a couple run side by side
+THUMBNAIL_WORKERS = 2
+
+# Seconds one extraction may take before it is given up on
+EXTRACT_TIMEOUT = 20
+
+# The poster frame is taken this far into the video, which skips black
+# intro frames; videos of unknown length use DEFAULT_OFFSET seconds
+POSTER_POSITION = 0.2
+DEFAULT_OFFSET = 5.0
+
+_lock = threading.Lock()
+_pending = {}  # cache path -> Future
+_executor = None
+
+
+def cache_path(path):
+    """Where the thumbnail for the current version of `path` lives (may not exist yet)."""
+    st = os.stat(path)
+    key = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{THUMB_WIDTH}x{THUMB_HEIGHT}"
+    return os.path.join(THUMBNAIL_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".png")
+
+
+def cached(path):
+    """The cached thumbnail file for `path`, or None if there is none (yet).
+
+    Files whose extraction failed are marked (see failed()) and not retried
+    until they change.
+    """
+    try:
+        thumb = cache_path(path)
+    except OSError:
+        return None
+    return thumb if os.path.exists(thumb) else None
+
+
+def failed(path):
+    try:
+        return os.path.exists(cache_path(path) + ".failed")
+    except OSError:
+        return True
+
+
+def request(path, duration=None):
+    """Starts extracting a thumbnail in the background.
+
+    Returns a Future of the PNG path (None on failure), or None when there is
+    nothing to do because it is cached or failed before.
+    """
+    global _executor
+    if cached(path) or failed(path):
+        return None
+    thumb = cache_path(path)
+    with _lock:
+        future = _pending.get(thumb)
+        if future is not None:
+            return future
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+        future = _executor.submit(_make, path, thumb, duration)
+        _pending[thumb] = future
+    return future
+
+
+def _make(path, thumb, duration):
+    try:
+        os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+        offset = duration * POSTER_POSITION if duration else DEFAULT_OFFSET
+        with metrics.timer("thumbnails.extract"):
+            ok = extract(path, thumb, offset)
+        if not ok and duration is None:
+            ok = extract(path, thumb, 0)  # shorter than DEFAULT_OFFSET
+        if ok:
+            return thumb
+        with open(thumb + ".failed", "w"):
+            pass
+        metrics.incr("thumbnails.failed")
+        return None
+    finally:
+        with _lock:
+            _pending.pop(thumb, None)
+
+
+def extract(path, dest, offset):
+    """Writes one frame of `path`, `offset` seconds in, to `dest` as a PNG."""
+    # Written next to dest and renamed, so a half-written file is never cached
+    fd, tmp = tempfile.mkstemp(suffix=".png", dir=os.path.dirname(dest))
+    os.close(fd)
+    try:
+        try:
+            if shutil.which("ffmpeg"):
+                ok = _extract_ffmpeg(path, tmp, offset)
+            else:
+                ok = _extract_vlc(path, tmp, offset)
+        except Exception:
+            metrics.incr("thumbnails.errors")
+            ok = False
+        if ok and os.path.getsize(tmp) > 0:
+            os.replace(tmp, dest)
+            return True
+        return False
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _extract_ffmpeg(path, dest, offset):
+    # -ss before -i seeks on keyframes without decoding the skipped part.
+    # Scaled to fit the box and padded to fill it, so every poster is the same size.
+    box = f"{THUMB_WIDTH}:{THUMB_HEIGHT}"
+    command = ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-ss", f"{offset:.3f}",
+               "-i", path, "-frames:v", "1",
+               "-vf", f"scale={box}:force_original_aspect_ratio=decrease,pad={box}:(ow-iw)/2:(oh-ih)/2",
+               dest]
+    try:
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                timeout=EXTRACT_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+def _png_size(path):
+    """(width, height) from a PNG's header."""
+    with open(path, "rb") as f:
+        header = f.read(24)
+    return int.from_bytes(header[16:20], "big"), int.from_bytes(header[20:24], "big")
+
+
+def _extract_vlc(path, dest, offset):
+    # The scene filter only scales to a width or a height, keeping the aspect.
+    # Fit the width first; a frame that comes out too tall (narrower than the
+    # box) is taken again at THUMB_HEIGHT.
+    if not _vlc_frame(path, dest, offset, f"--scene-width={THUMB_WIDTH}"):
+        return False
+    if _png_size(dest)[1] <= THUMB_HEIGHT:
+        return True
+    return _vlc_frame(path, dest, offset, f"--scene-height={THUMB_HEIGHT}")
+
+
+def _vlc_frame(path, dest, offset, size_option):
+    import vlc
+    # The scene filter writes decoded frames as images; a dummy video output
+    # keeps it off screen and audio is not decoded at all
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(dest)) as scenes:
+        instance = vlc.Instance("--intf=dummy", "--vout=dummy", "--no-audio", "--quiet",
+                                "--video-filter=scene", "--scene-format=png",
+                                f"--scene-path={scenes}", "--scene-prefix=poster",
+                                "--scene-replace", "--scene-ratio=1", size_option)
+        if instance is None:
+            return False
+        player = instance.media_player_new()
+        player.set_media(instance.media_new(path, f":start-time={offset:.3f}"))
+        frame = os.path.join(scenes, "poster.png")
+        try:
+            player.play()
+            deadline = time.monotonic() + EXTRACT_TIMEOUT
+            while not os.path.exists(frame):
+                if time.monotonic() > deadline or player.get_state() in (vlc.State.Ended, vlc.State.Error):
+                    return False
+                time.sleep(0.05)
+        finally:
+            player.stop()
+            player.release()
+            instance.release()
+        shutil.copyfile(frame, dest)
+    return True
+
+
+def prune(paths):
+    """Deletes cached thumbnails and failure marks of videos not in `paths`.
+
+    Run after a library scan, so posters of removed or edited videos don't
+    pile up. Returns the number of files deleted.
+    """
+    keep = set()
+    for path in paths:
+        try:
+            keep.add(os.path.basename(cache_path(path)))
+        except OSError:
+            pass  # gone since the scan; its poster goes too
+    with _lock:
+        keep.update(os.path.basename(thumb) for thumb in _pending)
+    try:
+        names = os.listdir(THUMBNAIL_DIR)
+    except OSError:
+        return 0
+
+    removed = 0
+    for name in names:
+        # Only cache entries (sha1 names); extractions in progress use temp names
+        if len(name.split(".", 1)[0]) != 40 or not name.endswith((".png", ".png.failed")):
+            continue
+        if name.rsplit(".failed", 1)[0] in keep:
+            continue
+        try:
+            os.remove(os.path.join(THUMBNAIL_DIR, name))
+            removed += 1
+        except OSError:
+            pass
+    metrics.incr("thumbnails.pruned", removed)
+    return removed
+
+
+def shutdown():
+    """Drops queued extractions and waits for running ones (safe to call twice)."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
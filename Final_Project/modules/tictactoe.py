@@ -0,0 +1,156 @@
+import random
+
+# Tic-tac-toe on bitboards: each side is a 9-bit mask, bit i for cell i
+# (row-major). Wins are found with a 512-entry lookup table instead of
+# rescanning lines, and the computer player is a negamax search with
+# alpha-beta pruning. Its transposition table stores each position once for
+# all eight rotations/reflections, so the whole game tree is solved in a
+# few thousand nodes and later moves come straight from the table.
+
+FULL = 0x1FF
+
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,  # diagonals
+)
+
+# WINNING[mask] is true when `mask` contains a complete line
+WINNING = bytes(any(mask & w == w for w in WIN_MASKS) for mask in range(FULL + 1))
+
+# Centre, corners, then edges: strong moves first makes alpha-beta cut sooner
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+
+def _cell_maps():
+    """The 8 symmetries of the board as cell permutations."""
+    def rotate(cell):
+        row, col = divmod(cell, 3)
+        return col * 3 + (2 - row)
+
+    def mirror(cell):
+        row, col = divmod(cell, 3)
+        return row * 3 + (2 - col)
+
+    maps = []
+    cells = list(range(9))
+    for _ in range(4):
+        maps.append(cells)
+        maps.append([mirror(c) for c in cells])
+        cells = [rotate(c) for c in cells]
+    return maps
+
+
+def _mask_table(cell_map):
+    table = []
+    for mask in range(FULL + 1):
+        moved = 0
+        for cell in range(9):
+            if mask >> cell & 1:
+                moved |= 1 << cell_map[cell]
+        table.append(moved)
+    return table
+
+
+# SYMMETRIES[t][mask] is `mask` under symmetry t; index 0 is the identity
+SYMMETRIES = tuple(_mask_table(m) for m in _cell_maps())
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def winner(x, o):
+    """"X", "O" or None for a position given as two masks."""
+    if WINNING[x]:
+        return "X"
+    if WINNING[o]:
+        return "O"
+    return None
+
+
+def canonical(me, opp):
+    """One key for a position and all its rotations/reflections (side to move first)."""
+    return min(sym[me] << 9 | sym[opp] for sym in SYMMETRIES)
+
+
+class Solver:
+    """Negamax search; scores are from the side to move, faster wins score higher.
+
+    `prune` and `table` exist so the benchmark can compare plain minimax,
+    alpha-beta and alpha-beta with the transposition table.
+    """
+
+    def __init__(self, prune=True, table=True):
+        self.prune = prune
+        self.table = {} if table else None
+        self.nodes = 0
+
+    def value(self, me, opp, alpha=-10, beta=10):
+        self.nodes += 1
+        if WINNING[opp]:
+            # The previous move won; sooner losses are worse
+            return -1 - bin(FULL & ~(me | opp)).count("1")
+        empty = FULL & ~(me | opp)
+        if not empty:
+            return 0
+
+        key = None
+        if self.table is not None:
+            key = canonical(me, opp)
+            entry = self.table.get(key)
+            if entry is not None:
+                score, bound = entry
+                if bound == EXACT:
+                    return score
+                if bound == LOWER and score >= beta:
+                    return score
+                if bound == UPPER and score <= alpha:
+                    return score
+
+        original_alpha = alpha
+        best = -10
+        for cell in MOVE_ORDER:
+            bit = 1 << cell
+            if not empty & bit:
+                continue
+            score = -self.value(opp, me | bit, -beta, -alpha)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+            if self.prune and alpha >= beta:
+                break
+
+        if key is not None:
+            if best <= original_alpha:
+                bound = UPPER
+            elif best >= beta:
+                bound = LOWER
+            else:
+                bound = EXACT
+            self.table[key] = (best, bound)
+        return best
+
+    def scores(self, me, opp):
+        """Exact score of every legal move for the side to move, as {cell: score}."""
+        empty = FULL & ~(me | opp)
+        return {cell: -self.value(opp, me | 1 << cell) for cell in MOVE_ORDER if empty >> cell & 1}
+
+    def best_move(self, me, opp, rng=None):
+        """A cell with the best score; ties are broken at random when `rng` is given."""
+        scores = self.scores(me, opp)
+        if not scores:
+            return None
+        top = max(scores.values())
+        best = [cell for cell in MOVE_ORDER if scores.get(cell) == top]
+        return rng.choice(best) if rng else best[0]
+
+
+# Shared by the app: the table fills up over the first game and stays warm
+_solver = Solver()
+_rng = random.Random()
+
+
+def best_move(me, opp):
+    """The computer's move for the side whose stones are `me`; safe to call from a worker thread."""
+    return _solver.best_move(me, opp, _rng)
+
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from . import metrics
+
+# Page-navigation traces. A trace starts when a navigation is requested and
+# ends at the first idle after the new page has rendered; span() blocks
+# inside it (teardown, construction, file checks, engine loading...) are
+# recorded with their nesting depth. Finished traces go into a ring buffer,
+# so memory stays bounded however long the app runs. Traces are started and
+# finished on the Tk thread; span() outside an active trace costs one check.
+
+RING_SIZE = 2000
+
+_lock = threading.Lock()
+_traces = deque(maxlen=RING_SIZE)
+_active = None
+
+
+class Trace:
+    __slots__ = ("page", "wall_start", "start", "spans", "depth")
+
+    def __init__(self, page):
+        self.page = page
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self.depth = 0
+
+    def as_dict(self, end):
+        return {
+            "page": self.page,
+            "started_at": self.wall_start,
+            "total_ms": (end - self.start) * 1000,
+            "spans": self.spans,
+        }
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.trace.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        trace = self.trace
+        trace.depth -= 1
+        trace.spans.append({
+            "name": self.name,
+            "depth": trace.depth,
+            "start_ms": (self.start - trace.start) * 1000,
+            "duration_ms": (end - self.start) * 1000,
+        })
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def begin(page):
+    """Starts a navigation trace unless one is already running; returns whether it started."""
+    global _active
+    if _active is not None:
+        return False
+    _active = Trace(page)
+    return True
+
+
+def span(name):
+    """Context manager timing a step of the running trace (a no-op without one)."""
+    return _Span(_active, name) if _active is not None else _NULL_SPAN
+
+
+def finish():
+    """Ends the running trace and stores it; returns its total in seconds."""
+    global _active
+    trace, _active = _active, None
+    if trace is None:
+        return None
+    end = time.perf_counter()
+    with _lock:
+        _traces.append(trace.as_dict(end))
+    metrics.observe(f"page.{trace.page}", end - trace.start)
+    return end - trace.start
+
+
+def abandon():
+    """Drops the running trace (the navigation did not happen)."""
+    global _active
+    _active = None
+
+
+def traces():
+    with _lock:
+        return list(_traces)
+
+
+def summary():
+    """Per page: count, p50/p95/max of total time (ms) and the mean of each top-level span."""
+    by_page = {}
+    for trace in traces():
+        by_page.setdefault(trace["page"], []).append(trace)
+    result = {}
+    for page, items in sorted(by_page.items()):
+        totals = sorted(t["total_ms"] for t in items)
+        n = len(totals)
+        steps = {}
+        for t in items:
+            for s in t["spans"]:
+                if s["depth"] == 0:
+                    steps[s["name"]] = steps.get(s["name"], 0.0) + s["duration_ms"] / n
+        result[page] = {
+            "count": n,
+            "p50_ms": totals[min(n - 1, int(0.50 * n))],
+            "p95_ms": totals[min(n - 1, int(0.95 * n))],
+            "max_ms": totals[-1],
+            "mean_span_ms": steps,
+        }
+    return result
+
+
+def export(path):
+    """Writes every buffered trace plus summary() to `path` as JSON, atomically."""
+    data = {"exported_at": time.time(), "ring_size": RING_SIZE,
+            "summary": summary(), "traces": traces()}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def reset():
+    with _lock:
+        _traces.clear()
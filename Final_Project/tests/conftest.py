@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app's modules the way main.py does, from Final_Project
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import audit, database
+
+
+@pytest.fixture
+def db():
+    """A fresh in-memory database with every migration applied."""
+    database.configure_database(":memory:")
+    database.initialize_db()
+    yield database
+    audit.shutdown()  # its writer would otherwise reconnect after the close
+    database.close_db_connections()
@@ -0,0 +1,43 @@
+from modules import auth, hashing
+
+
+def test_bulk_registration_reports_conflicts(db, monkeypatch):
+    monkeypatch.setattr(hashing, "DEFAULT_PARAMS", "pbkdf2_sha256$1")
+    auth.register_user("taken", "pw")
+    users = [("ann", "pw"), ("bob", ""), ("ann", "other"), ("taken", "pw"), ("oops",), ("cy", "pw")]
+    created, conflicts = auth.register_users_bulk(users, chunk_size=4, workers=1)
+    assert created == 2
+    assert conflicts == [
+        (2, "bob", "Missing username or password"),
+        (3, "ann", "Duplicate username in batch"),
+        (4, "taken", "Username already exists!"),
+        (5, None, "Malformed row"),
+    ]
+    assert auth.login_user("cy", "pw")[0]
+
+
+def test_bulk_registration_reads_csv(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(hashing, "DEFAULT_PARAMS", "pbkdf2_sha256$1")
+    path = tmp_path / "users.csv"
+    path.write_text("username,password\ndee,pw1\nemma,pw2\n", encoding="utf-8")
+    assert auth.register_users_bulk(str(path), workers=1) == (2, [])
+    assert auth.login_user("emma", "pw2")[0]
+
+
+def test_session_lifecycle(db):
+    token = auth.create_session("ann")
+    assert auth.validate_session(token) == "ann"
+    assert auth.validate_session("not-a-token") is None
+    assert auth.validate_session(None) is None
+    auth.revoke_session(token)
+    assert auth.validate_session(token) is None
+
+
+def test_sessions_expire_and_are_purged_at_login(db):
+    expired = auth.create_session("ann", ttl=0)
+    assert auth.validate_session(expired) is None
+    other = auth.create_session("bob")
+    with db.db_connection() as conn:
+        assert conn.execute("SELECT username FROM sessions").fetchall() == [("bob",)]
+    auth.revoke_user_sessions("bob")
+    assert auth.validate_session(other) is None
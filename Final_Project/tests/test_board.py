@@ -0,0 +1,60 @@
+import pytest
+
+from modules.board import Board
+
+
+def play(board, *cells):
+    result = None
+    for cell in cells:
+        result = board.play(cell)
+    return result
+
+
+def test_row_win_on_3x3():
+    board = Board()
+    assert play(board, 0, 3, 1, 4, 2) == "X"
+    assert board.winning_line == (0, 1, 2)
+    assert not board.is_free(5)  # the game is over
+
+
+def test_diagonals_and_k_in_a_row():
+    board = Board(7, 4)
+    # X on the anti-diagonal 3, 9, 15, 21 (row r, col 3 - r); O scattered
+    assert play(board, 3, 0, 9, 1, 15, 2) is None
+    assert board.play(21) == "X"
+    assert board.winning_line == (3, 9, 15, 21)
+
+
+def test_draw():
+    board = Board()
+    assert play(board, 0, 1, 2, 4, 3, 5, 7, 6, 8) == "draw"
+
+
+def test_undo_restores_turn_and_result():
+    board = Board()
+    play(board, 0, 3, 1, 4, 2)
+    board.undo()
+    assert board.result is None and board.winning_line == ()
+    assert board.mark(2) == "" and board.turn == 1
+    assert board.play(5) is None
+
+
+def test_invalid_moves_and_sizes():
+    board = Board()
+    board.play(4)
+    with pytest.raises(ValueError):
+        board.play(4)
+    with pytest.raises(ValueError):
+        board.play(9)
+    with pytest.raises(ValueError):
+        Board(20)
+    with pytest.raises(ValueError):
+        Board(3, 4)
+
+
+def test_to_move_masks():
+    board = Board()
+    play(board, 0, 4)
+    assert board.to_move() == (1 << 0, 1 << 4)  # X to move
+    board.play(8)
+    assert board.to_move() == (1 << 4, 1 << 0 | 1 << 8)
@@ -0,0 +1,49 @@
+import os
+import sqlite3
+
+from modules import audit, database, hashing
+from modules.auth import login_user, register_user
+
+
+def test_file_snapshot_restores_into_memory(tmp_path):
+    database.configure_database(str(tmp_path / "app.db"))
+    try:
+        database.initialize_db()
+        register_user("alice", "secret")
+        snapshot = str(tmp_path / "snapshot.db")
+        database.backup_database(snapshot)
+
+        database.configure_database(":memory:")
+        database.initialize_db()
+        database.restore_database(snapshot)
+        with database.db_connection() as conn:
+            assert conn.execute("SELECT username FROM users").fetchall() == [("alice",)]
+    finally:
+        database.close_db_connections()
+
+
+def test_migrations_upgrade_a_baseline_database(tmp_path):
+    # The users table as the app first shipped it: hex text, no hash_params
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL, "
+                 "password_hash TEXT NOT NULL, salt TEXT NOT NULL)")
+    salt = os.urandom(32)
+    key = hashing.derive_key("secret", salt, hashing.LEGACY_PARAMS)
+    conn.execute("INSERT INTO users (username, password_hash, salt) VALUES (?, ?, ?)",
+                 ("alice", key.hex(), salt.hex()))
+    conn.commit()
+    conn.close()
+
+    database.configure_database(path)
+    try:
+        database.initialize_db()
+        with database.db_connection() as conn:
+            assert conn.execute("SELECT password_hash, salt, hash_params FROM users").fetchone() == (key, salt, None)
+            versions = [v for (v,) in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+            assert versions == [version for version, _ in database.MIGRATIONS]
+        assert login_user("alice", "secret")[0]
+        database.initialize_db()  # nothing left to apply
+    finally:
+        audit.shutdown()
+        database.close_db_connections()
@@ -0,0 +1,39 @@
+import pytest
+
+from modules import auth, hashing
+
+
+def test_parse_params():
+    assert hashing.parse_params("pbkdf2_sha256$1000") == ("pbkdf2_sha256", (1000,))
+    assert hashing.parse_params("scrypt$1024$8$1") == ("scrypt", (1024, 8, 1))
+    assert hashing.parse_params(None) == ("pbkdf2_sha256", (100000,))
+    for bad in ("pbkdf2_sha256$x", "scrypt$1000$8$1", "md5$1"):
+        with pytest.raises(ValueError):
+            hashing.parse_params(bad)
+
+
+def test_invalid_environment_params_fall_back(monkeypatch):
+    monkeypatch.setenv("MEDIAAPP_HASH_PARAMS", "pbkdf2_sha256$lots")
+    with pytest.warns(UserWarning):
+        assert hashing._params_from_environment() == hashing.LEGACY_PARAMS
+    monkeypatch.setenv("MEDIAAPP_HASH_PARAMS", "scrypt$1024$8$1")
+    assert hashing._params_from_environment() == "scrypt$1024$8$1"
+
+
+def test_needs_rehash(monkeypatch):
+    monkeypatch.setattr(hashing, "DEFAULT_PARAMS", "pbkdf2_sha256$1000")
+    assert hashing.needs_rehash("pbkdf2_sha256$500")
+    assert hashing.needs_rehash(None)  # legacy rows
+    assert not hashing.needs_rehash("pbkdf2_sha256$1000")
+
+
+def test_login_upgrades_old_hashes(db, monkeypatch):
+    monkeypatch.setattr(hashing, "DEFAULT_PARAMS", "pbkdf2_sha256$10")
+    auth.register_user("ann", "secret")
+    monkeypatch.setattr(hashing, "DEFAULT_PARAMS", "scrypt$1024$8$1")
+    assert not auth.login_user("ann", "wrong")[0]
+    assert auth.login_user("ann", "secret")[0]
+    with db.db_connection() as conn:
+        params = conn.execute("SELECT hash_params FROM users WHERE username = 'ann'").fetchone()[0]
+    assert params == "scrypt$1024$8$1"
+    assert auth.login_user("ann", "secret")[0]
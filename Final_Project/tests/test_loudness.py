@@ -0,0 +1,43 @@
+import math
+import threading
+import time
+
+import pytest
+
+from modules import loudness
+
+
+def test_gain_is_capped_by_peak():
+    assert loudness.gain_for(-24.0, 0.1) == pytest.approx(6.0)
+    assert loudness.gain_for(-30.0, 0.5) == pytest.approx(-20 * math.log10(0.5))
+    assert loudness.gain_for(None, 1.0) == 0.0
+
+
+def test_reference_lets_quiet_tracks_match():
+    gains = [-6.0, 4.0, None, 30.0]
+    reference = loudness.reference_gain(gains)
+    assert reference == loudness.MAX_REFERENCE_DB
+    assert loudness.volume(4.0, 4.0) == 1.0
+    assert loudness.volume(-6.0, 4.0) == pytest.approx(10 ** (-10 / 20))
+    assert loudness.volume(None) == 1.0
+    assert loudness.reference_gain([-3.0, None]) == 0.0
+
+
+def test_measure_full_scale_sine():
+    np = pytest.importorskip("numpy")
+    t = np.arange(loudness.SAMPLE_RATE * 2) / loudness.SAMPLE_RATE
+    tone = np.sin(2 * np.pi * 997 * t)
+    lufs, peak = loudness.measure(np.stack([tone, tone], axis=1) * 0.5)
+    # A 997 Hz sine at -6 dBFS in both channels reads about -6 LUFS
+    assert lufs == pytest.approx(-6.0, abs=0.3)
+    assert peak == pytest.approx(0.5, abs=1e-3)
+
+
+def test_cancel_kills_a_running_decoder(monkeypatch):
+    event = threading.Event()
+    event.set()
+    monkeypatch.setattr(loudness, "_worker_cancel", event)
+    start = time.monotonic()
+    with pytest.raises(Exception):
+        loudness._run_decoder(["sleep", "10"])
+    assert time.monotonic() - start < 2
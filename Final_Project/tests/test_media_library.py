@@ -0,0 +1,41 @@
+import os
+import wave
+
+from modules.media_library import list_media, scan_library
+
+
+def write_wav(path, seconds=1):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(bytes(16000 * seconds))
+
+
+def test_scan_adds_updates_and_removes(db, tmp_path):
+    music = tmp_path / "music"
+    music.mkdir()
+    write_wav(music / "one.wav")
+    write_wav(music / "two.wav")
+    (music / "notes.txt").write_text("not media")
+
+    assert scan_library([str(music)]) == {"added": 2, "updated": 0, "removed": 0, "unchanged": 0}
+    assert scan_library([str(music)]) == {"added": 0, "updated": 0, "removed": 0, "unchanged": 2}
+
+    write_wav(music / "one.wav", seconds=2)
+    stat = os.stat(music / "one.wav")
+    os.utime(music / "one.wav", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    os.remove(music / "two.wav")
+    assert scan_library([str(music)]) == {"added": 0, "updated": 1, "removed": 1, "unchanged": 0}
+    [track] = list_media("audio")
+    assert track["title"] == "One"
+    assert track["duration"] == 2
+
+
+def test_rows_outside_the_roots_are_dropped(db, tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        write_wav(tmp_path / folder / f"{folder}.wav")
+    scan_library([str(tmp_path / "a"), str(tmp_path / "b")])
+    assert scan_library([str(tmp_path / "a")])["removed"] == 1
+    assert [t["title"] for t in list_media("audio")] == ["A"]
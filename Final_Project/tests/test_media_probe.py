@@ -0,0 +1,85 @@
+import struct
+import wave
+
+import pytest
+
+from modules.media_probe import media_kind, probe
+
+
+def box(kind, payload=b""):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def mp4(title_box):
+    mvhd = box(b"mvhd", bytes(4) + struct.pack(">IIII", 0, 0, 1000, 90500))
+    ilst = box(b"ilst", title_box + box(b"\xa9ART", box(b"data", bytes(8) + b"The Band")))
+    meta = box(b"meta", bytes(4) + ilst)
+    return box(b"ftyp", b"M4A ") + box(b"moov", mvhd + box(b"udta", meta))
+
+
+def test_kind_from_extension():
+    assert media_kind("a/Song.MP3") == "audio"
+    assert media_kind("film.mkv") == "video"
+    assert media_kind("notes.txt") is None
+
+
+def test_mp4_tags_and_duration(tmp_path):
+    path = tmp_path / "song.m4a"
+    path.write_bytes(mp4(box(b"\xa9nam", box(b"data", bytes(8) + b"Title"))))
+    info = probe(str(path))
+    assert (info["title"], info["artist"]) == ("Title", "The Band")
+    assert info["duration"] == pytest.approx(90.5)
+
+
+def test_mp4_empty_data_atom_is_skipped(tmp_path):
+    path = tmp_path / "damaged.m4a"
+    path.write_bytes(mp4(box(b"\xa9nam", box(b"data"))) + b"x" * 100000)
+    info = probe(str(path))
+    assert "title" not in info
+    assert info["artist"] == "The Band"
+
+
+def test_wav_duration_and_bitrate(tmp_path):
+    path = tmp_path / "tone.wav"
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(bytes(16000))
+    info = probe(str(path))
+    assert info["duration"] == pytest.approx(1.0)
+    assert info["bitrate"] == 128000
+
+
+def test_mp3_id3_title_and_cbr_duration(tmp_path):
+    frame_body = b"\x03Song"
+    frame = b"TIT2" + struct.pack(">I", len(frame_body)) + b"\0\0" + frame_body
+    tag = b"ID3\x03\x00\x00" + bytes([0, 0, 0, len(frame)]) + frame
+    mpeg_frame = b"\xff\xfb\x90\x00" + bytes(413)  # MPEG-1 layer III, 128 kbps, 44.1 kHz
+    path = tmp_path / "song.mp3"
+    path.write_bytes(tag + mpeg_frame * 100)
+    info = probe(str(path))
+    assert info["title"] == "Song"
+    assert info["bitrate"] == 128000
+    assert info["duration"] == pytest.approx(417 * 100 * 8 / 128000)
+
+
+def test_flac_streaminfo_and_comments(tmp_path):
+    packed = 44100 << 44 | 1 << 41 | 15 << 36 | 44100 * 3
+    streaminfo = bytes(10) + packed.to_bytes(8, "big") + bytes(16)
+    comments = [b"TITLE=Flac Song", b"artist=Someone"]
+    vorbis = struct.pack("<I", 0) + struct.pack("<I", len(comments))
+    vorbis += b"".join(struct.pack("<I", len(c)) + c for c in comments)
+    data = (b"fLaC" + bytes([0]) + len(streaminfo).to_bytes(3, "big") + streaminfo
+            + bytes([0x84]) + len(vorbis).to_bytes(3, "big") + vorbis)
+    path = tmp_path / "song.flac"
+    path.write_bytes(data)
+    info = probe(str(path))
+    assert (info["title"], info["artist"]) == ("Flac Song", "Someone")
+    assert info["duration"] == pytest.approx(3.0)
+
+
+def test_garbage_gives_nothing(tmp_path):
+    path = tmp_path / "broken.mp4"
+    path.write_bytes(b"\x00\x00\x00\x04junk")
+    assert probe(str(path)) == {}
@@ -0,0 +1,80 @@
+import os
+import wave
+
+import pytest
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+pygame = pytest.importorskip("pygame")
+
+from modules import audio_cache
+from modules.playqueue import PlayQueue
+
+
+@pytest.fixture
+def tracks(tmp_path):
+    pygame.mixer.init(frequency=22050, size=-16, channels=1)
+    paths = []
+    for name in ("a", "b", "c"):
+        path = str(tmp_path / f"{name}.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(22050)
+            f.writeframes(bytes(4410))
+        paths.append(path)
+    yield paths
+    audio_cache.shutdown()
+    audio_cache.clear()
+    pygame.mixer.quit()
+
+
+def test_next_previous_and_end_of_queue(tracks):
+    changes = []
+    queue = PlayQueue(on_change=changes.append)
+    queue.set_tracks(tracks)
+    assert queue.play()
+    assert queue.current == tracks[0]
+    assert queue.next() and queue.current == tracks[1]
+    assert changes[:2] == tracks[:2]
+    assert queue.previous() and queue.current == tracks[0]
+    queue.play(tracks[2])
+    assert not queue.next()  # repeat off: the queue ends
+    assert queue.current is None
+    queue.stop()
+
+
+def test_repeat_modes(tracks):
+    queue = PlayQueue()
+    queue.set_tracks(tracks)
+    queue.play(tracks[2])
+    queue.set_repeat("all")
+    assert queue.next() and queue.current == tracks[0]
+    queue.set_repeat("one")
+    assert queue._following(queue._pos) == queue._pos
+    assert queue._following(queue._pos, manual=True) == queue._pos + 1
+    with pytest.raises(ValueError):
+        queue.set_repeat("sometimes")
+    queue.stop()
+
+
+def test_shuffle_keeps_the_current_track_and_every_other(tracks):
+    queue = PlayQueue(shuffle_seed=3)
+    queue.set_tracks(tracks)
+    queue.play(tracks[1])
+    queue.set_shuffle(True)
+    assert queue.current == tracks[1]
+    assert queue._pos == 0
+    assert sorted(queue._order) == [0, 1, 2]
+    queue.stop()
+
+
+def test_new_track_list_drops_the_prepared_next_track(tracks):
+    queue = PlayQueue()
+    queue.set_tracks(tracks)
+    queue.play(tracks[0])
+    queue.set_tracks([tracks[0], tracks[2]])
+    assert queue._next is None and queue._queued is None
+    assert queue.current == tracks[0]
+    queue.set_tracks(tracks[1:])
+    assert queue.current is None  # the playing track was removed
@@ -0,0 +1,40 @@
+import threading
+
+from modules import resume_positions
+
+
+def test_position_is_read_back_before_and_after_the_write(db):
+    resume_positions.save_position("alice", "/films/a.mkv", 60000, 600000)
+    assert resume_positions.get_position("alice", "/films/a.mkv") == 60000
+    resume_positions.flush()
+    assert resume_positions.get_position("alice", "/films/a.mkv") == 60000
+    resume_positions.shutdown()
+
+
+def test_near_the_ends_starts_over(db):
+    resume_positions.save_position("alice", "/films/a.mkv", 1000, 600000)
+    assert resume_positions.get_position("alice", "/films/a.mkv") == 0
+    resume_positions.save_position("alice", "/films/a.mkv", 595000, 600000)
+    assert resume_positions.get_position("alice", "/films/a.mkv") == 0
+    assert resume_positions.get_position("bob", "/films/a.mkv") == 0
+    resume_positions.shutdown()
+
+
+def test_batch_being_written_stays_readable(db, monkeypatch):
+    entered, release = threading.Event(), threading.Event()
+    write_batch = resume_positions._write_batch
+
+    def slow_write(batch):
+        entered.set()
+        release.wait(5)
+        write_batch(batch)
+
+    monkeypatch.setattr(resume_positions, "_write_batch", slow_write)
+    resume_positions.save_position("alice", "/films/b.mkv", 90000, 600000)
+    writer = threading.Thread(target=resume_positions.flush)
+    writer.start()
+    entered.wait(5)
+    assert resume_positions.get_position("alice", "/films/b.mkv") == 90000
+    release.set()
+    writer.join()
+    resume_positions.shutdown()
@@ -0,0 +1,40 @@
+import random
+
+from modules import rps
+
+
+def test_state_round_trip():
+    opponent = rps.MarkovOpponent(rng=random.Random(1))
+    for move in [rps.ROCK, rps.ROCK, rps.PAPER, rps.SCISSORS] * 10:
+        opponent.observe(move)
+    restored = rps.MarkovOpponent.from_state(*opponent.state())
+    assert restored.counts == opponent.counts
+    assert (restored.history, restored.played) == (opponent.history, opponent.played)
+
+
+def test_short_blob_gives_fresh_opponent():
+    max_order, history, played, blob = rps.MarkovOpponent().state()
+    restored = rps.MarkovOpponent.from_state(max_order, history, played, blob[:-2])
+    assert restored.played == 0
+    restored.observe(rps.PAPER)  # arrays keep their size
+
+
+def test_learns_a_constant_player():
+    opponent = rps.MarkovOpponent(rng=random.Random(2))
+    for _ in range(5):
+        opponent.observe(rps.ROCK)
+    assert opponent.choose() == rps.PAPER
+
+
+def test_outcome_table():
+    assert rps.outcome(rps.PAPER, rps.ROCK) == 1
+    assert rps.outcome(rps.ROCK, rps.PAPER) == -1
+    assert all(rps.outcome(m, m) == 0 for m in range(3))
+
+
+def test_save_and_load(db):
+    opponent = rps.MarkovOpponent()
+    opponent.observe(rps.SCISSORS)
+    rps.save_opponent("alice", opponent.state())
+    assert rps.load_opponent("alice").counts == opponent.counts
+    assert rps.load_opponent("bob").played == 0
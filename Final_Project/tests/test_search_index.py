@@ -0,0 +1,35 @@
+from modules.search_index import SearchIndex
+
+TITLES = ["Blue Train", "Kind of Blue", "A Love Supreme", "Blue in Green", "Café del Mar"]
+
+
+def test_short_queries_match_word_starts():
+    index = SearchIndex(TITLES)
+    assert index.search("bl") == [0, 1, 3]
+    assert index.search("lu") == []
+
+
+def test_long_queries_match_anywhere():
+    index = SearchIndex(TITLES)
+    assert index.search("lue") == [0, 1, 3]
+    assert index.search("upre") == [2]
+
+
+def test_every_word_must_match():
+    index = SearchIndex(TITLES)
+    assert index.search("blue gr") == [3]
+    assert list(index.search("")) == [0, 1, 2, 3, 4]
+
+
+def test_refining_and_widening_give_fresh_answers():
+    index = SearchIndex(TITLES)
+    assert index.search("blu") == [0, 1, 3]
+    assert index.search("blue t") == [0]
+    assert index.search("blue") == [0, 1, 3]  # shorter than the last query again
+    assert index.search("love") == [2]
+
+
+def test_accents_are_ignored():
+    index = SearchIndex(TITLES)
+    assert index.search("cafe") == [4]
+    assert index.search("CAFÉ") == [4]
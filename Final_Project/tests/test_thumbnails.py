@@ -0,0 +1,44 @@
+import os
+import struct
+import zlib
+
+from modules import thumbnails
+
+
+def write_png(path, width, height):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    raw = b"".join(b"\0" + bytes(width) for _ in range(height))
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+def test_png_size(tmp_path):
+    write_png(tmp_path / "poster.png", 120, 90)
+    assert thumbnails._png_size(tmp_path / "poster.png") == (120, 90)
+
+
+def test_prune_keeps_current_posters_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnails, "THUMBNAIL_DIR", str(tmp_path / "thumbs"))
+    (tmp_path / "thumbs").mkdir()
+    kept, dropped = tmp_path / "kept.mkv", tmp_path / "dropped.mkv"
+    kept.write_bytes(b"a")
+    dropped.write_bytes(b"b")
+    for video in (kept, dropped):
+        write_png(thumbnails.cache_path(video), 160, 90)
+    open(thumbnails.cache_path(dropped) + ".failed", "w").close()
+    (tmp_path / "thumbs" / "tmp1234.png").write_bytes(b"")  # extraction in progress
+
+    assert thumbnails.prune([str(kept)]) == 2
+    assert thumbnails.cached(str(kept))
+    assert sorted(p.name for p in (tmp_path / "thumbs").iterdir()) == sorted(
+        [os.path.basename(thumbnails.cache_path(kept)), "tmp1234.png"])
+
+
+def test_edited_video_gets_a_new_poster(tmp_path):
+    video = tmp_path / "a.mkv"
+    video.write_bytes(b"a")
+    before = thumbnails.cache_path(video)
+    video.write_bytes(b"ab")
+    assert thumbnails.cache_path(video) != before
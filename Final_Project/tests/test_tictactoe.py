@@ -0,0 +1,41 @@
+import random
+
+from modules import tictactoe
+from modules.tictactoe import FULL, WINNING, Solver
+
+
+def positions(me=0, opp=0, seen=None):
+    """Every non-final position reachable from the empty board, side to move first."""
+    seen = set() if seen is None else seen
+    if (me, opp) in seen or WINNING[opp] or me | opp == FULL:
+        return seen
+    seen.add((me, opp))
+    for cell in range(9):
+        if not (me | opp) >> cell & 1:
+            positions(opp, me | 1 << cell, seen)
+    return seen
+
+
+def test_empty_board_is_a_draw():
+    assert Solver().value(0, 0) == 0
+    assert Solver(prune=False, table=False).value(0, 0) == 0
+
+
+def test_best_moves_score_like_plain_minimax():
+    minimax, fast = Solver(prune=False, table=False), Solver()
+    for me, opp in random.Random(5).sample(sorted(positions()), 300):
+        exact = minimax.scores(me, opp)
+        assert exact[fast.best_move(me, opp)] == max(exact.values())
+
+
+def test_takes_a_win_and_blocks_a_loss():
+    x = 1 << 0 | 1 << 1  # X on 0 and 1, to move
+    o = 1 << 3 | 1 << 4
+    assert tictactoe.best_move(x, o) == 2
+    assert tictactoe.best_move(1 << 0 | 1 << 8, 1 << 3 | 1 << 4) == 5  # only 5 stops O
+
+
+def test_symmetric_positions_share_a_key():
+    corner, other_corner = 1 << 0, 1 << 8
+    assert tictactoe.canonical(corner, 0) == tictactoe.canonical(other_corner, 0)
+    assert tictactoe.canonical(1 << 4, 0) != tictactoe.canonical(corner, 0)